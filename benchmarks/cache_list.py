@@ -0,0 +1,52 @@
+"""
+Micro-benchmark for CacheList.append() on a full cache, which is the
+per-frame cost the Controller pays for its frame history.
+
+    python -m benchmarks.cache_list
+"""
+from timeit import timeit
+
+from src.collections import CacheList
+
+DEPTHS = 300, 3000, 30000
+FRAMES = 1000
+
+
+class ShiftCacheList(list):
+    # the previous list based implementation, kept here for comparison
+    def __init__(self, size):
+        super(ShiftCacheList, self).__init__()
+        self._size = size
+
+    def append(self, p_object):
+        super(ShiftCacheList, self).append(p_object)
+
+        if len(self) > self._size:
+            for i in range(len(self) - 1):
+                self[i] = self[i + 1]
+            self.pop()
+
+
+def get_frame_cost(cls, depth, frames=FRAMES):
+    cache = cls(depth)
+    for i in range(depth):
+        cache.append(i)
+
+    seconds = timeit(lambda: cache.append(0), number=frames)
+
+    return seconds / frames
+
+
+def main():
+    print("{:>8} {:>16} {:>16}".format(
+        "depth", "ring (us/frame)", "shift (us/frame)"))
+
+    for depth in DEPTHS:
+        ring = get_frame_cost(CacheList, depth) * 1e6
+        shift = get_frame_cost(ShiftCacheList, depth, frames=100) * 1e6
+
+        print("{:>8} {:>16.3f} {:>16.3f}".format(depth, ring, shift))
+
+
+if __name__ == "__main__":
+    main()
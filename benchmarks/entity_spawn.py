@@ -0,0 +1,77 @@
+"""
+Benchmark of spawning 10k entities, comparing the one frame Event fast path
+with the previous event setup, where every queue_event() call made an event
+dict, a Timer and a closure for the entity's Clock.
+
+    python -m benchmarks.entity_spawn
+"""
+from time import perf_counter
+
+from src.entities import Entity
+from src.events import EventHandler
+from src.meters import Timer
+from zs_globals import Events
+
+ENTITIES = 10000
+
+
+# the previous queue_event() implementation, kept here for comparison
+def queue_timer_event(self, *events):
+    if len(events) > 1:
+        event = self.chain_events(*events)
+    else:
+        event = dict(self.interpret(events[0]))
+
+    name = event[Events.NAME]
+    duration = event.get(Events.DURATION, 1)
+
+    timer = Timer(name, duration)
+    event[Events.TIMER] = timer
+    self.entity.clock.add_timers(
+        timer)
+
+    lerp = event.get(Events.LERP, True)
+
+    def handle_event():
+        self.handle_event(event)
+
+    if lerp:
+        timer.on_tick = handle_event
+    else:
+        timer.on_switch_off = handle_event
+
+
+def get_spawn_cost(queue_event=None):
+    default = EventHandler.queue_event
+    if queue_event:
+        EventHandler.queue_event = queue_event
+
+    try:
+        start = perf_counter()
+        entities = [Entity("entity {}".format(i)) for i in range(ENTITIES)]
+        spawned = perf_counter()
+
+        # the "spawn" event is handled on each entity's first update
+        for entity in entities:
+            entity.update()
+        updated = perf_counter()
+
+    finally:
+        EventHandler.queue_event = default
+
+    assert all(entity.spawned for entity in entities)
+
+    return spawned - start, updated - spawned
+
+
+def main():
+    print("{} entities, ms".format(ENTITIES))
+    print("{:>16} {:>10} {:>14}".format("", "__init__", "first update"))
+
+    for label, method in (("Event", None), ("Timer event", queue_timer_event)):
+        init, update = get_spawn_cost(method)
+        print("{:>16} {:>10.1f} {:>14.1f}".format(label, init * 1e3, update * 1e3))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark of drawing a deep tree of nested layers, comparing cached
+canvas subsurfaces with rebuilding every canvas on every draw.
+
+    python -m benchmarks.layer_canvas
+"""
+from os import environ
+from timeit import timeit
+
+environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from pygame.surface import Surface
+
+from src.entities import Layer
+from zs_globals import Settings
+
+DEPTH = 50
+FRAMES = 1000
+
+
+class UncachedLayer(Layer):
+    # rebuilds its canvas on every draw, as Layer did before caching
+    def get_canvas(self, screen):
+        return self.make_canvas(screen)
+
+
+def make_panels(cls, depth=DEPTH):
+    root = cls("panel 0")
+    parent = root
+
+    for i in range(1, depth):
+        panel = cls("panel {}".format(i))
+        panel.set_position(1, 1)
+        panel.set_size(parent.size[0] - 2, parent.size[1] - 2)
+        panel.set_parent_layer(parent, False)
+        parent = panel
+
+    return root
+
+
+def get_frame_cost(cls):
+    screen = Surface(Settings.SCREEN_SIZE)
+    root = make_panels(cls)
+
+    return timeit(lambda: root.draw(screen), number=FRAMES) / FRAMES
+
+
+def main():
+    cached = get_frame_cost(Layer) * 1e6
+    uncached = get_frame_cost(UncachedLayer) * 1e6
+
+    print("{} nested panels".format(DEPTH))
+    print("{:>10} {:>10.2f} us/frame".format("cached", cached))
+    print("{:>10} {:>10.2f} us/frame".format("uncached", uncached))
+
+
+if __name__ == "__main__":
+    main()
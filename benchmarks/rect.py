@@ -0,0 +1,80 @@
+"""
+Micro-benchmark of Rect.get_rect_collision(), comparing the field based
+Rect with the previous version that built pygame.Rect objects for every
+check.
+
+    python -m benchmarks.rect
+"""
+from random import Random
+from time import perf_counter
+
+import pygame
+
+from src.geometry import Rect
+
+CHECKS = 1000000
+RECTS = 1000
+
+
+class PygameRect:
+    # the previous pygame.Rect based implementation, kept here for comparison
+    def __init__(self, size, position):
+        self.size = size
+        self.position = position
+
+    @property
+    def pygame_rect(self):
+        return pygame.Rect(self.position, self.size)
+
+    @property
+    def clip(self):
+        return self.pygame_rect.clip
+
+    def get_rect_collision(self, other):
+        try:
+            collision = self.clip(other.pygame_rect)
+
+            if not (collision.width or collision.height):
+                return False
+
+            else:
+                return collision.center
+
+        except ValueError:
+            return False
+
+
+def make_rects(cls, seed=0):
+    random = Random(seed)
+    rects = []
+
+    for i in range(RECTS):
+        size = random.uniform(4, 64), random.uniform(4, 64)
+        position = random.uniform(0, 640), random.uniform(0, 480)
+        rects.append(cls(size, position))
+
+    return rects
+
+
+def get_check_cost(cls, checks=CHECKS):
+    rects = make_rects(cls)
+    pairs = [(rects[i % RECTS], rects[(i * 7 + 1) % RECTS]) for i in range(RECTS * 10)]
+    pairs *= checks // len(pairs)
+
+    start = perf_counter()
+    hits = sum(1 for a, b in pairs if a.get_rect_collision(b))
+
+    return perf_counter() - start, hits
+
+
+def main():
+    rect, rect_hits = get_check_cost(Rect)
+    pygame_rect, pygame_hits = get_check_cost(PygameRect)
+
+    print("{} collision checks".format(CHECKS))
+    print("{:>12} {:>8.3f} s ({} hits)".format("Rect", rect, rect_hits))
+    print("{:>12} {:>8.3f} s ({} hits)".format("pygame.Rect", pygame_rect, pygame_hits))
+
+
+if __name__ == "__main__":
+    main()
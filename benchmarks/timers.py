@@ -0,0 +1,146 @@
+"""
+Benchmark of the per-tick cost of 100k timers, comparing the slotted Timer
+with the previous property based Meter / Timer classes, both when each
+timer is ticked directly and when they're ticked by a Clock.
+
+    python -m benchmarks.timers
+"""
+from time import perf_counter
+
+from src.meters import Clock, Timer
+
+TIMERS = 100000
+FRAMES = 20
+
+
+class PropertyMeter:
+    # the previous property based implementation, kept here for comparison
+    def __init__(self, name, value):
+        self.name = name
+        self._value = value
+        self._maximum = value
+        self._minimum = 0
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = value
+        self.normalize()
+
+    @property
+    def minimum(self):
+        return self._minimum
+
+    @property
+    def maximum(self):
+        return self._maximum
+
+    def normalize(self):
+        in_bounds = True
+
+        if self._value > self.maximum:
+            self._value = self.maximum
+            in_bounds = False
+
+        if self._value < self.minimum:
+            self._value = self.minimum
+            in_bounds = False
+
+        return in_bounds
+
+    def refill(self):
+        self.value = self.maximum
+
+        return self.value
+
+    def is_empty(self):
+        return self.value == self.minimum
+
+
+class PropertyTimer(PropertyMeter):
+    def __init__(self, name, duration):
+        super(PropertyTimer, self).__init__(name, duration)
+
+        self.is_off = self.is_empty
+        self.reset = self.refill
+        self.temp = False
+
+    def is_on(self):
+        return not self.is_off()
+
+    def tick(self):
+        before = self.is_on()
+
+        self.value -= 1
+        self.on_tick()
+
+        after = self.is_off()
+        switch_off = before and after
+
+        if switch_off:
+            self.on_switch_off()
+
+        return switch_off
+
+    def on_tick(self):
+        pass
+
+    def on_switch_off(self):
+        pass
+
+
+def get_tick_cost(cls, lerp=False):
+    timers = [cls("timer {}".format(i), 1 + (i % 120)) for i in range(TIMERS)]
+
+    if lerp:
+        for t in timers:
+            t.on_tick = t.is_on
+
+    start = perf_counter()
+    for frame in range(FRAMES):
+        for t in timers:
+            t.tick()
+
+            if t.is_off():
+                t.reset()
+
+    return (perf_counter() - start) / (FRAMES * TIMERS)
+
+
+def get_clock_cost(lerp=False):
+    clock = Clock("benchmark clock")
+
+    for i in range(TIMERS):
+        t = Timer("timer {}".format(i), 1 + (i % 120), temp=False)
+        if lerp:
+            t.on_tick = t.is_on
+        clock.add_timers(t)
+
+    clock.tick()
+
+    start = perf_counter()
+    for frame in range(FRAMES):
+        clock.tick()
+
+    return (perf_counter() - start) / (FRAMES * TIMERS)
+
+
+def main():
+    print("{} timers, ns per timer per tick".format(TIMERS))
+    print("{:>28} {:>10.1f}".format(
+        "PropertyTimer.tick()", get_tick_cost(PropertyTimer) * 1e9))
+    print("{:>28} {:>10.1f}".format(
+        "Timer.tick()", get_tick_cost(Timer) * 1e9))
+    print("{:>28} {:>10.1f}".format(
+        "Timer.tick() with on_tick", get_tick_cost(Timer, True) * 1e9))
+    print("{:>28} {:>10.1f}".format(
+        "Clock.tick() with on_tick", get_clock_cost(True) * 1e9))
+    print("{:>28} {:>10.1f}".format(
+        "Clock.tick()", get_clock_cost() * 1e9))
+
+
+if __name__ == "__main__":
+    main()
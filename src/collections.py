@@ -1,10 +1,24 @@
+from array import array
+
+from src.geometry import SpatialGrid, RectArrays, boxes_overlap, box_in_radius
+from zs_globals import Settings
+
+
 class Group:
     """
     Group is a list subclass with named instances that hold sprite objects
+    A Group can optionally keep a SpatialGrid index of its members' rects,
+    which is updated by each member's set_position / set_size methods, so
+    members of a group with a grid should have their size set to match
+    their image.
+    Groups can also keep their members' rects in a RectArrays object for
+    batch collision checks with NumPy. It is updated the same way.
     """
     def __init__(self, name):
         self.name = name
         self.sprites = []
+        self.grid = None
+        self.arrays = None
 
     def __repr__(self):
         n = self.name
@@ -16,21 +30,188 @@ class Group:
         if member not in self.sprites:
             self.sprites.append(member)
 
+            self.update_member(member)
+
+    def set_grid(self, cell_size=Settings.GRID_CELL_SIZE):
+        self.grid = SpatialGrid(cell_size)
+
+        for member in self.sprites:
+            self.update_member(member)
+
+    def set_arrays(self):
+        self.arrays = RectArrays(max(len(self.sprites), 64))
+
+        for member in self.sprites:
+            self.update_member(member)
+
+    @property
+    def indexed(self):
+        return self.grid is not None or self.arrays is not None
+
+    def update_member(self, member):
+        if self.grid is not None:
+            x, y = member.position
+            w, h = member.size
+
+            self.grid.add(member, x, y, w, h)
+
+        if self.arrays is not None:
+            x, y = member.position
+            w, h = member.size
+
+            self.arrays.set(member, x, y, w, h)
+
+    # returns an (x, y, w, h) box for a member or a Rect
+    @staticmethod
+    def get_box(member):
+        x, y = member.position
+        w, h = member.size
+
+        return x, y, w, h
+
+    # The following collision queries use the group's SpatialGrid if it
+    #   has one, and otherwise check every member
+
+    # returns a list of members whose rects overlap a Rect
+    def get_members_in_rect(self, rect):
+        box = self.get_box(rect)
+
+        if self.grid is not None:
+            return self.grid.get_rect_items(*box)
+
+        return [m for m in self.sprites if boxes_overlap(box, self.get_box(m))]
+
+    # returns a list of members whose rects are at least partly
+    #   within a radius of a point
+    def get_members_in_radius(self, position, radius):
+        if self.grid is not None:
+            return self.grid.get_radius_items(position, radius)
 
-class CacheList(list):
+        return [
+            m for m in self.sprites if box_in_radius(self.get_box(m), position, radius)
+        ]
+
+    # returns a list of (a, b) pairs for each member 'a' of this group whose
+    #   rect overlaps the rect of a member 'b' of another group. With no
+    #   other group each pair of this group's members is returned once
+    def get_collisions(self, other=None):
+        if other is None:
+            other = self
+
+        if self.grid is not None and other.grid is not None:
+            return self.grid.get_pairs(other.grid)
+
+        pairs = []
+        for i, a in enumerate(self.sprites):
+            box = self.get_box(a)
+
+            if other is self:
+                members = self.sprites[i + 1:]
+            elif other.grid is not None:
+                members = other.grid.get_rect_items(*box)
+            else:
+                members = other.sprites
+
+            for b in members:
+                if boxes_overlap(box, other.get_box(b)):
+                    pairs.append((a, b))
+
+        return pairs
+
+    # Batch collision checks with the group's RectArrays. These return
+    #   index pairs into self.arrays.items and a contact point for each pair
+
+    def get_batch_collisions(self, other=None):
+        if other is None:
+            other = self
+
+        return self.arrays.get_rect_collisions(other.arrays)
+
+    def get_batch_circle_collisions(self, radii, positions):
+        return self.arrays.get_circle_collisions(radii, positions)
+
+
+class CacheList:
+    """
+    CacheList is a fixed capacity ring buffer that keeps the most
+    recent 'size' items appended to it. Appending to a full cache
+    overwrites the oldest item in place so that append is O(1)
+    regardless of the cache's size.
+    Items are indexed from oldest to newest like a normal list, so
+    cache[-1] is always the most recent item. Slicing returns a new
+    list.
+    """
     def __init__(self, size):
-        super(CacheList, self).__init__()
         self._size = size
+        self._items = self.make_buffer()
+        self._start = 0         # buffer index of the oldest item
+        self._length = 0
+
+    def __repr__(self):
+        return "{}({})".format(
+            self.__class__.__name__, list(self))
+
+    def __len__(self):
+        return self._length
+
+    def make_buffer(self):
+        return [None] * self._size
 
-    def set_size(self):
-        if len(self) > self._size:
-            for i in range(len(self) - 1):
-                self[i] = self[i + 1]
-            self.pop()
+    def __eq__(self, other):
+        try:
+            return list(self) == list(other)
+
+        except TypeError:
+            return NotImplemented
+
+    # converts a (possibly negative) list index to a buffer index
+    def get_buffer_index(self, i):
+        length = self._length
+
+        if i < 0:
+            i += length
+
+        if not 0 <= i < length:
+            raise IndexError("CacheList index out of range")
+
+        return (self._start + i) % self._size
+
+    def __getitem__(self, i):
+        if type(i) is slice:
+            return [self[j] for j in range(*i.indices(self._length))]
+
+        return self._items[self.get_buffer_index(i)]
+
+    def __setitem__(self, i, value):
+        self._items[self.get_buffer_index(i)] = value
+
+    def __iter__(self):
+        items, size, start = self._items, self._size, self._start
+
+        for i in range(self._length):
+            yield items[(start + i) % size]
+
+    def __reversed__(self):
+        for i in range(self._length - 1, -1, -1):
+            yield self._items[(self._start + i) % self._size]
 
     def append(self, p_object):
-        super(CacheList, self).append(p_object)
-        self.set_size()
+        size = self._size
+
+        if self._length < size:
+            self._items[(self._start + self._length) % size] = p_object
+            self._length += 1
+
+        elif size:
+            # the slot of the oldest item is overwritten and the
+            # start of the cache moves forward by one
+            self._items[self._start] = p_object
+            self._start = (self._start + 1) % size
+
+    def clear(self):
+        self._items = self.make_buffer()
+        self._start = 0
+        self._length = 0
 
     def __iadd__(self, other):
         for item in other:
@@ -39,6 +220,72 @@ class CacheList(list):
         return self
 
 
+class ArrayCache(CacheList):
+    """
+    ArrayCache is a CacheList backed by a single preallocated typed
+    array rather than a list of Python objects. Each item takes up
+    'width' consecutive slots of the array, and items with a width
+    greater than 1 are returned as tuples.
+    """
+    def __init__(self, size, typecode, width=1):
+        self.typecode = typecode
+        self.width = width
+        super(ArrayCache, self).__init__(size)
+
+    def make_buffer(self):
+        return array(self.typecode, [0]) * (self._size * self.width)
+
+    def get_slot(self, j):
+        w = self.width
+
+        if w == 1:
+            return self._items[j]
+
+        else:
+            j *= w
+            return tuple(self._items[j:j + w])
+
+    def set_slot(self, j, value):
+        w = self.width
+
+        if w == 1:
+            self._items[j] = value
+
+        else:
+            j *= w
+            self._items[j:j + w] = array(self.typecode, value)
+
+    def __getitem__(self, i):
+        if type(i) is slice:
+            return [self[j] for j in range(*i.indices(self._length))]
+
+        return self.get_slot(self.get_buffer_index(i))
+
+    def __setitem__(self, i, value):
+        self.set_slot(self.get_buffer_index(i), value)
+
+    def __iter__(self):
+        size, start = self._size, self._start
+
+        for i in range(self._length):
+            yield self.get_slot((start + i) % size)
+
+    def __reversed__(self):
+        for i in range(self._length - 1, -1, -1):
+            yield self.get_slot((self._start + i) % self._size)
+
+    def append(self, p_object):
+        size = self._size
+
+        if self._length < size:
+            self.set_slot((self._start + self._length) % size, p_object)
+            self._length += 1
+
+        elif size:
+            self.set_slot(self._start, p_object)
+            self._start = (self._start + 1) % size
+
+
 class AverageCache(CacheList):
     def average(self):
         if not self:
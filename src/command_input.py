@@ -1,130 +1,219 @@
-"""
-    TODO: Finish this module later
-"""
-
-# from src.collections import CacheList
-#
-#
-# class CommandInputManager:
-#     def __init__(self, controller):
-#         self.controller = controller
-#         self.commands = {}
-#
-#     def get_command_frames(self, *device_names):
-#         device_frames = [
-#             self.controller.get_device_frames(n) for n in device_names
-#             ]
-#         frames = tuple(zip(*device_frames))
-#
-#         return frames
-#
-#     def check_command(self, name):
-#         return self.commands[name].active
-#
-#     def add_command_input(self, name, d):
-#         self.commands[name] = Command.make_from_d(name, d)
-#
-#     def update(self):
-#         for command in self.commands.values():
-#             frames = self.get_command_frames(*command.devices)
-#             command.update(frames[-1])
-#
-#
-# class Command:
-#     def __init__(self, name, steps, device_names, window):
-#         self.name = name
-#         self.steps = steps
-#         self.frame_window = window
-#
-#         self.frames = CacheList(window)
-#         self.devices = device_names
-#         self.active = False
-#
-#     @staticmethod
-#     def make_from_d(name, d):
-#         device_names = d["devices"]
-#         steps = d["steps"]
-#         window = d["frames"]
-#
-#         return Command(name, steps, device_names, window)
-#
-#     def check(self):
-#         frames = self.frames
-#         l = len(frames)
-#         i = 0
-#
-#         for step in self.steps:
-#             sub_slice = frames[i:l]
-#             j = step.check(sub_slice)
-#             i += j
-#
-#             if j == 0:
-#                 return False
-#
-#         return True
-#
-#     def update(self, frame):
-#         self.frames.append(frame)
-#         c = self.check()
-#         self.active = c
-#
-#         if c:
-#             self.frames.clear()
-#
-#     def __repr__(self):
-#         return self.name
-#
-#
-# class Step:
-#     def __init__(self, name, check_func, get_f):
-#         self.name = name
-#         self.check_func = check_func
-#         self.get_f = get_f
-#
-#     def check(self, frames):
-#         fl = len(frames)
-#
-#         for i in range(fl):
-#             f = self.get_f(frames[i])
-#             test = self.check_func(f)
-#
-#             if test:
-#                 return i + 1
-#
-#         return 0
-#
-#     def __repr__(self):
-#         return self.name
-#
-#     @staticmethod
-#     def dpad_position_equals(device_name, value):
-#         def get_f(f):
-#             return f
-#
-#     @staticmethod
-#     def dpad_hat_equals(device_name, axis, value):
-#         pass
-#
-#     @staticmethod
-#     def stick_neutral(device_name, threshold):
-#         pass
-#
-#     @staticmethod
-#     def stick_axis_greater_than(device_name, axis, threshold):
-#         pass
-#
-#     @staticmethod
-#     def stick_magnitude_greater_than(device_name, threshold):
-#         pass
-#
-#     @staticmethod
-#     def button_pressed(device_name):
-#         pass
-#
-#     @staticmethod
-#     def and_funcs(*functions):
-#         pass
-#
-#     @staticmethod
-#     def or_funcs(*functions):
-#         pass
+from math import sqrt
+
+
+class CommandInputManager:
+    """
+    A CommandInputManager checks a Controller object's input data each frame
+    for any number of named Command objects (e.g. motion inputs for special
+    moves). The newest value of each device used by a command is read once
+    per frame into a single frame dict that is passed to every command.
+    """
+    def __init__(self, controller):
+        self.controller = controller
+        self.commands = {}
+        self.devices = []
+
+    def __repr__(self):
+        c = self.__class__.__name__
+        n = self.controller.name
+        m = len(self.commands)
+
+        return "{} for '{}' ({} commands)".format(c, n, m)
+
+    # returns a dict with the newest frame value of each device
+    def get_command_frame(self, *device_names):
+        frames = self.controller.frames
+
+        return {n: frames[n][-1] for n in device_names}
+
+    def check_command(self, name):
+        return self.commands[name].active
+
+    def add_command_input(self, name, d):
+        command = Command.make_from_d(name, d)
+        self.commands[name] = command
+
+        for n in command.devices:
+            if n not in self.devices:
+                self.devices.append(n)
+
+    def remove_command_input(self, name):
+        self.commands.pop(name)
+        self.devices = []
+
+        for command in self.commands.values():
+            for n in command.devices:
+                if n not in self.devices:
+                    self.devices.append(n)
+
+    def update(self):
+        if self.commands:
+            frame = self.get_command_frame(*self.devices)
+
+            for command in self.commands.values():
+                command.update(frame)
+
+
+class Command:
+    """
+    A Command is a sequence of Step objects that must be matched, in order and on
+    separate frames, within a window of the most recent frames. The 'active' flag
+    is set on the frame a command is completed.
+    Rather than rescanning the window each frame the command is matched
+    incrementally: 'starts[k]' holds the start frame of the most recent partial
+    match that has completed k steps. Each new frame can only extend those
+    partial matches by one step, so every frame costs one check per step no
+    matter how long the window is. Keeping only the latest start for each step
+    is enough since a later start is always at least as likely to fit inside
+    the window.
+    """
+    def __init__(self, name, steps, device_names, window):
+        self.name = name
+        self.steps = steps
+        self.frame_window = window
+
+        self.devices = device_names
+        self.active = False
+        self.frame_count = 0
+        self.starts = []
+        self.reset()
+
+    @staticmethod
+    def make_from_d(name, d):
+        device_names = d["devices"]
+        steps = [Step.make_from_args(s) for s in d["steps"]]
+        window = d["frames"]
+
+        return Command(name, steps, device_names, window)
+
+    def reset(self):
+        self.starts = [None] * (len(self.steps) + 1)
+
+    def check(self, frame):
+        f = self.frame_count
+        oldest = f - self.frame_window + 1
+        steps, starts = self.steps, self.starts
+
+        # steps are checked last to first so that a single frame
+        # can't complete more than one step of the same match
+        for k in range(len(steps) - 1, -1, -1):
+            if k == 0:
+                start = f
+            else:
+                start = starts[k]
+
+                if start is None or start < oldest:
+                    continue
+
+            if steps[k].check(frame):
+                last = starts[k + 1]
+
+                if last is None or start > last:
+                    starts[k + 1] = start
+
+        done = starts[-1]
+
+        return done is not None and done >= oldest
+
+    def update(self, frame):
+        self.frame_count += 1
+        c = self.check(frame)
+        self.active = c
+
+        if c:
+            self.reset()
+
+    def __repr__(self):
+        return self.name
+
+
+class Step:
+    """
+    A Step is a single condition of a Command, checked against a frame dict
+    of device values. The static constructor methods return Step objects for
+    common conditions and can be referenced by name in a command's cfg data,
+    e.g. [dpad_position_equals, Dpad, (1, 0)].
+    """
+    def __init__(self, name, check_func):
+        self.name = name
+        self.check_func = check_func
+
+    def check(self, frame):
+        return self.check_func(frame)
+
+    def __repr__(self):
+        return self.name
+
+    # returns a Step from a list of a constructor name followed by its args
+    @staticmethod
+    def make_from_args(args):
+        if isinstance(args, Step):
+            return args
+
+        return getattr(Step, args[0])(*args[1:])
+
+    @staticmethod
+    def dpad_position_equals(device_name, value):
+        value = tuple(value)
+
+        def check_func(frame):
+            return frame[device_name] == value
+
+        return Step("{} == {}".format(device_name, value), check_func)
+
+    @staticmethod
+    def dpad_hat_equals(device_name, axis, value):
+        def check_func(frame):
+            return frame[device_name][axis] == value
+
+        return Step("{}[{}] == {}".format(device_name, axis, value), check_func)
+
+    @staticmethod
+    def stick_neutral(device_name, threshold):
+        def check_func(frame):
+            x, y = frame[device_name]
+
+            return sqrt((x ** 2) + (y ** 2)) < threshold
+
+        return Step("{} neutral".format(device_name), check_func)
+
+    @staticmethod
+    def stick_axis_greater_than(device_name, axis, threshold):
+        def check_func(frame):
+            return frame[device_name][axis] > threshold
+
+        return Step("{}[{}] > {}".format(device_name, axis, threshold), check_func)
+
+    @staticmethod
+    def stick_magnitude_greater_than(device_name, threshold):
+        def check_func(frame):
+            x, y = frame[device_name]
+
+            return sqrt((x ** 2) + (y ** 2)) > threshold
+
+        return Step("|{}| > {}".format(device_name, threshold), check_func)
+
+    @staticmethod
+    def button_pressed(device_name):
+        def check_func(frame):
+            return bool(frame[device_name])
+
+        return Step("{} pressed".format(device_name), check_func)
+
+    @staticmethod
+    def and_funcs(*steps):
+        steps = [Step.make_from_args(s) for s in steps]
+
+        def check_func(frame):
+            return all(s.check(frame) for s in steps)
+
+        return Step(" & ".join(s.name for s in steps), check_func)
+
+    @staticmethod
+    def or_funcs(*steps):
+        steps = [Step.make_from_args(s) for s in steps]
+
+        def check_func(frame):
+            return any(s.check(frame) for s in steps)
+
+        return Step(" | ".join(s.name for s in steps), check_func)
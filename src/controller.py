@@ -1,5 +1,7 @@
-from src.collections import CacheList
-# from src.command_input import CommandInputManager
+from array import array
+
+from src.collections import ArrayCache
+from src.command_input import CommandInputManager
 from zs_globals import ControllerInputs as ConIn
 from math import sqrt
 
@@ -13,19 +15,24 @@ class Controller:
     The Controller object represents a virtual blueprint for a set of input devices
     that will be used for a given game environment. It has a list of input device objects
     and a mapping dictionary that pairs each device with a mapping object that produces the
-    input value for a given frame. All of that data is stored in a frame cache by the controller
-    object.
+    input value for a given frame. All of that data is stored by the controller object in a
+    'frames' dict that holds a separate frame cache for each device.
     """
     def __init__(self, name):
         self.name = name
-        self.frames = CacheList(ConIn.CONTROLLER_FRAME_DEPTH)
+        self.frames = {}
 
         self.devices = []
+        self.device_indexes = {}
+        self.device_dict = {}
         self.mappings = {}
+        self.bank = None
+        self.recorder = None
+        self.replay = None
 
-        # self.command_manager = CommandInputManager(self)
-        # self.add_command_input = self.command_manager.add_command_input
-        # self.check_command = self.command_manager.check_command
+        self.command_manager = CommandInputManager(self)
+        self.add_command_input = self.command_manager.add_command_input
+        self.check_command = self.command_manager.check_command
 
     def __repr__(self):
         c = self.__class__.__name__
@@ -35,34 +42,41 @@ class Controller:
 
     # returns list index for a given device name
     def get_device_index(self, name):
-        for d in self.devices:
-            if d.name == name:
-                return self.devices.index(d)
+        try:
+            return self.device_indexes[name]
 
-        raise ValueError("no device with name {}".format(name))
+        except KeyError:
+            raise ValueError("no device with name {}".format(name))
 
     # returns device object for a given device name
     def get_device(self, name):
-        return self.devices[
-            self.get_device_index(name)
-        ]
+        try:
+            return self.device_dict[name]
 
-    # returns a frame cache with data for a given device
-    def get_device_frames(self, name):
-        output = []
-        i = self.get_device_index(name)
+        except KeyError:
+            raise ValueError("no device with name {}".format(name))
 
-        for frame in self.frames:
-            output.append(frame[i])
+    # returns the frame cache with data for a given device
+    def get_device_frames(self, name):
+        try:
+            return self.frames[name]
 
-        return output
+        except KeyError:
+            raise ValueError("no device with name {}".format(name))
 
     # add a device / input mapping to the controller object
     def add_device(self, device, mapping):
         device.controller = self
         self.mappings[device.name] = mapping
+        self.frames[device.name] = device.make_frame_cache(
+            ConIn.CONTROLLER_FRAME_DEPTH)
+        self.device_indexes[device.name] = len(self.devices)
+        self.device_dict[device.name] = device
         self.devices.append(device)
 
+        if self.bank:
+            self.bank.dirty = True
+
         if type(device) is Dpad:
             # a Dpad input device is made up of four button devices
 
@@ -71,30 +85,40 @@ class Controller:
                 self.add_device(buttons[i], mapping[i])
 
     def remap_device(self, device_name, mapping):
+        device = self.get_device(device_name)
         self.mappings[device_name] = mapping
 
+        if type(device) is Dpad:
+            for i in range(4):
+                self.mappings[device.buttons[i].name] = mapping[i]
+
+        if self.bank:
+            self.bank.dirty = True
+
     # update frame input data and call device update methods
     def update(self):
+        if self.replay:
+            self.replay.next_frame()
+
         self.update_frames()
 
         for d in self.devices:
             d.update()
 
-        # self.command_manager.update()
+        self.command_manager.update()
+
+        if self.recorder:
+            self.recorder.write_frame()
 
-    # append frame data to frame cache object
+    # append frame data to each device's frame cache
     def update_frames(self):
-        frame = []
+        frames, mappings = self.frames, self.mappings
 
         for d in self.devices:
-            m = self.mappings[d.name]
-
-            frame.append(
-                d.get_input(m)
+            frames[d.name].append(
+                d.get_input(mappings[d.name])
             )
 
-        self.frames.append(frame)
-
     def get_cfg(self):
         devices = {}
 
@@ -132,13 +156,183 @@ class Controller:
         return d
 
 
+class ControllerBank:
+    """
+    A ControllerBank updates a set of Controller objects together in a single pass.
+    The devices of every controller are sorted into flat tables so that each frame the
+    raw input for all Button objects is gathered into one contiguous array, and the
+    Button 'held' / 'lifted' counters and Dpad 'last_direction' values are computed
+    straight from that array rather than through each device's update method. Devices
+    of any other type are updated normally.
+    Each controller is added along with the chain of layers that own it, and the
+    controllers of any paused layer are skipped, just as they are by
+    Layer.update_controllers.
+    A controller can be in more than one bank (e.g. shared by two Environments).
+    Its 'bank' attribute is set to whichever bank updated it last, and the
+    'updating' flag is set from a bank's update() until end_frame() so that
+    Layer.update_controllers only skips the controllers of the bank that's
+    updating in the current frame. release() clears the bank of its controllers.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.controllers = []
+        self.members = {}       # controller: None
+        self.updating = False
+        self.layers = []
+        self.active = []
+        self.paused = None
+        self.dirty = True
+
+        self.buttons = []
+        self.button_mappings = []
+        self.button_appends = []
+        self.dpads = []
+        self.devices = []
+
+    def __repr__(self):
+        c = self.__class__.__name__
+        n = self.name
+        m = len(self.controllers)
+
+        return "{}: '{}' ({} controllers)".format(c, n, m)
+
+    def add_controller(self, controller, *layers):
+        if controller not in self.members:
+            controller.bank = self
+            self.members[controller] = None
+            self.controllers.append(controller)
+            self.layers.append(layers)
+            self.dirty = True
+
+    def release(self):
+        for controller in self.controllers:
+            if controller.bank is self:
+                controller.bank = None
+
+        self.controllers = []
+        self.members = {}
+        self.layers = []
+        self.dirty = True
+
+    def end_frame(self):
+        self.updating = False
+
+    # a controller is skipped if any of the layers that own it are paused
+    def get_paused(self):
+        return tuple(
+            any(layer.paused for layer in layers) for layers in self.layers
+        )
+
+    def make_tables(self):
+        self.active = []
+        self.buttons = []
+        self.button_mappings = []
+        self.button_appends = []
+        self.dpads = []
+        self.devices = []
+        button_indexes = {}
+
+        for controller, paused in zip(self.controllers, self.paused):
+            if paused:
+                continue
+
+            self.active.append(controller)
+
+            for d in controller.devices:
+                append = controller.frames[d.name].append
+                mapping = controller.mappings[d.name]
+
+                if type(d) is Button:
+                    button_indexes[d] = len(self.buttons)
+                    self.buttons.append(d)
+                    self.button_mappings.append(mapping)
+                    self.button_appends.append(append)
+
+                else:
+                    self.devices.append((d, append, mapping))
+
+        # a Dpad's value can be taken from its buttons' inputs as long as
+        # it's still using the same mapping objects as its buttons
+        for d, append, mapping in list(self.devices):
+            if type(d) is Dpad:
+                buttons = d.buttons
+                mappings = [d.controller.mappings[b.name] for b in buttons]
+
+                if all(m is n for m, n in zip(mapping, mappings)):
+                    self.devices.remove((d, append, mapping))
+                    self.dpads.append((
+                        d, append, [button_indexes[b] for b in buttons]
+                    ))
+
+        self.dirty = False
+
+    def update(self):
+        self.updating = True
+
+        # controllers that were last updated by another bank may have
+        #   had their devices changed since the tables were made
+        for controller in self.controllers:
+            if controller.bank is not self:
+                controller.bank = self
+                self.dirty = True
+
+        paused = self.get_paused()
+
+        if self.dirty or paused != self.paused:
+            self.paused = paused
+            self.make_tables()
+
+        for controller in self.active:
+            if controller.replay:
+                controller.replay.next_frame()
+
+        # FRAME DATA
+        raw = array("b", [m.is_pressed() for m in self.button_mappings])
+
+        for append, value in zip(self.button_appends, raw):
+            append(value)
+
+        for button, value in zip(self.buttons, raw):
+            if value:
+                button.held += 1
+            else:
+                button.held = 0
+                button.lifted = True
+
+        for dpad, append, (u, d, l, r) in self.dpads:
+            x, y = raw[r] - raw[l], raw[d] - raw[u]
+            append((x, y))
+
+            if x or y:
+                dpad.last_direction = x, y
+
+        devices = self.devices
+
+        for d, append, mapping in devices:
+            append(d.get_input(mapping))
+
+        for d, append, mapping in devices:
+            d.update()
+
+        for controller in self.active:
+            controller.command_manager.update()
+
+            if controller.recorder:
+                controller.recorder.write_frame()
+
+
 class InputDevice:
     """
     This abstract superclass defines the main methods of the input device object.
     Each device is paired with a controller object which is used to access the frame cache, and
     some devices have additional attributes that can be altered by the update method based on this
     data. Each device also defines a get_input method for producing frame data.
+    The FRAME_TYPE and FRAME_WIDTH attributes set the array typecode and number of
+    values per frame used for the device's frame cache.
     """
+    FRAME_TYPE = "b"
+    FRAME_WIDTH = 1
+
     def __init__(self, name):
         self.name = name
         self.default = None
@@ -150,6 +344,9 @@ class InputDevice:
 
         return "{}: '{}'".format(c, n)
 
+    def make_frame_cache(self, size):
+        return ArrayCache(size, self.FRAME_TYPE, self.FRAME_WIDTH)
+
     # get frame cache for this device
     def get_frames(self):
         if self.controller:
@@ -157,8 +354,10 @@ class InputDevice:
 
     # get most recent value from frame cache
     def get_value(self):
-        if self.get_frames():
-            return self.get_frames()[-1]
+        frames = self.get_frames()
+
+        if frames:
+            return frames[-1]
 
         else:
             return self.default
@@ -247,28 +446,32 @@ class Dpad(InputDevice):
     on the frame interval of whichever Dpad button has been held the longest.
     Dpad objects have a 'last_direction' attribute that defaults to right (1, 0).
     """
+    FRAME_WIDTH = 2
+
     def __init__(self, name):
         super(Dpad, self).__init__(name)
         self.last_direction = (1, 0)
         self.default = (0, 0)
+        self.d_buttons = {}
 
     def get_d_button(self, direction):
         if self.controller:
-            return self.controller.get_device(
-                self.name + "_" + direction
-            )
+            return self.d_buttons[direction]
 
         else:
             print("WARNING: no controller set for {}".format(self))
 
+    # the Dpad keeps a direct reference to each of its buttons so
+    # that direction lookups don't go through the controller
     def make_d_buttons(self):
         buttons = []
 
         for direction in ConIn.UDLR:
             name = self.name + "_" + direction
-            buttons.append(
-                Button(name)
-            )
+            button = Button(name)
+
+            self.d_buttons[direction] = button
+            buttons.append(button)
 
         return buttons
 
@@ -290,11 +493,13 @@ class Dpad(InputDevice):
 
     @property
     def buttons(self):
+        d = self.d_buttons
+
         return [
-            self.up,
-            self.down,
-            self.left,
-            self.right
+            d["up"],
+            d["down"],
+            d["left"],
+            d["right"]
         ]
 
     @property
@@ -307,11 +512,7 @@ class Dpad(InputDevice):
 
     # returns the direction button that has been held for the most frames
     def get_dominant(self):
-        u, d, l, r = self.buttons
-
-        dominant = sorted([u, d, l, r], key=lambda b: b.held * -1)[0]
-
-        return dominant
+        return max(self.buttons, key=lambda b: b.held)
 
     def check(self):
         return self.get_dominant().check()
@@ -340,6 +541,9 @@ class Dpad(InputDevice):
 
 
 class ThumbStick(InputDevice):
+    FRAME_TYPE = "d"
+    FRAME_WIDTH = 2
+
     def __init__(self, name):
         super(ThumbStick, self).__init__(name)
         self.default = 0.0, 0.0
@@ -378,6 +582,8 @@ class ThumbStick(InputDevice):
 
 
 class Trigger(InputDevice):
+    FRAME_TYPE = "d"
+
     def __init__(self, name):
         super(Trigger, self).__init__(name)
         self.default = 0.0
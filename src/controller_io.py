@@ -1,3 +1,6 @@
+import json
+from struct import Struct, pack, unpack_from, calcsize
+
 from src.controller import Button, Dpad, Controller, Trigger, ThumbStick
 from src.input_manager import ButtonMappingKey, ButtonMappingButton, ButtonMappingAxis, ButtonMappingHat, AxisMapping
 from src.resources import load_resource
@@ -82,3 +85,210 @@ class ControllerIO:
             return [
                 get_m(d[axis]) for axis in ConIn.AXES
             ]
+
+
+class InputRecorder:
+    """
+    An InputRecorder streams every frame of a Controller object's input data
+    to a binary file. The file begins with the MAGIC bytes and a JSON header
+    describing the controller's devices, followed by one fixed size record per
+    frame with the newest value from each device's frame cache, packed using
+    the typecodes of the device frame caches.
+    """
+    MAGIC = b"ZSIR"
+    BYTE_ORDER = "<"
+
+    def __init__(self, controller, file_name):
+        self.controller = controller
+        self.file_name = file_name
+        self.frame_count = 0
+
+        self.header = self.get_header(controller)
+        self.struct = Struct(self.header["format"])
+
+        header = json.dumps(self.header).encode()
+        self.file = open(file_name, "wb")
+        self.file.write(self.MAGIC)
+        self.file.write(pack(self.BYTE_ORDER + "I", len(header)))
+        self.file.write(header)
+
+        controller.recorder = self
+
+    def __repr__(self):
+        c = self.__class__.__name__
+        n = self.file_name
+        f = self.frame_count
+
+        return "{}: '{}' ({} frames)".format(c, n, f)
+
+    @staticmethod
+    def get_header(controller):
+        devices = []
+        fmt = InputRecorder.BYTE_ORDER
+
+        for d in controller.devices:
+            devices.append(
+                [d.name, d.__class__.__name__, d.FRAME_TYPE, d.FRAME_WIDTH]
+            )
+            fmt += d.FRAME_TYPE * d.FRAME_WIDTH
+
+        return {
+            "controller": controller.name,
+            "devices": devices,
+            "format": fmt
+        }
+
+    def write_frame(self):
+        values = []
+        frames = self.controller.frames
+
+        for d in self.controller.devices:
+            value = frames[d.name][-1]
+
+            if d.FRAME_WIDTH > 1:
+                values += value
+            else:
+                values.append(value)
+
+        self.file.write(self.struct.pack(*values))
+        self.frame_count += 1
+
+    def close(self):
+        if self.controller.recorder is self:
+            self.controller.recorder = None
+
+        self.file.close()
+
+
+class InputReplay:
+    """
+    An InputReplay loads a file written by an InputRecorder and plays it
+    back through a Controller object. apply() remaps each of the controller's
+    devices to ReplayMapping objects that read the current replay frame
+    rather than the keyboard / joystick, and the controller advances the
+    replay by one frame every time it updates. Once the recording runs out
+    the replay is 'done' and every mapping returns a neutral value.
+    """
+    def __init__(self, file_name):
+        self.file_name = file_name
+
+        with open(file_name, "rb") as file:
+            data = file.read()
+
+        magic = InputRecorder.MAGIC
+        if data[:len(magic)] != magic:
+            raise IOError("{} is not an input recording".format(file_name))
+
+        i = len(magic)
+        (size,) = unpack_from(InputRecorder.BYTE_ORDER + "I", data, i)
+        i += calcsize(InputRecorder.BYTE_ORDER + "I")
+
+        self.header = json.loads(data[i:i + size].decode())
+        self.struct = Struct(self.header["format"])
+        self.frames = list(self.struct.iter_unpack(data[i + size:]))
+
+        self.frame_index = -1
+        self.frame = self.get_neutral_frame()
+        self.controller = None
+        self.mappings = {}
+
+    def __repr__(self):
+        c = self.__class__.__name__
+        n = self.file_name
+        f = len(self.frames)
+
+        return "{}: '{}' ({} frames)".format(c, n, f)
+
+    @property
+    def done(self):
+        return self.frame_index >= len(self.frames)
+
+    def get_neutral_frame(self):
+        size = sum(d[3] for d in self.header["devices"])
+
+        return (0,) * size
+
+    # returns the index of each device's first value in a frame record
+    def get_value_indexes(self):
+        indexes = {}
+        i = 0
+
+        for name, cls, typecode, width in self.header["devices"]:
+            indexes[name] = i
+            i += width
+
+        return indexes
+
+    def apply(self, controller):
+        indexes = self.get_value_indexes()
+        self.mappings = dict(controller.mappings)
+
+        for d in controller.devices:
+            if d.name not in indexes:
+                raise ValueError("no recorded data for {}".format(d))
+
+        # Dpad buttons are remapped along with their Dpad so that
+        #   they share the same mapping objects
+        remapped = set()
+
+        for d in controller.devices:
+            i = indexes[d.name]
+            cls = type(d)
+
+            if cls is Dpad:
+                controller.remap_device(d.name, [
+                    ReplayMapping(self, indexes[b.name]) for b in d.buttons
+                ])
+                remapped.update(b.name for b in d.buttons)
+
+            elif cls is ThumbStick:
+                controller.remap_device(d.name, [
+                    ReplayMapping(self, i), ReplayMapping(self, i + 1)
+                ])
+
+            elif d.name not in remapped:
+                controller.remap_device(d.name, ReplayMapping(self, i))
+
+        controller.replay = self
+        self.controller = controller
+
+    # restores the controller's original mappings
+    def remove(self):
+        controller = self.controller
+
+        if controller:
+            for name in self.mappings:
+                controller.remap_device(name, self.mappings[name])
+
+            controller.replay = None
+            self.controller = None
+
+    def next_frame(self):
+        self.frame_index += 1
+
+        if self.done:
+            self.frame = self.get_neutral_frame()
+        else:
+            self.frame = self.frames[self.frame_index]
+
+
+class ReplayMapping:
+    """
+    Mapping object that reads a single recorded value from the current
+    frame of an InputReplay.
+    """
+    def __init__(self, replay, index):
+        self.replay = replay
+        self.index = index
+
+    def __repr__(self):
+        return "replay_mapping, {}".format(self.index)
+
+    def get_args(self):
+        return ["replay_mapping", self.index]
+
+    def is_pressed(self):
+        return self.replay.frame[self.index]
+
+    def get_value(self):
+        return self.replay.frame[self.index]
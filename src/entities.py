@@ -1,10 +1,15 @@
 from os.path import join
+from time import perf_counter
+
+import pygame
 
 from src.cfg import save_cfg, format_dict
 from src.collections import Group
-from src.events import EventHandlerInterface
+from src.events import EventBus, EventHandler, EventHandlerInterface
 from src.meters import Clock
 from src.geometry import Rect
+from src.controller import ControllerBank
+from src.input_manager import InputManager
 from src.controller_io import ControllerIO
 from zs_globals import Cfg, Zs, Settings
 from zs_globals import Resources as Dirs
@@ -17,10 +22,44 @@ class CfgMetaclass(type):
       methods have been called. This flag is used to turn
       on / log changes to public setter methods in the
       entity object's cfg_dict attribute
+    It also builds each entity class's table of event names
+      to 'on_' methods when the class is created, which is
+      rebuilt for the class and all of its subclasses if an
+      'on_' attribute is set on the class later
     """
+    def __init__(cls, name, bases, namespace):
+        super(CfgMetaclass, cls).__init__(name, bases, namespace)
+        cls.event_methods = EventHandler.get_event_methods(cls)
+
+    def __setattr__(cls, key, value):
+        super(CfgMetaclass, cls).__setattr__(key, value)
+
+        if key.startswith("on_"):
+            cls.update_event_methods()
+
+    def __delattr__(cls, key):
+        super(CfgMetaclass, cls).__delattr__(key)
+
+        if key.startswith("on_"):
+            cls.update_event_methods()
+
+    # the tables are updated in place since event handlers
+    #   keep a reference to them
+    def update_event_methods(cls):
+        classes = [cls]
+
+        while classes:
+            c = classes.pop()
+            table = c.event_methods
+            table.clear()
+            table.update(EventHandler.get_event_methods(c))
+
+            classes.extend(c.__subclasses__())
+
     def __call__(cls, *args, **kwargs):
         new = type.__call__(cls, *args, **kwargs)
         new.initialized = True
+        new.event_handler.set_instance_methods()
 
         return new
 
@@ -51,6 +90,13 @@ class Entity(EventHandlerInterface, metaclass=CfgMetaclass):
         self.visible = True
         self.graphics = None
 
+        # the dirty flag and the last area / image drawn are
+        #   used to find what needs to be redrawn when drawing
+        #   with dirty rects
+        self.dirty = True
+        self.drawn_rect = None
+        self.drawn_image = None
+
         self.clock = Clock("{}'s clock".format(name))
         self.rect = Rect(self.size, self.position)
 
@@ -68,12 +114,25 @@ class Entity(EventHandlerInterface, metaclass=CfgMetaclass):
         return "{}: '{}'".format(c, n)
 
     # Once initialized, changes to any attribute with
-    #   a corresponding setter method are tracked
+    #   a corresponding setter method are tracked.
+    #   'on_' attributes set on the entity itself are
+    #   used as event methods in place of the class's
+    #   (those set in __init__ are found by the metaclass)
     def __setattr__(self, key, value):
         super(Entity, self).__setattr__(key, value)
 
-        if self.initialized and hasattr(self, "set_" + key):
-            self.log_cfg_change(key, value)
+        if self.initialized:
+            if key[:3] == "on_":
+                self.event_handler.set_instance_method(key)
+
+            if hasattr(self, "set_" + key):
+                self.log_cfg_change(key, value)
+
+    def __delattr__(self, key):
+        super(Entity, self).__delattr__(key)
+
+        if key[:3] == "on_" and self.initialized:
+            self.event_handler.set_instance_method(key)
 
     # automatically generates .cfg syntax arguments for
     #   changes to public setter values
@@ -133,10 +192,27 @@ class Entity(EventHandlerInterface, metaclass=CfgMetaclass):
     def set_size(self, w, h):
         self.size = w, h
         self.rect.size = w, h
+        self.dirty = True
 
     def set_position(self, x, y):
         self.position = x, y
         self.rect.position = x, y
+        self.dirty = True
+
+    # compares the area and image to be drawn for this entity
+    #   with those last drawn and returns a list of the screen
+    #   areas that need to be redrawn, if any
+    def check_dirty(self, rect, image):
+        if not (self.dirty or image is not self.drawn_image or
+                rect != self.drawn_rect):
+            return []
+
+        rects = [r for r in (self.drawn_rect, rect) if r]
+        self.drawn_rect = rect
+        self.drawn_image = image
+        self.dirty = False
+
+        return rects
 
     def update(self):
         for m in self.update_methods:
@@ -147,13 +223,13 @@ class Entity(EventHandlerInterface, metaclass=CfgMetaclass):
             self.graphics.update()
 
     def pause_event_method(self, method_name):
-        if method_name not in self.event_handler.paused:
-            self.event_handler.paused.append(method_name)
+        paused = self.event_handler.paused
+
+        if method_name not in paused:
+            paused.add(method_name)
 
         else:
-            p = self.event_handler.paused
-            i = p.index(method_name)
-            self.event_handler.paused = p[0:i] + p[i+1:]
+            paused.remove(method_name)
 
     def on_spawn(self):
         self.spawned = True
@@ -168,7 +244,11 @@ class Layer(Entity):
       act on Groups of Sprite objects, or store/load data.
     Layers should form an application hierarchy with parent and
       sub layers.
+    When a FrameProfiler is set on the Layer class each layer's
+      update methods and draw calls are timed separately.
     """
+    profiler = None
+
     def __init__(self, name):
         super(Layer, self).__init__(name)
         self.set_size(*Settings.SCREEN_SIZE)
@@ -178,6 +258,17 @@ class Layer(Entity):
         self.controllers = []
         self.parent_layer = None
 
+        # the canvas subsurface is cached along with the parent
+        #   surface and rect that it was made from
+        self.canvas = None
+        self.canvas_key = None
+        self.canvas_area = None
+        self.canvas_clipped = False
+
+        # number of items drawn / culled by the last draw
+        self.drawn_count = 0
+        self.culled_count = 0
+
         self.update_methods += [
             self.update_controllers,
             self.update_sprites,
@@ -220,10 +311,27 @@ class Layer(Entity):
         for c in controllers:
             self.set_controller(c)
 
+    # with a profiler set, each update method is timed
+    #   under its own label
+    def update(self):
+        profiler = self.profiler
+
+        if profiler:
+            for m in self.update_methods:
+                label = "update {} {}".format(
+                    self.name, getattr(m, "__name__", m))
+                profiler.time(label, m)
+
+        else:
+            super(Layer, self).update()
+
+    # controllers in the ControllerBank that's updating this
+    #   frame are updated by the bank instead
     def update_controllers(self):
         if not self.paused:
             for c in self.controllers:
-                c.update()
+                if c.bank is None or not c.bank.updating:
+                    c.update()
 
     def update_sprites(self):
         if not self.paused:
@@ -237,22 +345,64 @@ class Layer(Entity):
             for layer in self.sub_layers:
                 layer.update()
 
+    # the canvas subsurface is only rebuilt when the layer's rect or
+    #   the surface it's drawn on have changed
     def get_canvas(self, screen):
         # PYGAME CHOKE POINT
 
+        key = screen, screen.get_size(), self.rect.position, self.rect.size
+
+        if key != self.canvas_key:
+            self.canvas_key = key
+            self.canvas = self.make_canvas(screen)
+            self.canvas_area = screen.get_rect()
+            self.canvas_clipped = False
+
+        canvas = self.canvas
+
+        # subsurfaces don't inherit the clipping area of their parent
+        #   surface, which is used when drawing with dirty rects
+        if canvas:
+            clip = screen.get_clip()
+
+            if clip != self.canvas_area:
+                x, y = canvas.get_offset()
+                canvas.set_clip(clip.move(-x, -y))
+                self.canvas_clipped = True
+
+            elif self.canvas_clipped:
+                canvas.set_clip(None)
+                self.canvas_clipped = False
+
+        return canvas
+
+    def make_canvas(self, screen):
+        # PYGAME CHOKE POINT
+
         sub_rect = self.rect.clip(
             screen.get_rect())
 
         try:
-            canvas = screen.subsurface(sub_rect)
+            return screen.subsurface(sub_rect)
         except ValueError:  # if the layer's area is entirely outside of the screen's
             return None     # area, it doesn't get drawn
 
-        return canvas
-
     def draw(self, screen, offset=(0, 0), draw_point=(0, 0)):
+        if self.profiler:
+            start = perf_counter()
+            self.draw_layer(screen, offset, draw_point)
+            self.profiler.add_time(
+                "draw " + self.name, perf_counter() - start)
+
+        else:
+            self.draw_layer(screen, offset, draw_point)
+
+    def draw_layer(self, screen, offset=(0, 0), draw_point=(0, 0)):
         canvas = self.get_canvas(screen)
 
+        if not canvas:
+            return
+
         if self.graphics and self.visible:
             canvas.blit(
                 self.graphics.get_image(), draw_point)
@@ -265,24 +415,123 @@ class Layer(Entity):
             canvas, offset=offset
         )
 
+    # the images of all visible items are collected into one
+    #   sequence that's passed to a single Surface.blits() call.
+    #   Items that fall entirely outside of the canvas's clipping
+    #   area are culled, and groups with a SpatialGrid only check
+    #   the items in the grid cells that the area covers.
+    #   Only visible items with an image are counted as culled,
+    #   including the ones a grid leaves out, which means checking
+    #   every item of a grid group for the count
     def draw_items(self, canvas, offset=(0, 0)):
+        # PYGAME CHOKE POINT
+
         ox, oy = offset
+        left, top, w, h = canvas.get_clip()
+        right, bottom = left + w, top + h
+
+        blits = []
+        append = blits.append
+        culled = 0
 
         for group in self.groups:
-            for item in group.sprites:
-                if item.graphics and item.image and item.visible:
+            grid = group.grid
+
+            if grid is not None:
+                items = grid.sort_items(
+                    grid.query_rect(left - ox, top - oy, w, h))
+
+                found = set(items)
+                culled += sum(
+                    1 for item in group.sprites if item not in found and
+                    item.visible and item.graphics and item.image
+                )
+
+            else:
+                items = group.sprites
+
+            for item in items:
+                if item.visible and item.graphics:
+                    image = item.image
+
+                    if image:
+                        x, y = item.position
+                        x += ox
+                        y += oy
+                        iw, ih = image.get_size()
 
-                    x, y = item.position
-                    x += ox
-                    y += oy
+                        if x + iw <= left or y + ih <= top or \
+                                x >= right or y >= bottom:
+                            culled += 1
 
-                    canvas.blit(item.image, (x, y))
+                        else:
+                            append((image, (x, y)))
+
+        if blits:
+            canvas.blits(blits, False)
+
+        self.drawn_count = len(blits)
+        self.culled_count = culled
+
+    # returns the number of items drawn and culled by the last
+    #   draw of this layer and all of its sub layers
+    def get_draw_counts(self):
+        drawn, culled = self.drawn_count, self.culled_count
+
+        for layer in self.sub_layers:
+            d, c = layer.get_draw_counts()
+            drawn += d
+            culled += c
+
+        return drawn, culled
 
     def draw_sub_layers(self, canvas, offset=(0, 0)):
         for layer in self.sub_layers:
             if layer.visible:
                 layer.draw(canvas, offset=offset)
 
+    # returns a list of the screen areas that have changed since the
+    #   layer was last checked. 'area' is the rect of the parent canvas
+    #   and 'origin' is the screen position of the parent canvas, which
+    #   mirror the canvas that the layer would be drawn to
+    def get_dirty_rects(self, area, origin=(0, 0), offset=(0, 0), hidden=False):
+        # PYGAME CHOKE POINT
+
+        sub_rect = self.rect.clip(area)
+        x, y = origin
+        x += sub_rect.x
+        y += sub_rect.y
+        canvas_rect = pygame.Rect((x, y), sub_rect.size)
+
+        if self.graphics and self.visible and not hidden:
+            rects = self.check_dirty(canvas_rect, self.image)
+        else:
+            rects = self.check_dirty(None, None)
+
+        ox, oy = offset
+        ox += x
+        oy += y
+
+        for group in self.groups:
+            for item in group.sprites:
+                image = item.graphics and item.image
+
+                if image and item.visible and not hidden:
+                    ix, iy = item.position
+                    rect = pygame.Rect((ix + ox, iy + oy), image.get_size())
+                    rects += item.check_dirty(rect, image)
+
+                else:
+                    rects += item.check_dirty(None, None)
+
+        sub_area = pygame.Rect((0, 0), sub_rect.size)
+        for layer in self.sub_layers:
+            rects += layer.get_dirty_rects(
+                sub_area, (x, y), offset,
+                hidden=hidden or not layer.visible)
+
+        return rects
+
     def on_pause(self):
         self.paused = not self.paused
 
@@ -293,6 +542,8 @@ class Environment(Layer):
       holds a special attribute dictionary called the "model"
       which allows shared reference to environment data
       including layers, sprite groups, and other generic data.
+    With Settings.EVENT_BUS set, the events of every entity are delivered
+      by the Environment's EventBus after each update.
     """
 
     def __init__(self, name):
@@ -301,6 +552,11 @@ class Environment(Layer):
         self.model = {}
         self.transition = {}
         self.return_to = None
+        self.controller_bank = None
+        self.event_bus = None
+
+        if Settings.EVENT_BUS:
+            self.event_bus = EventBus(name)
 
     def get_groups(self):
         model = self.model
@@ -362,10 +618,77 @@ class Environment(Layer):
         }
         self.transition.update(kwargs)
 
+    # returns a ControllerBank with the controllers of every
+    #   layer in the Environment's layer tree
+    def make_controller_bank(self):
+        bank = ControllerBank(self.name)
+
+        def add_layer(layer, chain):
+            chain += (layer,)
+
+            for c in layer.controllers:
+                bank.add_controller(c, *chain)
+
+            for sub_layer in layer.sub_layers:
+                add_layer(sub_layer, chain)
+
+        add_layer(self, ())
+
+        return bank
+
+    def update_controllers(self):
+        if self.controller_bank:
+            self.controller_bank.update()
+
+        super(Environment, self).update_controllers()
+
     def main(self, screen):
         self.draw(screen)
         self.update()
 
+    # the bus is set on the EventHandler class while the Environment
+    #   updates so that every entity posts events to it, and the
+    #   previous bus is restored afterwards, even if an error is raised
+    def update(self):
+        bus = self.event_bus
+        previous = EventHandler.bus
+        EventHandler.bus = bus
+
+        try:
+            if bus is not None:
+                super(Environment, self).update()
+
+                if self.profiler:
+                    self.profiler.time("deliver events", bus.deliver)
+                else:
+                    bus.deliver()
+
+            else:
+                super(Environment, self).update()
+
+        finally:
+            EventHandler.bus = previous
+
+            if self.controller_bank:
+                self.controller_bank.end_frame()
+
+            # the next frame reads new input state
+            InputManager.SNAPSHOT.release()
+
+    # the controller bank is made once the context has finished
+    #   loading the Environment's layers
+    def on_spawn(self):
+        super(Environment, self).on_spawn()
+        self.release_controllers()
+        self.controller_bank = self.make_controller_bank()
+
+    # called when the Environment is left for good, so that its
+    #   controllers aren't tied to its ControllerBank
+    def release_controllers(self):
+        if self.controller_bank:
+            self.controller_bank.release()
+            self.controller_bank = None
+
     def on_change_environment(self):
         event = self.event
         env = event["environment"]
@@ -399,6 +722,19 @@ class Sprite(Entity):
         self.group = group
         group.add_member(self)
 
+    # the sprite's group is updated if it has a SpatialGrid / RectArrays
+    def set_size(self, w, h):
+        super(Sprite, self).set_size(w, h)
+
+        if self.group and self.group.indexed:
+            self.group.update_member(self)
+
+    def set_position(self, x, y):
+        super(Sprite, self).set_position(x, y)
+
+        if self.group and self.group.indexed:
+            self.group.update_member(self)
+
     def set_controller(self, layer, index):
         self.controller = layer.controllers[index]
 
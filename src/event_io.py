@@ -0,0 +1,242 @@
+import json
+from time import perf_counter
+
+from src.collections import CacheList
+from src.events import Event, EventHandler
+from zs_globals import Events, Settings
+
+
+class EventTracer:
+    """
+    An EventTracer records every event that is queued, handled or forwarded
+    by a listener while it is set as the 'tracer' of the EventHandler class.
+    Each record is a dict with the frame number, the kind of record, the
+    entity's name and class, the event's name, duration, lerp flag, link and
+    trigger names, the cascade depth (how many handle_event() calls the
+    record was made inside of) and whether it was made during an update.
+    Records of handled events also have the time in milliseconds that
+    handling took, including any nested events.
+    The Game object calls start_frame() / end_frame() around each
+    environment update, so frame numbers count updates.
+    The most recent records are kept in a CacheList of 'depth' records and
+    can also be written to a JSON lines file as they are made, which can be
+    loaded by an EventReplay object.
+    """
+    QUEUE = "queue"
+    HANDLE = "handle"
+    LISTENER = "listener"
+
+    def __init__(self, depth=Settings.EVENT_TRACE_DEPTH, file_name=None):
+        self.records = CacheList(depth)
+        self.frame = 0
+        self.depth = 0
+        self.updating = False
+
+        self.file_name = file_name
+        self.file = None
+        if file_name:
+            self.file = open(file_name, "w")
+
+        EventHandler.tracer = self
+
+    def __repr__(self):
+        c = self.__class__.__name__
+        n = len(self.records)
+        f = self.frame
+
+        return "{} ({} records, frame {})".format(c, n, f)
+
+    @staticmethod
+    def get_name(event):
+        if not event:
+            return None
+
+        if type(event) is str:
+            return event.split(" ")[0]
+
+        return event[Events.NAME]
+
+    def record(self, kind, entity, event, seconds=None):
+        get_name = self.get_name
+        record = {
+            "frame": self.frame,
+            "kind": kind,
+            "entity": entity.name,
+            "class": entity.__class__.__name__,
+            "name": event[Events.NAME],
+            "duration": event.get(Events.DURATION, 1),
+            "lerp": event.get(Events.LERP, True),
+            "link": get_name(event.get(Events.LINK)),
+            "trigger": get_name(event.get(Events.TRIGGER)),
+            "depth": self.depth,
+            "update": self.updating
+        }
+
+        if seconds is not None:
+            record["ms"] = seconds * 1000
+
+        self.records.append(record)
+
+        if self.file:
+            self.file.write(json.dumps(record) + "\n")
+
+    # calls an EventHandler's check methods for an event and
+    #   records the time it took
+    def trace_handle(self, handler, event):
+        self.depth += 1
+        start = perf_counter()
+
+        try:
+            handler.check_event_methods(event)
+            handler.check_listeners(event)
+
+        finally:
+            self.depth -= 1
+
+        self.record(self.HANDLE, handler.entity, event, perf_counter() - start)
+
+    def start_frame(self):
+        self.updating = True
+
+    def end_frame(self):
+        self.updating = False
+        self.frame += 1
+
+    # returns a list of (value, count) pairs for a record field (e.g.
+    #   "entity" or "name") from the most to least common, which shows
+    #   where event storms are coming from
+    def get_counts(self, field="entity", kind=None):
+        counts = {}
+
+        for record in self.records:
+            if kind is None or record["kind"] == kind:
+                value = record[field]
+                counts[value] = counts.get(value, 0) + 1
+
+        return sorted(counts.items(), key=lambda item: item[1], reverse=True)
+
+    def close(self):
+        if EventHandler.tracer is self:
+            EventHandler.tracer = None
+
+        if self.file:
+            self.file.close()
+            self.file = None
+
+
+class EventReplay:
+    """
+    An EventReplay loads the records of an EventTracer (from a JSON lines
+    file or a list) and re-injects the traced workload into an environment.
+    apply() adds the replay's methods to the start and end of the
+    environment's update methods. Events that were queued before an update
+    are queued again at the start of the same update of the replay (counting
+    from the first traced frame), and events that were queued during an
+    update are queued again at the end of it, on the entity with the
+    recorded name.
+    Only 'queue' records with a depth of 0 are replayed, since events queued
+    or forwarded inside of handle_event() will be made again by the
+    environment's own event methods and listeners. Linked events are queued
+    by their own records, so links aren't replayed. The 'names' argument
+    can be used to leave out events by name (e.g. "spawn").
+    """
+    def __init__(self, records, names=()):
+        records = [
+            r for r in records if r["kind"] == EventTracer.QUEUE and
+            not r["depth"] and r["name"] not in names
+        ]
+
+        # frame: ([records before the update], [records during the update])
+        self.frames = {}
+        start = min(r["frame"] for r in records) if records else 0
+
+        for r in records:
+            frame = r["frame"] - start
+
+            if frame not in self.frames:
+                self.frames[frame] = [], []
+            self.frames[frame][r["update"]].append(r)
+
+        self.length = max(self.frames) + 1 if self.frames else 0
+        self.frame_index = 0
+        self.environment = None
+        self.entities = {}
+        self.missing = set()
+
+    def __repr__(self):
+        c = self.__class__.__name__
+        n = sum(len(b) + len(d) for b, d in self.frames.values())
+
+        return "{} ({} events, {} frames)".format(c, n, self.length)
+
+    @staticmethod
+    def load(file_name, names=()):
+        with open(file_name, "r") as file:
+            records = [json.loads(line) for line in file if line.strip()]
+
+        return EventReplay(records, names)
+
+    @property
+    def done(self):
+        return self.frame_index >= self.length
+
+    # returns a dict of names to every entity in an environment's
+    #   layer tree and groups
+    @staticmethod
+    def get_entities(environment):
+        entities = {}
+
+        def add_layer(layer):
+            entities[layer.name] = layer
+
+            for sub_layer in layer.sub_layers:
+                add_layer(sub_layer)
+
+        add_layer(environment)
+
+        for group in environment.get_groups():
+            for sprite in group.sprites:
+                entities[sprite.name] = sprite
+
+        return entities
+
+    def apply(self, environment):
+        self.environment = environment
+        self.entities = self.get_entities(environment)
+        self.frame_index = 0
+
+        environment.update_methods.insert(0, self.start_frame)
+        environment.update_methods.append(self.end_frame)
+
+    def remove(self):
+        if self.environment:
+            self.environment.update_methods.remove(self.start_frame)
+            self.environment.update_methods.remove(self.end_frame)
+            self.environment = None
+
+    @staticmethod
+    def make_event(record):
+        return Event(record["name"], {
+            Events.DURATION: record["duration"],
+            Events.LERP: record["lerp"]
+        })
+
+    def start_frame(self):
+        if self.frame_index in self.frames:
+            self.queue_events(self.frames[self.frame_index][0])
+
+    def end_frame(self):
+        if self.frame_index in self.frames:
+            self.queue_events(self.frames[self.frame_index][1])
+
+        self.frame_index += 1
+
+    def queue_events(self, records):
+        for r in records:
+            entity = self.entities.get(r["entity"])
+
+            if entity is None:
+                self.missing.add(r["entity"])
+
+            else:
+                entity.queue_event(self.make_event(r))
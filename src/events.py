@@ -1,12 +1,44 @@
+from inspect import getattr_static
+from types import FunctionType
+
+from src.collections import AverageCache
 from src.meters import Timer
-from zs_globals import Events
+from zs_globals import Events, Settings
 
 
 class EventHandler:
+    """
+    Listeners are indexed by event name. Each name has a dict of listeners
+    under a unique key (in the order they were added) so that handling an
+    event only checks the listeners for that event's name, and a temp
+    listener can be removed in O(1) once it has responded.
+    Listener responses are interpreted once when the listener is added,
+    and each forwarded event gets its own copy of the response, with a
+    copy of the triggering event that's made once and shared by every
+    listener it's forwarded to.
+    Event methods are found with a dispatch table of event names to the
+    entity class's 'on_' methods, which is built once for each class (by
+    the CfgMetaclass for Entity classes). 'on_' attributes set on the
+    entity itself (e.g. entity.on_hit = method) are kept in a separate
+    table that's checked first, which Entity objects update when those
+    attributes are set. Paused event names are kept in a set.
+    When an EventBus is set as the 'bus' class attribute, events from
+    timers and listeners are posted to the bus to be delivered in a batch
+    instead of being handled right away. Calling handle_event() directly
+    always handles the event immediately.
+    An EventTracer set as the 'tracer' class attribute records every event
+    that is queued, handled or forwarded by a listener.
+    """
+    bus = None
+    tracer = None
+
     def __init__(self, entity):
         self.entity = entity
-        self.paused = []
-        self.listeners = []
+        self.paused = set()
+        self.listeners = {}
+        self.listener_count = 0
+        self.event_methods = self.get_class_event_methods(type(entity))
+        self.instance_methods = {}
 
     def __repr__(self):
         e = repr(self.entity)
@@ -19,26 +51,40 @@ class EventHandler:
         else:
             event = self.interpret(events[0])
 
+        if self.tracer is not None:
+            self.tracer.record(self.tracer.QUEUE, self.entity, event)
+
+        # a one frame Event without a link is just handled on the next
+        #   tick of the clock, so no Timer is needed. Event dicts always
+        #   get a Timer since they can't make one when it's read
+        if type(event) is Event and event.data is None:
+            self.queue_one_frame_event(event)
+
+            return
+
         name = event[Events.NAME]
         duration = event.get(Events.DURATION, 1)
+        lerp = event.get(Events.LERP, True)
+        link = event.get(Events.LINK, False)
+
+        if duration == 1 and lerp and not link and type(event) is Event:
+            self.queue_one_frame_event(event)
+
+            return
 
         timer = Timer(name, duration)
         event[Events.TIMER] = timer
         self.entity.clock.add_timers(
             timer)
 
-        lerp = event.get(Events.LERP, True)
-
         def handle_event():
-            self.handle_event(event)
+            self.dispatch_event(event)
 
         if lerp:
             timer.on_tick = handle_event
         else:
             timer.on_switch_off = handle_event
 
-        link = event.get(Events.LINK, False)
-
         if link:
             if lerp:
                 def queue_link():
@@ -51,82 +97,184 @@ class EventHandler:
 
             timer.on_switch_off = queue_link
 
+    def queue_one_frame_event(self, event):
+        event.timer = Event.ONE_FRAME
+        self.entity.clock.queue_call(
+            event.name, self.dispatch_event, event)
+
+    # events are posted to the bus if there is one
+    def dispatch_event(self, event):
+        bus = self.bus
+
+        if bus is None:
+            self.handle_event(event)
+        else:
+            bus.post(self, event)
+
     def handle_event(self, event):
         event = self.interpret(event)
-        self.check_event_methods(event)
-        self.check_listeners(event)
+
+        if self.tracer is not None:
+            self.tracer.trace_handle(self, event)
+
+        else:
+            self.check_event_methods(event)
+            self.check_listeners(event)
 
     def check_event_methods(self, event):
         name = event[Events.NAME]
+        method = self.event_methods.get(name)
+
+        if self.instance_methods:
+            method = self.instance_methods.get(name, method)
+
+        if method and name not in self.paused:
+            self.entity.event = event.copy()
+            method(self.entity)
+
+    # returns the dispatch table for a class, which is
+    #   stored on the class the first time it's needed
+    @staticmethod
+    def get_class_event_methods(cls):
+        if "event_methods" not in vars(cls):
+            cls.event_methods = EventHandler.get_event_methods(cls)
+
+        return cls.event_methods
+
+    # returns a dict of event names to each of a class's callable 'on_'
+    #   attributes. Plain functions are called directly and anything
+    #   else (e.g. a staticmethod) is looked up on the entity
+    @staticmethod
+    def get_event_methods(cls):
+        table = {}
+
+        for attr in dir(cls):
+            if attr.startswith("on_"):
+                value = getattr_static(cls, attr)
+
+                if isinstance(value, FunctionType):
+                    table[attr[3:]] = value
+
+                elif callable(getattr(cls, attr)):
+                    table[attr[3:]] = EventHandler.make_lookup(attr)
 
-        if name not in self.paused:
-            m = getattr(self.entity, "on_" + name, False)
-            if m and callable(m):
-                self.entity.event = event.copy()
-                m()
+        return table
+
+    @staticmethod
+    def make_lookup(attr):
+        def call_method(entity):
+            getattr(entity, attr)()
+
+        return call_method
+
+    def set_instance_methods(self):
+        for attr in vars(self.entity):
+            if attr[:3] == "on_":
+                self.set_instance_method(attr)
+
+    # an 'on_' attribute of the entity itself that isn't callable
+    #   (e.g. None) stops the class's event method being called
+    def set_instance_method(self, attr):
+        name = attr[3:]
+        entity = self.entity
+
+        if attr not in vars(entity):
+            self.instance_methods.pop(name, None)
+
+        elif callable(vars(entity)[attr]):
+            self.instance_methods[name] = self.make_lookup(attr)
+
+        else:
+            self.instance_methods[name] = None
 
     def check_listeners(self, event):
-        for listener in self.listeners:
-            if listener[Events.NAME] == event[Events.NAME]:
-                target = listener[Events.TARGET]
+        listeners = self.listeners.get(event[Events.NAME])
 
-                response = listener.get(Events.RESPONSE, event.copy())
-                response = self.interpret(response)
-                response[Events.TRIGGER] = event.copy()
+        if listeners:
+            trigger = event.copy()
+            bus = self.bus
 
-                target.handle_event(response)
+            # listeners added or removed by a response take effect on
+            #   the next event
+            for key, listener in tuple(listeners.items()):
+                if key not in listeners:
+                    continue
 
                 if listener.get(Events.TEMP, False):
-                    self.remove_listener(listener)
+                    self.pop_listener(listener[Events.NAME], key)
+
+                # each target gets its own copy of the response, since
+                #   copying a small dict is cheaper than a copy-on-write
+                #   view that checks every key lookup in Python
+                response = listener.get(Events.RESPONSE, event).copy()
+                response[Events.TRIGGER] = trigger
+
+                target = listener[Events.TARGET]
+                if self.tracer is not None:
+                    self.tracer.record(self.tracer.LISTENER, target, response)
+
+                if bus is None:
+                    target.handle_event(response)
+                else:
+                    bus.post(target.event_handler, response)
 
     def add_listener(self, *listeners):
         for l in listeners:
             l = self.interpret(l)
             l[Events.TARGET] = l.get(Events.TARGET, self.entity)
-            self.listeners.append(l)
+
+            response = l.get(Events.RESPONSE, False)
+            if response:
+                l[Events.RESPONSE] = self.interpret(response)
+
+            name = l[Events.NAME]
+            if name not in self.listeners:
+                self.listeners[name] = {}
+
+            self.listeners[name][self.listener_count] = l
+            self.listener_count += 1
+
+    def pop_listener(self, name, key):
+        listeners = self.listeners[name]
+        listeners.pop(key)
+
+        if not listeners:
+            self.listeners.pop(name)
 
     def remove_listener(self, listener):
-        remove = []
+        listener = self.interpret(listener)
         name = listener[Events.NAME]
+        response = listener.get(Events.RESPONSE, False)
+        target = listener.get(Events.TARGET, False)
 
-        for l in self.listeners:
+        if response:
+            response = self.interpret(response)
+
+        for key, l in tuple(self.listeners.get(name, {}).items()):
             matches = [
-                l[Events.NAME] == name
+                not response or l.get(Events.RESPONSE) == response,
+                not target or l[Events.TARGET] == target
             ]
 
-            response = listener.get(Events.RESPONSE, False)
-            if response:
-                matches.append(l[Events.RESPONSE] == response)
-
-            target = listener.get(Events.TARGET, False)
-            if target:
-                matches.append(l[Events.TARGET] == target)
-
             if all(matches):
-                remove.append(l)
-
-        self.listeners = [l for l in self.listeners if l not in remove]
+                self.pop_listener(name, key)
 
     def listening_for(self, event_name):
-        for l in self.listeners:
-            if l[Events.NAME] == event_name:
-                return True
-
-        return False
+        return event_name in self.listeners
 
     @staticmethod
     def interpret(argument):
-        if type(argument) is dict:
+        if type(argument) is dict or type(argument) is Event:
             return argument
 
         if type(argument) is str:
             if " " in argument:
                 name, response = argument.split(" ")
 
-                return {Events.NAME: name, Events.RESPONSE: response}
+                return Event(name, {Events.RESPONSE: response})
 
             else:
-                return {Events.NAME: argument}
+                return Event(argument)
 
     @staticmethod
     def chain_events(first_event, *link_events):
@@ -150,6 +298,116 @@ class EventHandler:
         return event
 
 
+class EventBus:
+    """
+    An EventBus collects the events posted by every EventHandler in an
+    Environment during an update and delivers them all in a single phase
+    with deliver(), which is called once per frame. Each batch is grouped
+    by event name and the class of the receiving entity (in the order each
+    group was first posted) so that the same event methods run together.
+    Events posted while the bus is delivering are delivered in another
+    round of the same phase, one cascade level deeper. Events beyond
+    'max_depth' levels are deferred to the next frame rather than letting
+    long link / listener chains run within a single frame.
+    The number of events delivered each frame and their average latency
+    (the frames between being posted and delivered) are kept in
+    AverageCache objects for get_stats().
+    """
+    def __init__(self, name, max_depth=Settings.EVENT_MAX_DEPTH,
+                 depth=Settings.PROFILER_DEPTH):
+        self.name = name
+        self.max_depth = max_depth
+
+        self.queue = []         # (handler, event, frame posted, cascade depth)
+        self.frame = 0
+        self.depth = None       # cascade depth of the event being delivered
+
+        self.counts = AverageCache(depth)
+        self.latencies = AverageCache(depth)
+        self.deferred = AverageCache(depth)
+
+    def __repr__(self):
+        c = self.__class__.__name__
+        n = self.name
+        m = len(self.queue)
+
+        return "{}: {} ({} queued)".format(c, n, m)
+
+    def post(self, handler, event):
+        depth = self.depth
+        depth = 0 if depth is None else depth + 1
+
+        self.queue.append((handler, event, self.frame, depth))
+
+    @staticmethod
+    def group_events(queue):
+        groups = {}
+
+        for item in queue:
+            key = item[1][Events.NAME], type(item[0].entity)
+
+            if key not in groups:
+                groups[key] = [item]
+            else:
+                groups[key].append(item)
+
+        return groups.values()
+
+    def deliver(self):
+        frame = self.frame
+        count = 0
+        latency = 0
+        deferred = []
+
+        # the cascade depth is cleared even if a handler raises
+        #   an error, so later posts start from depth 0
+        try:
+            queue = self.queue
+            while queue:
+                self.queue = []
+
+                for group in self.group_events(queue):
+                    for handler, event, posted, depth in group:
+                        if depth > self.max_depth:
+                            deferred.append((handler, event, posted, 0))
+
+                        else:
+                            self.depth = depth
+                            handler.handle_event(event)
+
+                            count += 1
+                            latency += frame - posted
+
+                queue = self.queue
+
+        finally:
+            self.depth = None
+
+        self.queue = deferred
+        self.frame += 1
+
+        self.counts.append(count)
+        self.latencies.append(latency / count if count else 0)
+        self.deferred.append(len(deferred))
+
+    # returns the average, maximum and most recent number of events
+    #   delivered per frame, latency in frames, and deferred events
+    def get_stats(self):
+        stats = {}
+
+        for label, cache in (("events", self.counts),
+                             ("latency", self.latencies),
+                             ("deferred", self.deferred)):
+            if cache:
+                stats[label] = {
+                    "average": cache.average(),
+                    "maximum": max(cache),
+                    "last": cache[-1]
+                }
+
+        return stats
+
+
 class EventHandlerInterface:
     def __init__(self):
         self.event_handler = EventHandler(self)
@@ -166,3 +424,136 @@ class EventHandlerInterface:
             raise RuntimeError(
                 err.format(self.__class__.__name__)
             )
+
+
+class Event:
+    """
+    An Event is a compact record of an event that can be used anywhere an
+    event dict is expected. The name and timer are kept in slots and any
+    other keys are kept in a 'data' dict that's only made when needed, so
+    a plain named event is a single small object.
+    Events queued for one frame are handled without a Timer, so their
+    timer is set to the ONE_FRAME flag and a finished Timer is only made
+    if the timer is actually read.
+    """
+    __slots__ = "name", "timer", "data"
+
+    ONE_FRAME = "one frame"
+
+    def __init__(self, name, data=None, timer=None):
+        self.name = name
+        self.timer = timer
+        self.data = data
+
+    def __repr__(self):
+        return "Event: {}".format(self.to_dict())
+
+    def get_timer(self):
+        timer = self.timer
+
+        if timer is Event.ONE_FRAME:
+            timer = Timer(self.name, 1)
+            timer.tick()
+            self.timer = timer
+
+        return timer
+
+    def __getitem__(self, key):
+        if key == Events.NAME:
+            return self.name
+
+        if key == Events.TIMER and self.timer is not None:
+            return self.get_timer()
+
+        if self.data is None:
+            raise KeyError(key)
+
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        if key == Events.NAME:
+            self.name = value
+
+        elif key == Events.TIMER:
+            self.timer = value
+
+        else:
+            if self.data is None:
+                self.data = {}
+
+            self.data[key] = value
+
+    def __delitem__(self, key):
+        if key == Events.TIMER and self.timer is not None:
+            self.timer = None
+
+        elif key == Events.NAME or self.data is None:
+            raise KeyError(key)
+
+        else:
+            del self.data[key]
+
+    def __contains__(self, key):
+        if key == Events.NAME:
+            return True
+
+        if key == Events.TIMER and self.timer is not None:
+            return True
+
+        return self.data is not None and key in self.data
+
+    def get(self, key, default=None):
+        if key == Events.NAME:
+            return self.name
+
+        if key == Events.TIMER and self.timer is not None:
+            return self.get_timer()
+
+        if self.data is None:
+            return default
+
+        return self.data.get(key, default)
+
+    def keys(self):
+        keys = [Events.NAME]
+
+        if self.timer is not None:
+            keys.append(Events.TIMER)
+
+        if self.data:
+            keys += self.data.keys()
+
+        return keys
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __eq__(self, other):
+        if isinstance(other, Event):
+            other = other.to_dict()
+
+        return self.to_dict() == other
+
+    # Events compare by content and can be changed like the
+    #   dicts they stand in for, so they aren't hashable
+    __hash__ = None
+
+    def copy(self):
+        data = self.data
+
+        if data is not None:
+            data = data.copy()
+
+        return Event(self.name, data, self.timer)
+
+    def to_dict(self):
+        return dict(self.items())
@@ -1,31 +1,52 @@
+from os import environ
 from sys import exit
+from time import perf_counter
 
 import pygame
 
-from src.entities import Environment
+from src.entities import Environment, Layer
+from src.events import EventHandler
+from src.geometry import merge_rects
+from src.input_manager import InputManager
 from zs_globals import Settings
 
 pygame.init()
 pygame.mixer.quit()
-pygame.mixer.init(buffer=256)
+
+try:
+    pygame.mixer.init(buffer=256)
+except pygame.error:    # machines with no audio device (e.g. headless servers)
+    pass
 
 
 class Game:
     """
     The Game object is used to sync a game environment / data model with a display surface
         and update them both at a regular interval.
+    The environment is updated at a fixed timestep set by 'update_rate' (which defaults to
+        the frame_rate) independently of how often the display is drawn.
+    If 'dirty_rects' is set, only the areas of the screen where something has changed are
+        redrawn and passed to display.update() rather than redrawing the whole screen.
     """
 
-    def __init__(self, screen, frame_rate, start_env, context):
+    def __init__(self, screen, frame_rate, start_env, context, update_rate=None):
         self.environment = None
         self.screen = screen
         self.frame_rate = frame_rate
+        self.update_rate = update_rate or frame_rate
+        self.max_updates = Settings.MAX_UPDATES
         self.context = context
+        self.profiler = None
+
+        self.dirty_rects = Settings.DIRTY_RECTS
+        self.full_redraw = True
+        self.redraw_rects = []
 
         self.set_environment(start_env)
 
     '''This method is necessary to poll and clear the Pygame events queue, as well as
-    checking for QUIT events to close the program'''
+    checking for QUIT events to close the program. The keyboard / joystick state for
+    the frame is then captured once for all of the environment's controllers'''
     @staticmethod
     def poll_events():
         # PYGAME CHOKE POINT
@@ -34,32 +55,172 @@ class Game:
             if event.type == pygame.QUIT:
                 exit()
 
+        InputManager.SNAPSHOT.capture()
+
     def main(self):
         # print("GAME INITIALIZED\nmain() called")
         # PYGAME CHOKE POINT
 
         clock = pygame.time.Clock()         # clock object used to set max frame_rate
+        lag = 0
 
         while True:
+            lag = self.run_frame(lag + clock.tick(self.frame_rate) / 1000)
+
+    # runs the updates for the time that has passed ('lag') and draws
+    #   one frame, then returns the time left over for the next frame
+    def run_frame(self, lag):
+        step = 1 / self.update_rate
+        updates = 0
+
+        # the environment is updated once for each step of time that has
+        #   passed since the last frame, up to max_updates times per frame
+        while lag >= step and updates < self.max_updates:
+            self.run_phase("events", self.poll_events)
+            self.run_phase("update", self.update_environment, step)
+            lag -= step
+            updates += 1
+
+            if self.environment.transition:
+                self.handle_transition()
+
+        # if the updates are behind, the time they're behind by is
+        #   dropped so that they don't fall further behind
+        if lag >= step:
+            lag %= step
+
+        rects = self.run_phase(
+            "draw", self.draw_environment, min(lag / step, 1.0))
+
+        if self.profiler and self.profiler.overlay:
+            overlay = self.profiler.draw(self.screen)
+
+            if rects is not None:       # the overlay's area is redrawn
+                rects.append(overlay)   # on the next frame
+                self.redraw_rects.append(overlay)
+
+        self.run_phase("flip", self.update_display, rects)
+
+        if self.profiler:
+            self.profiler.end_frame()
+
+        return lag
+
+    # a FrameProfiler set here will be used to time each phase of the
+    #   main loop as well as each Layer's update methods and draw calls
+    def set_profiler(self, profiler):
+        self.profiler = profiler
+        Layer.profiler = profiler
+
+    def run_phase(self, label, method, *args):
+        if self.profiler:
+            return self.profiler.time(label, method, *args)
+
+        else:
+            return method(*args)
+
+    def run_headless(self, frames=None, budget=None):
+        """
+        Updates the environment at a fixed timestep as fast as possible, without
+        a display surface and without drawing anything. The loop stops after
+        'frames' updates or once 'budget' seconds of wall-clock time have
+        passed, whichever comes first, or when the environment exits.
+        At least one of 'frames' or 'budget' has to be set.
+        Returns the number of frames that were updated.
+        """
+        if frames is None and budget is None:
+            raise ValueError("run_headless() needs a frame count or a time budget")
+
+        dt = 1 / self.update_rate
+        start_time = perf_counter()
+        count = 0
+
+        while frames is None or count < frames:
+            if budget is not None and perf_counter() - start_time >= budget:
+                break
+
             self.poll_events()
-            self.update_environment(clock)
-            pygame.display.flip()
+            self.update_environment(dt)
+            count += 1
+
+            if self.environment.transition:
+                if "exit" in self.environment.transition:
+                    break
+
+                self.handle_transition()
+
+        return count
 
-    def update_environment(self, clock=None):
-        # print("\n\n======================")
+    # runs a single fixed timestep update, with the timestep
+    #   passed to the data model as "dt"
+    def update_environment(self, dt):
+        tracer = EventHandler.tracer
 
-        # dt value can be printed to stdout or passed to data model
-        if clock:
-            dt = clock.tick(self.frame_rate) / 1000
-            self.environment.model["dt"] = dt
-            # print(dt)
+        # an EventTracer's frame numbers count environment updates
+        if tracer:
+            tracer.start_frame()
 
-        # screen is set to black and passed to environment's main method
+        self.environment.model["dt"] = dt
+        self.environment.update()
+
+        if tracer:
+            tracer.end_frame()
+
+    # the 'alpha' value is the fraction of a timestep that has passed
+    #   since the last update and is passed to the data model so that
+    #   drawing code can interpolate between updates
+    def draw_environment(self, alpha=0):
+        self.environment.model["alpha"] = alpha
+
+        if self.dirty_rects:
+            return self.draw_dirty_rects()
+
+        # screen is set to black and passed to environment's draw method
         self.screen.fill((0, 0, 0))
-        self.environment.main(self.screen)
+        self.environment.draw(self.screen)
+
+    # redraws only the areas of the screen that have changed, by drawing
+    #   the environment with the screen clipped to each area, and
+    #   returns a list of those areas
+    def draw_dirty_rects(self):
+        # PYGAME CHOKE POINT
+
+        screen = self.screen
+        area = screen.get_rect()
+        rects = self.environment.get_dirty_rects(area) + self.redraw_rects
+        self.redraw_rects = []
+
+        if self.full_redraw:
+            self.full_redraw = False
+            rects = [area]
+
+        else:
+            rects = [r.clip(area) for r in rects]
+            rects = merge_rects([r for r in rects if r.width and r.height])
+
+        # past a certain number of rects it's faster to draw the
+        #   environment once clipped to their union
+        if len(rects) > Settings.DIRTY_RECT_LIMIT:
+            clips = [rects[0].unionall(rects[1:])]
+        else:
+            clips = rects
 
-        if self.environment.transition:
-            self.handle_transition()
+        for clip in clips:
+            screen.set_clip(clip)
+            screen.fill((0, 0, 0))
+            self.environment.draw(screen)
+        screen.set_clip(None)
+
+        return rects
+
+    @staticmethod
+    def update_display(rects=None):
+        # PYGAME CHOKE POINT
+
+        if rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects)
 
     def handle_transition(self):
         old = self.environment
@@ -77,6 +238,10 @@ class Game:
                 self.environment.return_to = old
                 old.transition = {}
 
+            # an Environment that's returned from isn't used again
+            else:
+                old.release_controllers()
+
     def set_environment(self, env):
         if not type(env) is Environment:
             env = self.context.get_environment(env)
@@ -85,10 +250,27 @@ class Game:
         #     self.context.apply_interfaces(env)
 
         self.environment = env
+        self.full_redraw = True
 
 
 def start(env, context):
     scr = pygame.display.set_mode(Settings.SCREEN_SIZE)
     fps = Settings.FRAME_RATE
 
-    return Game(scr, fps, env, context)
+    return Game(scr, fps, env, context, update_rate=Settings.UPDATE_RATE)
+
+
+def start_headless(env, context):
+    # the dummy video driver allows the event queue and keyboard
+    #   state to be polled on machines with no display
+    environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+    # pygame.init() has already started the display when this module
+    #   was imported, so it's restarted to pick up the driver
+    if pygame.display.get_init() and \
+            pygame.display.get_driver() != environ["SDL_VIDEODRIVER"]:
+        pygame.display.quit()
+    pygame.display.init()
+
+    return Game(None, Settings.FRAME_RATE, env, context,
+                update_rate=Settings.UPDATE_RATE)
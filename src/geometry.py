@@ -1,6 +1,12 @@
 import pygame
 from math import sqrt
 
+# numpy is only needed for the RectArrays batch collision class
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 
 def get_distance(p1, p2):
     x1, y1 = p1
@@ -12,23 +18,77 @@ def get_distance(p1, p2):
     return sqrt(dx**2 + dy**2)
 
 
+# returns True if two (x, y, w, h) boxes overlap. Boxes that
+#   only share an edge don't overlap
+def boxes_overlap(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+
+    return ax < bx + bw and bx < ax + aw and ay < by + bh and by < ay + ah
+
+
+# returns True if any part of an (x, y, w, h) box is within a
+#   radius of a point
+def box_in_radius(box, position, radius):
+    x, y, w, h = box
+    px, py = position
+
+    # the nearest point of the box to the position
+    nx = min(max(px, x), x + w)
+    ny = min(max(py, y), y + h)
+
+    return (nx - px) ** 2 + (ny - py) ** 2 <= radius ** 2
+
+
+def merge_rects(rects):
+    """
+    Returns a list of pygame Rect objects where any overlapping rects
+    from the argument have been merged into their union
+    """
+    merged = []
+
+    for rect in rects:
+        rect = rect.copy()
+        i = rect.collidelist(merged)
+
+        # each union can overlap more of the merged rects
+        while i != -1:
+            rect.union_ip(merged.pop(i))
+            i = rect.collidelist(merged)
+
+        merged.append(rect)
+
+    return merged
+
+
 class Rect:
+    """
+    A Rect stores its position and size as x, y, w and h fields and does its
+    own collision math, so moving or checking a Rect doesn't create any
+    pygame objects. The size and position properties get / set the fields
+    as tuples.
+    The pygame_rect view is only built when a pygame.Rect is needed (e.g. for
+    drawing or subsurfaces) and is reused until the Rect changes, so it should
+    be copied rather than modified in place.
+    """
+    __slots__ = "x", "y", "w", "h", "_view", "_view_box"
+
     RECT_COLOR = 0, 255, 125
 
     def __init__(self, size, position):
-        self.size = size
-        self.position = position
+        self.w, self.h = size
+        self.x, self.y = position
+
+        self._view = None
+        self._view_box = None
 
     def __repr__(self):
         return "Rect: {}, {}".format(self.size, self.position)
 
     def draw(self, screen, offset=(0, 0)):
-        r = self.pygame_rect
+        r = self.pygame_rect.move(offset)
         color = self.RECT_COLOR
 
-        r.x += offset[0]
-        r.y += offset[1]
-
         pygame.draw.rect(
             screen, color,
             r, 1
@@ -36,25 +96,45 @@ class Rect:
 
     def move(self, value):
         dx, dy = value
-        x, y = self.position
-        x += dx
-        y += dy
-        self.position = x, y
+        self.x += dx
+        self.y += dy
+
+    @property
+    def size(self):
+        return self.w, self.h
+
+    @size.setter
+    def size(self, value):
+        self.w, self.h = value
+
+    @property
+    def position(self):
+        return self.x, self.y
+
+    @position.setter
+    def position(self, value):
+        self.x, self.y = value
 
     @property
     def pygame_rect(self):
-        r = pygame.Rect(
-            self.position, self.size
-        )
+        box = self.x, self.y, self.w, self.h
+
+        if box != self._view_box:
+            if self._view is None:
+                self._view = pygame.Rect(box)
+            else:
+                self._view.update(box)
+
+            self._view_box = box
 
-        return r
+        return self._view
 
     @property
     def clip(self):
         return self.pygame_rect.clip
 
     def copy(self):
-        return self.get_from_pygame_rect(self.pygame_rect.copy())
+        return Rect((self.w, self.h), (self.x, self.y))
 
     @staticmethod
     def get_from_pygame_rect(rect):
@@ -62,121 +142,147 @@ class Rect:
 
     @property
     def width(self):
-        return self.size[0]
+        return self.w
 
     @width.setter
     def width(self, value):
-        self.size = value, self.size[1]
+        self.w = value
 
     @property
     def height(self):
-        return self.size[1]
+        return self.h
 
     @height.setter
     def height(self, value):
-        self.size = self.size[0], value
+        self.h = value
 
     @property
     def right(self):
-        return self.position[0] + self.width
+        return self.x + self.w
 
     @right.setter
     def right(self, value):
-        dx = value - self.right
-        self.move((dx, 0))
+        self.x = value - self.w
 
     @property
     def left(self):
-        return self.position[0]
+        return self.x
 
     @left.setter
     def left(self, value):
-        dx = value - self.left
-        self.move((dx, 0))
+        self.x = value
 
     @property
     def top(self):
-        return self.position[1]
+        return self.y
 
     @top.setter
     def top(self, value):
-        dy = value - self.top
-        self.move((0, dy))
+        self.y = value
 
     @property
     def bottom(self):
-        return self.top + self.height
+        return self.y + self.h
 
     @bottom.setter
     def bottom(self, value):
-        dy = value - self.bottom
-        self.move((0, dy))
+        self.y = value - self.h
 
     @property
     def midleft(self):
-        return self.left, self.top + (self.height / 2)
+        return self.x, self.y + (self.h / 2)
 
     @property
     def topleft(self):
-        return self.left, self.top
+        return self.x, self.y
 
     @property
     def midtop(self):
-        return self.left + (self.width / 2), self.top
+        return self.x + (self.w / 2), self.y
 
     @property
     def topright(self):
-        return self.right, self.top
+        return self.x + self.w, self.y
 
     @property
     def midright(self):
-        return self.right, self.top + (self.height / 2)
+        return self.x + self.w, self.y + (self.h / 2)
 
     @property
     def bottomleft(self):
-        return self.left, self.bottom
+        return self.x, self.y + self.h
 
     @property
     def midbottom(self):
-        return self.left + (self.width / 2), self.bottom
+        return self.x + (self.w / 2), self.y + self.h
 
     @property
     def bottomright(self):
-        return self.right, self.bottom
+        return self.x + self.w, self.y + self.h
 
     @property
     def center(self):
-        return (self.left + (self.width / 2),
-                self.top + (self.height / 2))
+        return (self.x + (self.w / 2),
+                self.y + (self.h / 2))
 
     @center.setter
     def center(self, value):
         x, y = value
-        x -= self.width / 2
-        y -= self.height / 2
-
-        self.position = x, y
+        self.x = x - (self.w / 2)
+        self.y = y - (self.h / 2)
 
+    # returns the center of the area where two rects overlap, or False.
+    #   Positions and sizes are truncated to integers and clipped the
+    #   same way as pygame.Rect.clip()
     def get_rect_collision(self, other):
-        try:
-            collision = self.clip(other.pygame_rect)
+        ax, bx = int(self.x), int(other.x)
+        ar, br = ax + int(self.w), bx + int(other.w)
+
+        if bx <= ax < br:
+            x = ax
+        elif ax <= bx < ar:
+            x = bx
+        else:
+            return False
 
-            if not (collision.width or collision.height):
-                return False
+        if bx < ar <= br:
+            w = ar - x
+        elif ax < br <= ar:
+            w = br - x
+        else:
+            return False
 
-            else:
-                return collision.center
+        ay, by = int(self.y), int(other.y)
+        ab, bb = ay + int(self.h), by + int(other.h)
+
+        if by <= ay < bb:
+            y = ay
+        elif ay <= by < ab:
+            y = by
+        else:
+            return False
+
+        if by < ab <= bb:
+            h = ab - y
+        elif ay < bb <= ab:
+            h = bb - y
+        else:
+            return False
 
-        except ValueError:
+        if not (w or h):
             return False
 
+        else:
+            return x + (w // 2), y + (h // 2)
+
     def get_circle_collision(self, radius, position):
+        x, y, w, h = self.x, self.y, self.w, self.h
         points = [
-            self.center,
-            self.topleft,
-            self.topright,
-            self.bottomleft,
-            self.bottomright
+            (x + (w / 2), y + (h / 2)),
+            (x, y),
+            (x + w, y),
+            (x, y + h),
+            (x + w, y + h)
         ]
 
         for point in points:
@@ -184,3 +290,362 @@ class Rect:
 
             if d <= radius:
                 return point
+
+
+class SpatialGrid:
+    """
+    A SpatialGrid is a uniform grid spatial index. Each item is added with an
+    axis-aligned bounding box and recorded in every square cell of the grid
+    that the box touches, so that the items near a given area can be found
+    by only looking at the cells that area covers.
+    Moving an item only updates the grid's cells if it moves into a different
+    set of cells. The grid also remembers the order items were first added so
+    that query results can be sorted back into that order.
+    The box of each item is kept as an (x, y, w, h) tuple and the get_*
+    methods use them to narrow the candidates from the cells down to the
+    items that actually intersect a box / circle / each other.
+    """
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.items = {}
+        self.boxes = {}
+        self.order = {}
+        self.count = 0
+
+    def __repr__(self):
+        c = self.__class__.__name__
+        n = len(self.items)
+        m = len(self.cells)
+
+        return "{}: {} items in {} cells".format(c, n, m)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, item):
+        return item in self.items
+
+    # returns the range of cells (i0, j0, i1, j1) covered by a box
+    def get_cell_range(self, x, y, w, h):
+        cs = self.cell_size
+
+        return (int(x // cs), int(y // cs),
+                int((x + w) // cs), int((y + h) // cs))
+
+    def add(self, item, x, y, w, h):
+        if item in self.items:
+            self.move(item, x, y, w, h)
+            return
+
+        cell_range = self.get_cell_range(x, y, w, h)
+        self.items[item] = cell_range
+        self.boxes[item] = x, y, w, h
+        self.order[item] = self.count
+        self.count += 1
+
+        i0, j0, i1, j1 = cell_range
+        cells = self.cells
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                cell = cells.get((i, j))
+
+                if cell is None:
+                    cells[(i, j)] = {item}
+                else:
+                    cell.add(item)
+
+    def remove(self, item):
+        i0, j0, i1, j1 = self.items.pop(item)
+        self.boxes.pop(item)
+        self.order.pop(item)
+
+        cells = self.cells
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                cell = cells[(i, j)]
+                cell.discard(item)
+
+                if not cell:
+                    del cells[(i, j)]
+
+    def move(self, item, x, y, w, h):
+        if self.items[item] != self.get_cell_range(x, y, w, h):
+            order = self.order[item]
+            self.remove(item)
+            self.add(item, x, y, w, h)
+            self.order[item] = order
+
+        else:
+            self.boxes[item] = x, y, w, h
+
+    # returns the set of items in any cell covered by a box. These are
+    #   candidates that may not actually intersect the box
+    def query_rect(self, x, y, w, h):
+        i0, j0, i1, j1 = self.get_cell_range(x, y, w, h)
+        found = set()
+        cells = self.cells
+
+        # when the box covers more cells than the grid has in use
+        #   it's faster to check every cell that's in use
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(cells):
+            for (i, j), cell in cells.items():
+                if i0 <= i <= i1 and j0 <= j <= j1:
+                    found |= cell
+
+        else:
+            for i in range(i0, i1 + 1):
+                for j in range(j0, j1 + 1):
+                    cell = cells.get((i, j))
+
+                    if cell:
+                        found |= cell
+
+        return found
+
+    def sort_items(self, items):
+        return sorted(items, key=self.order.__getitem__)
+
+    # returns a list of the items whose boxes overlap a box
+    def get_rect_items(self, x, y, w, h):
+        box = x, y, w, h
+        boxes = self.boxes
+
+        return self.sort_items(
+            [i for i in self.query_rect(x, y, w, h) if boxes_overlap(box, boxes[i])]
+        )
+
+    # returns a list of the items whose boxes are at least partly
+    #   within a radius of a point
+    def get_radius_items(self, position, radius):
+        x, y = position
+        boxes = self.boxes
+        candidates = self.query_rect(x - radius, y - radius, radius * 2, radius * 2)
+
+        return self.sort_items(
+            [i for i in candidates if box_in_radius(boxes[i], position, radius)]
+        )
+
+    # returns a list of (a, b) pairs for each item 'a' in this grid whose
+    #   box overlaps the box of an item 'b' in another grid. If the other
+    #   grid is this grid each pair of items is only returned once
+    def get_pairs(self, other=None):
+        if other is None:
+            other = self
+
+        pairs = []
+        boxes, other_boxes, order = self.boxes, other.boxes, other.order
+
+        for a in self.sort_items(self.items):
+            box = boxes[a]
+            found = other.query_rect(*box)
+
+            if other is self:
+                n = order[a]
+                found = [b for b in found if order[b] > n]
+
+            for b in other.sort_items(found):
+                if boxes_overlap(box, other_boxes[b]):
+                    pairs.append((a, b))
+
+        return pairs
+
+
+class RectArrays:
+    """
+    RectArrays keeps the x, y, width and height of any number of items in
+    separate NumPy arrays so that collisions for a whole set of rects can be
+    found in a few vectorized operations rather than a Python call per pair.
+    Each item is given a row index when it is first set, and removing an item
+    moves the last row into its place.
+    The collision methods return an array of index pairs and an array of
+    contact points that match the output of Rect.get_rect_collision() and
+    Rect.get_circle_collision() for each colliding pair. Pairs are checked in
+    blocks of rows so that memory use stays bounded for large sets.
+    """
+    BLOCK_SIZE = 2 ** 18
+
+    def __init__(self, capacity=64):
+        if np is None:
+            raise ImportError("RectArrays requires numpy")
+
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.w = np.zeros(capacity)
+        self.h = np.zeros(capacity)
+
+        self.items = []
+        self.index = {}
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, item):
+        return item in self.index
+
+    def __repr__(self):
+        c = self.__class__.__name__
+        n = len(self.items)
+
+        return "{} ({} items)".format(c, n)
+
+    def grow(self):
+        for name in ("x", "y", "w", "h"):
+            a = getattr(self, name)
+            setattr(self, name, np.concatenate((a, np.zeros(len(a)))))
+
+    def set(self, item, x, y, w, h):
+        i = self.index.get(item)
+
+        if i is None:
+            i = len(self.items)
+
+            if i == len(self.x):
+                self.grow()
+
+            self.items.append(item)
+            self.index[item] = i
+
+        self.x[i] = x
+        self.y[i] = y
+        self.w[i] = w
+        self.h[i] = h
+
+    def remove(self, item):
+        i = self.index.pop(item)
+        last = self.items.pop()
+
+        if last is not item:
+            j = len(self.items)
+            self.items[i] = last
+            self.index[last] = i
+
+            for a in (self.x, self.y, self.w, self.h):
+                a[i] = a[j]
+
+    def get_items(self, indexes):
+        items = self.items
+
+        return [items[i] for i in indexes]
+
+    # returns the edges of each rect as pygame.Rect would store them,
+    #   with the position and size truncated to integers
+    def get_int_edges(self):
+        n = len(self.items)
+        x = np.trunc(self.x[:n]).astype(np.int64)
+        y = np.trunc(self.y[:n]).astype(np.int64)
+        w = np.trunc(self.w[:n]).astype(np.int64)
+        h = np.trunc(self.h[:n]).astype(np.int64)
+
+        return x, y, x + w, y + h
+
+    # clips the edges of two sets of rects along one axis the same way
+    #   pygame.Rect.clip() does, so that rects with a width / height of
+    #   zero give the same result. Returns a mask of the rects that
+    #   intersect on this axis and the clipped start and end edges
+    @staticmethod
+    def clip_edges(start_a, end_a, start_b, end_b):
+        a_first = (start_a >= start_b) & (start_a < end_b)
+        b_first = (start_b >= start_a) & (start_b < end_a)
+        a_last = (end_a > start_b) & (end_a <= end_b)
+        b_last = (end_b > start_a) & (end_b <= end_a)
+
+        hit = (a_first | b_first) & (a_last | b_last)
+        start = np.where(a_first, start_a, start_b)
+        end = np.where(a_last, end_a, end_b)
+
+        return hit, start, end
+
+    def get_rect_collisions(self, other=None):
+        """
+        Returns an (n, 2) array of (i, j) index pairs for each rect 'i' of
+        these RectArrays that collides with a rect 'j' of another set, and
+        an (n, 2) array of the contact point (the center of the clipped area)
+        for each pair. With no other set each pair of these rects is
+        only returned once, with i < j.
+        """
+        same = other is None or other is self
+        if same:
+            other = self
+
+        left_a, top_a, right_a, bottom_a = self.get_int_edges()
+        left_b, top_b, right_b, bottom_b = other.get_int_edges()
+        n, m = len(left_a), len(left_b)
+
+        pairs, points = [], []
+        rows = max(1, self.BLOCK_SIZE // max(m, 1))
+
+        for start in range(0, n, rows):
+            end = min(start + rows, n)
+            s = slice(start, end)
+
+            # only rects after the start of the block can be paired
+            #   with a rect in the block when checking against itself
+            offset = start if same else 0
+            c = slice(offset, m)
+
+            hit, left, right = self.clip_edges(
+                left_a[s, None], right_a[s, None], left_b[None, c], right_b[None, c])
+            y_hit, top, bottom = self.clip_edges(
+                top_a[s, None], bottom_a[s, None], top_b[None, c], bottom_b[None, c])
+
+            hit &= y_hit & ((left != right) | (top != bottom))
+            if same:
+                hit &= np.arange(start, end)[:, None] < np.arange(offset, m)[None, :]
+
+            i, j = np.nonzero(hit)
+            l, r = left[i, j], right[i, j]
+            t, b = top[i, j], bottom[i, j]
+
+            pairs.append(np.stack((i + start, j + offset), axis=1))
+            points.append(np.stack((l + (r - l) // 2, t + (b - t) // 2), axis=1))
+
+        return self.join_output(pairs, points, np.int64)
+
+    def get_circle_collisions(self, radii, positions):
+        """
+        Returns an (n, 2) array of (k, i) index pairs for each circle 'k'
+        that collides with a rect 'i', and an (n, 2) array of the point of
+        the rect for each pair. Like Rect.get_circle_collision() the point
+        is the first of the center, top left, top right, bottom left and
+        bottom right points of the rect that is within the circle's radius.
+        """
+        positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+        radii = np.broadcast_to(
+            np.asarray(radii, dtype=float), (len(positions),))
+
+        n = len(self.items)
+        x, y = self.x[:n], self.y[:n]
+        w, h = self.w[:n], self.h[:n]
+        check_x = np.stack((x + w / 2, x, x + w, x, x + w))
+        check_y = np.stack((y + h / 2, y, y, y + h, y + h))
+
+        pairs, points = [], []
+        rows = max(1, self.BLOCK_SIZE // max(n * 5, 1))
+
+        for start in range(0, len(positions), rows):
+            s = slice(start, start + rows)
+            cx = positions[s, 0, None, None]
+            cy = positions[s, 1, None, None]
+            r = radii[s, None, None]
+
+            # (circles, points, rects)
+            dx = check_x[None] - cx
+            dy = check_y[None] - cy
+            inside = np.sqrt(dx ** 2 + dy ** 2) <= r
+            hit = inside.any(axis=1)
+
+            k, i = np.nonzero(hit)
+            first = inside[k, :, i].argmax(axis=1)
+
+            pairs.append(np.stack((k + start, i), axis=1))
+            points.append(np.stack((check_x[first, i], check_y[first, i]), axis=1))
+
+        return self.join_output(pairs, points, float)
+
+    @staticmethod
+    def join_output(pairs, points, dtype):
+        if not pairs:
+            return np.zeros((0, 2), np.int64), np.zeros((0, 2), dtype)
+
+        return np.concatenate(pairs), np.concatenate(points)
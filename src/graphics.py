@@ -1,4 +1,4 @@
-from pygame import SRCALPHA, draw, transform
+from pygame import SRCALPHA, display, draw, transform
 from pygame.rect import Rect
 from pygame.surface import Surface
 
@@ -23,6 +23,7 @@ class Graphics:
     def reset_image(self):
         if self.entity.spawned:
             self.image = self.make_image()
+            self.entity.dirty = True
             if self.image:
                 self.entity.set_size(
                     *self.image.get_size()
@@ -360,7 +361,9 @@ class ContainerGraphics(Graphics):
     def make_color_image(size, color):
         # PYGaME CHOKE POINT
 
-        s = Surface(size).convert()
+        s = Surface(size)
+        if display.get_surface():   # convert() needs a video mode to be set,
+            s = s.convert()         # which there isn't in headless mode
         if color:
             s.fill(color)
         else:
@@ -24,7 +24,7 @@ class ButtonMappingKey:
         return ["button_map_key", self.get_key_name()]
 
     def is_pressed(self):
-        return pygame.key.get_pressed()[self.id_num]
+        return InputManager.SNAPSHOT.get_key(self.id_num)
 
     def get_key_name(self):
         return pygame.key.name(self.id_num)
@@ -42,6 +42,7 @@ class ButtonMappingKey:
 class ButtonMappingButton(ButtonMappingKey):
     def __init__(self, id_num, joy_device_name, joy_id):
         super(ButtonMappingButton, self).__init__(id_num)
+        self.joy_id = joy_id
         self.joy_device = InputManager.INPUT_DEVICES[joy_id]
 
         assert self.joy_device.get_name() == joy_device_name
@@ -52,7 +53,7 @@ class ButtonMappingButton(ButtonMappingKey):
                 self.joy_device.get_id()]
 
     def is_pressed(self):
-        return self.joy_device.get_button(self.id_num)
+        return InputManager.SNAPSHOT.get_button(self.joy_id, self.id_num)
 
 
 class ButtonMappingAxis(ButtonMappingButton):
@@ -70,7 +71,7 @@ class ButtonMappingAxis(ButtonMappingButton):
                 self.sign]
 
     def is_pressed(self):
-        axis = self.joy_device.get_axis(self.id_num)
+        axis = InputManager.SNAPSHOT.get_axis(self.joy_id, self.id_num)
 
         return axis * self.sign > self.DEAD_ZONE
 
@@ -96,7 +97,7 @@ class ButtonMappingHat(ButtonMappingButton):
                 self.axis]
 
     def is_pressed(self):
-        hat = self.joy_device.get_hat(self.id_num)
+        hat = InputManager.SNAPSHOT.get_hat(self.joy_id, self.id_num)
         if self.axis != -1:
             return hat[self.axis] == self.position
         else:
@@ -107,6 +108,7 @@ class AxisMapping:
     def __init__(self, id_num, joy_device_name, joy_id, sign):
         self.id_num = id_num
         self.sign = sign
+        self.joy_id = joy_id
         self.joy_device = InputManager.INPUT_DEVICES[joy_id]
 
         assert self.joy_device.get_name() == joy_device_name
@@ -120,7 +122,74 @@ class AxisMapping:
     def get_value(self):
         sign = self.sign
 
-        return self.joy_device.get_axis(self.id_num) * sign
+        return InputManager.SNAPSHOT.get_axis(self.joy_id, self.id_num) * sign
+
+
+class InputSnapshot:
+    """
+    An InputSnapshot holds the keyboard and joystick state for a single
+    frame so that every mapping object reads from the same data instead
+    of polling Pygame separately. capture() should be called once per
+    frame after the Pygame event queue has been pumped and before any
+    Controller objects are updated. release() ends the frame, and is called
+    once at the end of each Environment update so that the next read
+    captures the current state.
+    """
+    def __init__(self, devices):
+        self.devices = devices
+        self.captured = False
+
+        self.keys = ()
+        self.axes = []
+        self.buttons = []
+        self.hats = []
+
+    def capture(self):
+        # PYGAME CHOKE POINT
+
+        self.keys = pygame.key.get_pressed()
+        self.axes = []
+        self.buttons = []
+        self.hats = []
+
+        for joy in self.devices:
+            self.axes.append(
+                [joy.get_axis(i) for i in range(joy.get_numaxes())])
+            self.buttons.append(
+                [joy.get_button(i) for i in range(joy.get_numbuttons())])
+            self.hats.append(
+                [joy.get_hat(i) for i in range(joy.get_numhats())])
+
+        self.captured = True
+
+    def release(self):
+        self.captured = False
+
+    # the first read will capture the input state if capture()
+    # hasn't been called yet
+    def get_key(self, id_num):
+        if not self.captured:
+            self.capture()
+
+        return self.keys[id_num]
+
+    def get_button(self, joy_id, id_num):
+        if not self.captured:
+            self.capture()
+
+        return self.buttons[joy_id][id_num]
+
+    def get_axis(self, joy_id, id_num):
+        if not self.captured:
+            self.capture()
+
+        return self.axes[joy_id][id_num]
+
+    def get_hat(self, joy_id, id_num):
+        if not self.captured:
+            self.capture()
+
+        return self.hats[joy_id][id_num]
 
 
 class InputManager:
@@ -134,6 +203,9 @@ class InputManager:
         joy.init()
         INPUT_DEVICES.append(joy)
 
+    # shared input state read by all mapping objects
+    SNAPSHOT = InputSnapshot(INPUT_DEVICES)
+
     def check_axes(self):
         axes = []
         for device in self.INPUT_DEVICES:
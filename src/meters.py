@@ -1,3 +1,12 @@
+from math import ceil
+
+# numpy is only needed for the MeterBank class
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
 class Meter:
     """
     Meter objects have a minimum, value, and maximum attribute (int or float)
@@ -13,7 +22,12 @@ class Meter:
     Meter is designed to make composed attributes and to allow for flexible
     dynamic use so if you want to ensure edge case errors, that logic will
     need to be implemented by the relevant Entity in the game engine.
+
+    The Meter's own methods read and write the underlying _minimum, _value
+    and _maximum slots directly rather than going through the properties.
     """
+    __slots__ = "name", "_value", "_minimum", "_maximum"
+
     # Meter(name, value) ->                     minimum = 0, value = value, maximum = value
     # Meter(name, value, maximum) ->            minimum = 0, value = value, maximum = maximum
     # Meter(name, minimum, value, maximum) ->   minimum = 0, value = value, maximum = maximum
@@ -62,8 +76,8 @@ class Meter:
 
     @minimum.setter
     def minimum(self, value):
-        if value > self.maximum:
-            value = self.maximum
+        if value > self._maximum:
+            value = self._maximum
 
         self._minimum = value
         self.normalize()
@@ -74,8 +88,8 @@ class Meter:
 
     @maximum.setter
     def maximum(self, value):
-        if value < self.minimum:
-            value = self.minimum
+        if value < self._minimum:
+            value = self._minimum
 
         self._maximum = value
         self.normalize()
@@ -84,12 +98,12 @@ class Meter:
     def normalize(self):        # sets value to be inside min / max range
         in_bounds = True
 
-        if self._value > self.maximum:
-            self._value = self.maximum
+        if self._value > self._maximum:
+            self._value = self._maximum
             in_bounds = False
 
-        if self._value < self.minimum:
-            self._value = self.minimum
+        if self._value < self._minimum:
+            self._value = self._minimum
             in_bounds = False
 
         # this return value is mainly for debugging
@@ -97,18 +111,18 @@ class Meter:
         return in_bounds
 
     def refill(self):
-        self.value = self.maximum
+        self._value = self._maximum
 
-        return self.value
+        return self._value
 
     def reset(self):
-        self.value = self.minimum
+        self._value = self._minimum
 
-        return self.value
+        return self._value
 
     def get_ratio(self):
         span = self.get_span()
-        value_span = self.value - self.minimum
+        value_span = self._value - self._minimum
 
         if span != 0:
             return value_span / span
@@ -120,46 +134,79 @@ class Meter:
             raise ArithmeticError("meter object has span of 0")
 
     def get_span(self):
-        return self.maximum - self.minimum
+        return self._maximum - self._minimum
 
     def is_full(self):
-        return self.value == self.maximum
+        return self._value == self._maximum
 
     def is_empty(self):
-        return self.value == self.minimum
+        return self._value == self._minimum
 
     def next(self):
-        if self.is_full():
+        if self._value == self._maximum:
             self.reset()
         else:
-            self.value += 1
-            if self.value > self.maximum:
-                dv = self.value - self.maximum
-                self.value = dv
+            value = self._value + 1
+            if value > self._maximum:
+                value = self._maximum
+            self._value = value
 
-        return self.value
+        return self._value
 
     def prev(self):
-        if self.is_empty():
+        if self._value == self._minimum:
             self.refill()
         else:
-            self.value -= 1
-            if self.value < self.minimum:
-                dv = self.value - self.minimum
-                self.value = self.maximum - dv
+            value = self._value - 1
+            if value < self._minimum:
+                value = self._minimum
+            self._value = value
 
-        return self.value
+        return self._value
 
+    # shifting gives the same result as calling next() / prev() once
+    #   for each step, but the full cycles from the minimum to the
+    #   maximum are skipped with modular arithmetic
     def shift(self, val):
         dv = abs(val) % (self.get_span() + 1)
-        if val > 0:
-            for x in range(dv):
-                self.next()
-        if val < 0:
-            for x in range(dv):
-                self.prev()
+        if val > 0 and dv:
+            self.shift_up(dv)
+        if val < 0 and dv:
+            self.shift_down(dv)
+
+        return self._value
+
+    def shift_up(self, steps):
+        value, maximum = self._value, self._maximum
+        to_full = ceil(maximum - value)
+
+        if steps <= to_full:
+            self._value = min(value + steps, maximum)
+
+        else:
+            # next() calls reset() once the meter is full
+            steps -= to_full + 1
+            self._value = maximum
+            value = self.reset()
+
+            if value != maximum:
+                steps %= ceil(maximum - value) + 1
+                self._value = min(value + steps, maximum)
+
+    def shift_down(self, steps):
+        value, minimum = self._value, self._minimum
+        to_empty = ceil(value - minimum)
 
-        return self.value
+        if steps <= to_empty:
+            self._value = max(value - steps, minimum)
+
+        else:
+            # prev() calls refill() once the meter is empty
+            steps -= to_empty + 1
+            maximum = self.refill()
+
+            steps %= ceil(maximum - minimum) + 1
+            self._value = max(maximum - steps, minimum)
 
 
 class Timer(Meter):
@@ -170,16 +217,34 @@ class Timer(Meter):
     Timer's value reaches 0.
     The temp flag determines if the timer will be removed by the Clock
     object that calls it's tick() method.
+    Assigned on_tick / on_switch_off callbacks are kept in slots, and
+    tick() updates the '_count' slot directly, only calling the callbacks
+    that have been set.
+    While the Timer is on a Clock's timer wheel it isn't ticked, so its
+    '_clock' slot is set and the value is worked out from the frame the
+    Timer is due on whenever it's read. Assigning to the value, minimum or
+    on_tick() takes the Timer off of the wheel and schedules it again.
     """
+    __slots__ = "temp", "_on_tick", "_on_switch_off", "_count", "_clock"
+
     def __init__(self, name, duration, temp=True,
                  on_tick=None, on_switch_off=None):
         if duration <= 0:
             raise ValueError("bad duration", 0)
+
+        self._clock = None
         super(Timer, self).__init__(name, duration)
 
-        self.is_off = self.is_empty
-        self.reset = self.refill
         self.temp = temp
+        self._on_tick = None
+        self._on_switch_off = None
+
+        # subclasses can define on_tick() / on_switch_off() methods
+        cls = type(self)
+        if cls.on_tick is not Timer.on_tick:
+            self._on_tick = self.on_tick
+        if cls.on_switch_off is not Timer.on_switch_off:
+            self._on_switch_off = self.on_switch_off
 
         if on_tick:
             self.on_tick = on_tick
@@ -194,8 +259,60 @@ class Timer(Meter):
 
         return "Timer: {} {}/{}".format(n, v, m)
 
+    # is_off(), is_on() and refill() use the '_count' slot directly
+    #   unless the Timer is on a timer wheel
+    def refill(self):
+        if self._clock is None:
+            self._count = self._maximum
+        else:
+            self._value = self._maximum
+
+        return self._count
+
+    reset = refill
+
+    @property
+    def _value(self):
+        if self._clock is not None:
+            self._clock.update_value(self)
+
+        return self._count
+
+    @_value.setter
+    def _value(self, value):
+        clock = self._clock
+
+        if clock is None:
+            self._count = value
+
+        else:
+            clock.take_off_wheel(self)
+            self._count = value
+            clock.start_timer(self)
+
+    @Meter.minimum.setter
+    def minimum(self, value):
+        clock = self._clock
+
+        if clock is None:
+            Meter.minimum.fset(self, value)
+
+        else:
+            clock.take_off_wheel(self)
+            Meter.minimum.fset(self, value)
+            clock.start_timer(self)
+
+    def is_off(self):
+        if self._clock is not None:
+            self._clock.update_value(self)
+
+        return self._count == self._minimum
+
     def is_on(self):
-        return not self.is_off()
+        if self._clock is not None:
+            self._clock.update_value(self)
+
+        return self._count != self._minimum
 
     def get_ratio(self):
         r = super(Timer, self).get_ratio()
@@ -203,45 +320,101 @@ class Timer(Meter):
         return 1 - r    # r should increase from 0 to 1 as the timer ticks
 
     def tick(self):
-        before = self.is_on()
+        minimum = self._minimum
+        before = self._count != minimum
 
-        self.value -= 1
-        self.on_tick()
+        value = self._count - 1
+        if value > self._maximum:
+            value = self._maximum
+        if value < minimum:
+            value = minimum
+        self._count = value
 
-        after = self.is_off()
-        switch_off = before and after
+        if self._on_tick is not None:
+            self._on_tick()
 
-        if switch_off:
-            self.on_switch_off()
+        switch_off = before and self._count == self._minimum
+
+        if switch_off and self._on_switch_off is not None:
+            self._on_switch_off()
 
         return switch_off
 
+    @property
     def on_tick(self):
-        pass
+        return self._on_tick or do_nothing
+
+    @on_tick.setter
+    def on_tick(self, value):
+        self._on_tick = value
+
+        # a Timer with an on_tick() method has to be ticked every frame
+        if self._clock is not None:
+            self._clock.reschedule(self)
 
+    @property
     def on_switch_off(self):
-        pass
+        return self._on_switch_off or do_nothing
+
+    @on_switch_off.setter
+    def on_switch_off(self, value):
+        self._on_switch_off = value
+
+
+def do_nothing():
+    pass
 
 
 class Clock:
     """
-    A Clock object simply contains a list of timers and calls
-    tick() on each once per frame (assuming it's tick() method
+    A Clock object contains a set of timers and advances each of them by one
+    frame every time its tick() method is called (assuming it's tick() method
     is called once per frame).
-    A 'queue' and 'to_remove' list are used to create a one frame
-    buffer between add_timers() and remove_timer() calls. This helps
-    avoid some bugs that would break the for loop in tick() if another
-    part of the stack calls those methods before the tick() method has
-    fully executed.
+    Timers with an on_tick() method (or their own tick() method) are ticked
+    every frame. Every other timer only needs to do something on the frame it
+    switches off, so those timers are kept in a hierarchical timer wheel: each
+    level is a ring of slots that covers 64 times as many frames as the level
+    below it, and a timer goes into the slot for the frame it's due on.
+    Each tick only visits the slot for the current frame, and a higher level
+    slot is only moved down a level ("cascaded") once every 64 frames of the
+    level below it, so timers that aren't due cost nothing. Adding or
+    removing a timer is O(1).
+    Timers on the wheel don't have their value decremented each frame.
+    Instead their value is worked out from the frame they're due on when
+    it's read, and they're scheduled again if their value, minimum or
+    on_tick() method are changed.
+    A 'queue' list is used to create a one frame buffer before added timers
+    start ticking. This helps avoid some bugs that would break the tick()
+    loop if another part of the stack adds timers before the tick() method
+    has fully executed.
+    Calls that only need to happen once on the next tick (like a Timer
+    with a duration of 1 and an on_tick() method) can be added with
+    queue_call() instead, which skips the Timer object entirely. Queued
+    calls share the 'queue' list with added timers, so they're made in
+    the same order as a Timer added at that point would be ticked, and
+    are named so that remove_timer() cancels them the same way it
+    removes timers.
     Timers with the temp flag set are removed when their value reaches 0
     but are reset on the frame their value reaches 0 if the flag is not
     set.
     """
+    WHEEL_BITS = 6
+    WHEEL_LEVELS = 4
+
     def __init__(self, name, timers=None):
         self.name = name
-        self.timers = []
-        self.queue = []
-        self.to_remove = []
+        self.queue = []         # timers and [name, method, args] calls
+        self.calling = []       # the queued calls of the current tick
+        self.time = 0
+
+        # dicts are used as ordered sets so that timers can be
+        #   removed in O(1) but still tick in the order they're added
+        self.ticking = {}
+        self.wheel = None       # made when the first timer is added to it
+
+        self.slots = {}         # wheel timer: wheel slot
+        self.schedule = {}      # wheel timer: (due frame, start frame, start value)
+        self.names = {}         # timer name: {timer: None}
 
         if timers:
             self.add_timers(*timers)
@@ -249,42 +422,401 @@ class Clock:
     def __repr__(self):
         return self.name
 
+    @property
+    def timers(self):
+        return list(self.ticking) + list(self.schedule)
+
     def add_timers(self, *timers):
         for timer in timers:
             self.queue.append(timer)
 
+    def queue_call(self, name, method, *args):
+        self.queue.append([name, method, args])
+
     def remove_timer(self, name):
-        to_remove = []
+        # remove_timer() checks the queue list for matches
+        #   as well as the active timers
+        if self.queue:
+            self.queue = [
+                t for t in self.queue
+                if (t[0] if type(t) is list else t.name) != name
+            ]
+
+        for call in self.calling:
+            if call[0] == name:
+                call[1] = None
+
+        for t in list(self.names.get(name, ())):
+            self.cancel(t)
+
+    @staticmethod
+    def ticks_every_frame(timer):
+        if timer._on_tick is not None or timer.is_off():
+            return True
+
+        return type(timer).tick is not Timer.tick
+
+    def register(self, timer):
+        name = timer.name
+        if name not in self.names:
+            self.names[name] = {}
+        self.names[name][timer] = None
+
+        self.start_timer(timer)
+
+    def start_timer(self, timer):
+        if self.ticks_every_frame(timer):
+            self.ticking[timer] = None
+        else:
+            self.add_to_wheel(timer)
 
-        for t in self.timers:
-            if t not in self.to_remove:     # remove_timer() checks the queue list
-                if t.name == name:          # for matches as well as the active
-                    to_remove.append(t)     # timers list
+    # takes a timer off of the wheel, with its value brought up to date
+    def take_off_wheel(self, timer):
+        self.update_value(timer)
+        self.slots.pop(timer).pop(timer)
+        self.schedule.pop(timer)
+        timer._clock = None
 
-        for t in self.queue:
-            if t not in self.to_remove:
-                if t.name == name:
-                    to_remove.append(t)
+    # called by a wheel timer when its callbacks are changed
+    def reschedule(self, timer):
+        self.take_off_wheel(timer)
+        self.start_timer(timer)
 
-        self.to_remove += to_remove
+    def cancel(self, timer):
+        if timer in self.schedule:
+            self.take_off_wheel(timer)
+
+        else:
+            self.ticking.pop(timer, None)
+
+        timers = self.names[timer.name]
+        timers.pop(timer)
+        if not timers:
+            self.names.pop(timer.name)
+
+    def make_wheel(self):
+        size = 2 ** self.WHEEL_BITS
+
+        return [[{} for i in range(size)] for j in range(self.WHEEL_LEVELS)]
+
+    def add_to_wheel(self, timer):
+        if self.wheel is None:
+            self.wheel = self.make_wheel()
+
+        time = self.time
+        value = timer._count
+        due = time + max(ceil(value - timer._minimum), 1)
+        self.schedule[timer] = due, time, value
+        self.place(timer, due)
+        timer._clock = self
+
+    # puts a timer in the slot of the lowest level that
+    #   can reach the frame it's due on
+    def place(self, timer, due):
+        bits = self.WHEEL_BITS
+        mask = (1 << bits) - 1
+        delta = due - self.time
+        level = 0
+
+        while delta >> (bits * (level + 1)) and level < self.WHEEL_LEVELS - 1:
+            level += 1
+
+        slot = self.wheel[level][(due >> (bits * level)) & mask]
+        slot[timer] = None
+        self.slots[timer] = slot
+
+    def update_value(self, timer):
+        due, start, value = self.schedule[timer]
+        value -= self.time - start
+
+        if value < timer._minimum:
+            value = timer._minimum
+        timer._count = value
+
+    # moves the timers of the higher level slots that have been reached
+    #   down to the lower levels
+    def cascade(self):
+        bits = self.WHEEL_BITS
+        mask = (1 << bits) - 1
+        time = self.time
+        level = 1
+
+        while level < self.WHEEL_LEVELS and not time & ((1 << (bits * level)) - 1):
+            i = (time >> (bits * level)) & mask
+            slot = self.wheel[level][i]
+            self.wheel[level][i] = {}
+
+            for timer in slot:
+                self.place(timer, self.schedule[timer][0])
+
+            level += 1
+
+    def switch_off(self, timer):
+        self.slots.pop(timer)
+        self.schedule.pop(timer)
+        timer._clock = None
+
+        timer._count = timer._minimum
+        timer.on_switch_off()
+
+        # the timer may have been removed by its own on_switch_off()
+        if timer in self.names.get(timer.name, ()):
+            if not timer.temp:
+                timer.reset()
+                self.start_timer(timer)
+            else:
+                self.cancel(timer)
 
     def tick(self):
-        for t in self.queue:                # add queue timers to active timers list
-            if t not in self.to_remove:     # unless that timer is set to be removed
-                self.timers.append(t)
+        if not (self.queue or self.ticking or self.schedule):
+            return
 
-        self.queue = []
-        tr = self.to_remove
-        timers = [t for t in self.timers if t not in tr]
+        ticking = self.ticking
+        timers = list(ticking)
 
-        for t in timers:
-            t.tick()
+        # queued calls are made between the newly added timers, in
+        #   the order they were queued
+        if self.queue:
+            calling = self.calling
+
+            for t in self.queue:
+                if type(t) is list:
+                    calling.append(t)
+                    timers.append(t)
 
-            if t.is_off():              # timers without the temp flag set to True
-                if not t.temp:          # will be reset when their value reaches 0
-                    t.reset()
                 else:
-                    self.to_remove.append(t)
+                    self.register(t)        # add queue timers to active timers
+
+                    if t in ticking:
+                        timers.append(t)
+            self.queue = []
+
+        for t in timers:
+            if type(t) is list:
+                if t[1]:                    # a call can be cancelled by an
+                    t[1](*t[2])             # earlier call or timer
+
+            elif t in ticking:              # a timer can be removed by an earlier
+                t.tick()                    # timer's callback
+
+                if t.is_off():              # timers without the temp flag set to True
+                    if not t.temp:          # will be reset when their value reaches 0
+                        t.reset()
+                    elif t in ticking:
+                        self.cancel(t)
+
+        if self.calling:
+            self.calling = []
+
+        if self.schedule:
+            self.time += 1
+            self.cascade()
+
+            mask = (1 << self.WHEEL_BITS) - 1
+            i = self.time & mask
+            slot = self.wheel[0][i]
+            self.wheel[0][i] = {}
+
+            for t in list(slot):
+                if t in self.schedule:
+                    self.switch_off(t)
+
+
+class MeterBank:
+    """
+    A MeterBank stores the minimum, value and maximum of any number of meters
+    in NumPy arrays so that many meters (e.g. the stamina of every unit) can
+    be changed with a single array operation.
+    The bulk methods take an optional 'index' argument that selects the
+    meters to change: None for every meter, or anything NumPy can index
+    an array with, such as an int, a list of indexes, or a bool mask.
+    Amounts can be a single number or an array with one value per
+    selected meter. Like a Meter, values are normalized after each change.
+    add() and subtract() apply the amount once for each time a meter is
+    listed in the index (e.g. [3, 3] adds twice to meter 3), and the
+    total is normalized once.
+    add_meter() returns a BankMeter view of one row of the bank that can
+    be used anywhere a Meter object is expected.
+    """
+    def __init__(self, name, capacity=64, dtype=float):
+        if np is None:
+            raise ImportError("MeterBank requires numpy")
+
+        self.name = name
+        self._minimums = np.zeros(capacity, dtype)
+        self._values = np.zeros(capacity, dtype)
+        self._maximums = np.zeros(capacity, dtype)
+
+        self.meters = []
+
+    def __repr__(self):
+        c = self.__class__.__name__
+        n = self.name
+        m = len(self.meters)
+
+        return "{}: {} ({} meters)".format(c, n, m)
+
+    def __len__(self):
+        return len(self.meters)
+
+    def __getitem__(self, index):
+        return self.meters[index]
+
+    # the arrays are views of the bank's buffers, so
+    #   assigning to their items changes the bank
+    @property
+    def minimums(self):
+        return self._minimums[:len(self.meters)]
+
+    @property
+    def values(self):
+        return self._values[:len(self.meters)]
+
+    @property
+    def maximums(self):
+        return self._maximums[:len(self.meters)]
+
+    def grow(self):
+        for name in ("_minimums", "_values", "_maximums"):
+            a = getattr(self, name)
+            setattr(self, name, np.concatenate((a, np.zeros_like(a))))
+
+    # MeterBank.add_meter(name, *args) takes the
+    #   same arguments as Meter(name, *args)
+    def add_meter(self, name, *args):
+        # the arguments are checked by a Meter object
+        meter = Meter(name, *args)
+        i = len(self.meters)
+
+        if i == len(self._values):
+            self.grow()
+
+        self._minimums[i] = meter.minimum
+        self._values[i] = meter.value
+        self._maximums[i] = meter.maximum
+
+        view = BankMeter(name, self, i)
+        self.meters.append(view)
+
+        return view
+
+    # the last meter is moved into the removed meter's row
+    def remove_meter(self, meter):
+        i = meter.index
+        last = self.meters.pop()
+
+        if last is not meter:
+            j = len(self.meters)
+            self.meters[i] = last
+            last.index = i
+
+            for a in (self._minimums, self._values, self._maximums):
+                a[i] = a[j]
+
+        meter.bank = None
+
+    @staticmethod
+    def get_index(index=None):
+        if index is None:
+            return slice(None)
+
+        return index
+
+    def normalize(self, index=None):
+        i = self.get_index(index)
+        v = self.values
+
+        v[i] = np.minimum(np.maximum(v[i], self.minimums[i]), self.maximums[i])
+
+    def set_values(self, values, index=None):
+        self.values[self.get_index(index)] = values
+        self.normalize(index)
+
+    # ufunc.at() is used so that repeated indexes are each
+    #   applied instead of only the last one, which isn't
+    #   needed when every meter is changed
+    def add(self, amount, index=None):
+        if index is None:
+            self.values[:] += amount
+        else:
+            np.add.at(self.values, index, amount)
+
+        self.normalize(index)
+
+    def subtract(self, amount, index=None):
+        if index is None:
+            self.values[:] -= amount
+        else:
+            np.subtract.at(self.values, index, amount)
+
+        self.normalize(index)
+
+    def refill(self, index=None):
+        i = self.get_index(index)
+        self.values[i] = self.maximums[i]
+
+    def reset(self, index=None):
+        i = self.get_index(index)
+        self.values[i] = self.minimums[i]
+
+    def get_span(self, index=None):
+        i = self.get_index(index)
+
+        return self.maximums[i] - self.minimums[i]
+
+    def get_ratio(self, index=None):
+        i = self.get_index(index)
+        span = self.get_span(index)
+
+        if np.any(span == 0):
+            raise ArithmeticError("meter bank has a meter with a span of 0")
+
+        return (self.values[i] - self.minimums[i]) / span
+
+    def is_full(self, index=None):
+        i = self.get_index(index)
+
+        return self.values[i] == self.maximums[i]
+
+    def is_empty(self, index=None):
+        i = self.get_index(index)
+
+        return self.values[i] == self.minimums[i]
+
+
+class BankMeter(Meter):
+    """
+    A BankMeter is a Meter whose minimum, value and maximum are stored in
+    a row of a MeterBank's arrays, so every Meter method and property
+    reads and writes the bank directly.
+    """
+    __slots__ = "bank", "index"
+
+    def __init__(self, name, bank, index):
+        self.name = name
+        self.bank = bank
+        self.index = index
+
+    @property
+    def _value(self):
+        return self.bank._values[self.index].item()
+
+    @_value.setter
+    def _value(self, value):
+        self.bank._values[self.index] = value
+
+    @property
+    def _minimum(self):
+        return self.bank._minimums[self.index].item()
+
+    @_minimum.setter
+    def _minimum(self, value):
+        self.bank._minimums[self.index] = value
+
+    @property
+    def _maximum(self):
+        return self.bank._maximums[self.index].item()
 
-        self.timers = [t for t in timers if t not in tr]
-        self.to_remove = []
+    @_maximum.setter
+    def _maximum(self, value):
+        self.bank._maximums[self.index] = value
@@ -0,0 +1,125 @@
+import json
+from time import perf_counter
+
+from src.collections import AverageCache, CacheList
+from src.graphics import TextGraphics
+from src.resources import get_font
+from zs_globals import Settings, DefaultUI
+
+
+class FrameProfiler:
+    """
+    A FrameProfiler records how long each phase of a frame takes (event polling,
+    updates, drawing, etc.) under a label for each phase. Rolling averages for
+    each label are kept in an AverageCache, and the timings of the most recent
+    frames are kept so they can be dumped to a CSV or JSON trace file.
+    The times for a label are added up over each frame, so a frame that runs
+    several updates adds one sample with their total when end_frame() is
+    called.
+    The 'overlay' flag tells the Game object to draw the current stats on
+    top of the screen each frame.
+    """
+    def __init__(self, depth=Settings.PROFILER_DEPTH, overlay=False):
+        self.depth = depth
+        self.overlay = overlay
+
+        self.phases = {}
+        self.frame_count = 0
+        self.current = {}
+        self.frames = CacheList(depth)
+
+    def __repr__(self):
+        c = self.__class__.__name__
+        n = len(self.phases)
+
+        return "{} ({} phases)".format(c, n)
+
+    def add_time(self, label, seconds):
+        self.current[label] = self.current.get(label, 0) + seconds
+
+    # calls a method and records the time it took under the given label
+    def time(self, label, method, *args):
+        start = perf_counter()
+        output = method(*args)
+        self.add_time(label, perf_counter() - start)
+
+        return output
+
+    def end_frame(self):
+        phases = self.phases
+
+        for label, seconds in self.current.items():
+            if label not in phases:
+                phases[label] = AverageCache(self.depth)
+
+            phases[label].append(seconds)
+
+        self.frames.append((self.frame_count, self.current))
+        self.current = {}
+        self.frame_count += 1
+
+    # returns the average, maximum and most recent time in
+    #   milliseconds for each label
+    def get_stats(self):
+        stats = {}
+
+        for label, cache in self.phases.items():
+            stats[label] = {
+                "average": cache.average() * 1000,
+                "maximum": max(cache) * 1000,
+                "last": cache[-1] * 1000
+            }
+
+        return stats
+
+    def get_text(self):
+        text = ["{:<40} {:>8} {:>8}".format("phase (ms)", "avg", "max")]
+        stats = self.get_stats()
+
+        for label in stats:
+            s = stats[label]
+            text.append("{:<40} {:>8.3f} {:>8.3f}".format(
+                label[:40], s["average"], s["maximum"]))
+
+        return text
+
+    def draw(self, screen, position=(0, 0)):
+        # PYGAME CHOKE POINT
+
+        font = get_font(
+            DefaultUI.PROFILER_FONT, DefaultUI.PROFILER_FONT_SIZE,
+            False, False)
+        image = TextGraphics.make_text_image(
+            self.get_text(), font, DefaultUI.PROFILER_COLOR, 0)
+
+        return screen.blit(image, position)
+
+    # the trace has one row / object for each label timed
+    #   in each of the most recent frames
+    def get_trace(self):
+        trace = []
+
+        for frame, times in self.frames:
+            for label, seconds in times.items():
+                trace.append({
+                    "frame": frame,
+                    "phase": label,
+                    "ms": seconds * 1000
+                })
+
+        return trace
+
+    def save_json(self, path):
+        with open(path, "w") as file:
+            json.dump({
+                "stats": self.get_stats(),
+                "trace": self.get_trace()
+            }, file, indent=2)
+
+    def save_csv(self, path):
+        with open(path, "w") as file:
+            file.write("frame,phase,ms\n")
+
+            for row in self.get_trace():
+                file.write("{},\"{}\",{:.6f}\n".format(
+                    row["frame"], row["phase"], row["ms"]))
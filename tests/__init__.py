@@ -0,0 +1,5 @@
+from os import environ
+
+# the tests run without a display or an audio device
+environ.setdefault("SDL_VIDEODRIVER", "dummy")
+environ.setdefault("SDL_AUDIODRIVER", "dummy")
@@ -0,0 +1,108 @@
+import unittest
+
+from src.collections import ArrayCache, AverageCache, CacheList, ChangeCache
+
+
+class CacheListTest(unittest.TestCase):
+    def test_append_below_size(self):
+        cache = CacheList(5)
+        cache += [1, 2, 3]
+
+        self.assertEqual(len(cache), 3)
+        self.assertEqual(list(cache), [1, 2, 3])
+        self.assertEqual(cache[-1], 3)
+
+    def test_wraparound(self):
+        cache = CacheList(4)
+        for i in range(11):
+            cache.append(i)
+
+        self.assertEqual(len(cache), 4)
+        self.assertEqual(list(cache), [7, 8, 9, 10])
+        self.assertEqual(list(reversed(cache)), [10, 9, 8, 7])
+        self.assertEqual(cache[0], 7)
+        self.assertEqual(cache[-1], 10)
+        self.assertEqual(cache[-4], 7)
+        self.assertEqual(cache[1:3], [8, 9])
+        self.assertEqual(cache[::-1], [10, 9, 8, 7])
+        self.assertEqual(cache, [7, 8, 9, 10])
+
+    def test_index_out_of_range(self):
+        cache = CacheList(3)
+        cache += [1, 2, 3, 4]
+
+        with self.assertRaises(IndexError):
+            cache[3]
+        with self.assertRaises(IndexError):
+            cache[-4]
+
+    def test_setitem_after_wraparound(self):
+        cache = CacheList(3)
+        cache += [1, 2, 3, 4, 5]
+        cache[0] = "a"
+        cache[-1] = "b"
+
+        self.assertEqual(list(cache), ["a", 4, "b"])
+
+    def test_clear(self):
+        cache = CacheList(3)
+        cache += [1, 2, 3, 4]
+        cache.clear()
+        cache.append(5)
+
+        self.assertEqual(list(cache), [5])
+
+    def test_zero_size(self):
+        cache = CacheList(0)
+        cache.append(1)
+
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(list(cache), [])
+
+    def test_subclasses_wrap(self):
+        averages = AverageCache(3)
+        averages += [10, 1, 2, 3]
+        self.assertEqual(averages.average(), 2)
+
+        changes = ChangeCache(4)
+        changes += [0, 0, 1, 1, 1, 0]
+        self.assertEqual(changes.changes(4), [1, 0])
+
+
+class ArrayCacheTest(unittest.TestCase):
+    def test_typecode(self):
+        cache = ArrayCache(3, "b")
+        cache += [1, 0, 1, 1]
+
+        self.assertEqual(cache._items.typecode, "b")
+        self.assertEqual(len(cache._items), 3)
+        self.assertEqual(list(cache), [0, 1, 1])
+
+        with self.assertRaises(OverflowError):
+            cache.append(1000)
+
+    def test_width(self):
+        cache = ArrayCache(3, "d", 2)
+        for i in range(5):
+            cache.append((i, i / 2))
+
+        self.assertEqual(len(cache._items), 6)
+        self.assertEqual(list(cache), [(2, 1.0), (3, 1.5), (4, 2.0)])
+        self.assertEqual(cache[-1], (4.0, 2.0))
+        self.assertEqual(list(reversed(cache)), [(4, 2.0), (3, 1.5), (2, 1.0)])
+        self.assertEqual(cache[:2], [(2, 1.0), (3, 1.5)])
+
+        cache[0] = (-1, -1)
+        self.assertEqual(cache[0], (-1, -1))
+
+    def test_clear(self):
+        cache = ArrayCache(2, "b", 2)
+        cache += [(1, 1), (0, 1), (1, 0)]
+        cache.clear()
+
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(list(cache._items), [0, 0, 0, 0])
+
+
+if __name__ == "__main__":
+    unittest.main()
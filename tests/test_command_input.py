@@ -0,0 +1,156 @@
+import unittest
+from random import Random
+
+from src.command_input import Command, Step
+from src.controller import Button, Controller, Dpad
+
+
+# a quarter circle forward motion followed by a button press
+QCF = {
+    "devices": ["dpad", "A"],
+    "steps": [
+        ["dpad_position_equals", "dpad", [0, 1]],
+        ["dpad_position_equals", "dpad", [1, 1]],
+        ["dpad_position_equals", "dpad", [1, 0]],
+        ["button_pressed", "A"]
+    ],
+    "frames": 8
+}
+
+
+def frame(dpad=(0, 0), a=0):
+    return {"dpad": dpad, "A": a}
+
+
+# checks a command by rescanning the whole window each frame
+class ScanCommand:
+    def __init__(self, steps, window):
+        self.steps = steps
+        self.window = window
+        self.frames = []
+        self.reset_at = -1
+
+    def update(self, f):
+        self.frames.append(f)
+        now = len(self.frames) - 1
+        i = max(now - self.window + 1, self.reset_at + 1)
+
+        for step in self.steps[:-1]:
+            while i < now and not step.check(self.frames[i]):
+                i += 1
+
+            if i >= now:
+                return False
+            i += 1
+
+        active = self.steps[-1].check(f)
+        if active:
+            self.reset_at = now
+
+        return active
+
+
+class CommandTest(unittest.TestCase):
+    def run_frames(self, frames, window=8):
+        command = Command.make_from_d("qcf", dict(QCF, frames=window))
+        active = []
+
+        for f in frames:
+            command.update(f)
+            active.append(command.active)
+
+        return active
+
+    def test_match(self):
+        frames = [frame(), frame((0, 1)), frame((0, 1)), frame((1, 1)),
+                  frame((1, 0)), frame((1, 0), 1), frame((1, 0), 1)]
+
+        self.assertEqual(self.run_frames(frames),
+                         [False] * 5 + [True, False])
+
+    def test_steps_need_separate_frames(self):
+        frames = [frame((0, 1)), frame((1, 1)), frame((1, 0), 1)]
+        self.assertEqual(self.run_frames(frames), [False] * 3)
+
+        frames.append(frame(a=1))
+        self.assertEqual(self.run_frames(frames)[-1], True)
+
+    def test_timeout(self):
+        frames = [frame((0, 1)), frame((1, 1))] + [frame()] * 5 + [
+            frame((1, 0)), frame(a=1)]
+
+        self.assertEqual(self.run_frames(frames, window=9)[-1], True)
+        self.assertEqual(self.run_frames(frames, window=8)[-1], False)
+
+    def test_later_start_fits_window(self):
+        # the first down is too old, but the second one still fits
+        frames = [frame((0, 1))] + [frame()] * 6 + [
+            frame((0, 1)), frame((1, 1)), frame((1, 0)), frame(a=1)]
+
+        self.assertEqual(self.run_frames(frames)[-1], True)
+
+    def test_matches_window_scan(self):
+        random = Random(3)
+        directions = [(0, 0), (0, 1), (1, 1), (1, 0), (-1, 0)]
+        frames = [frame(random.choice(directions), random.random() < .3)
+                  for i in range(3000)]
+
+        for window in (4, 6, 8, 15):
+            command = Command.make_from_d("qcf", dict(QCF, frames=window))
+            scan = ScanCommand(command.steps, window)
+
+            for f in frames:
+                command.update(f)
+                self.assertEqual(command.active, scan.update(f))
+
+    def test_step_constructors(self):
+        f = {"stick": (.6, -.8), "dpad": (1, -1), "A": 1}
+
+        self.assertTrue(Step.make_from_args(
+            ["stick_magnitude_greater_than", "stick", .9]).check(f))
+        self.assertFalse(Step.make_from_args(
+            ["stick_neutral", "stick", .5]).check(f))
+        self.assertTrue(Step.make_from_args(
+            ["stick_axis_greater_than", "stick", 0, .5]).check(f))
+        self.assertTrue(Step.make_from_args(
+            ["dpad_hat_equals", "dpad", 1, -1]).check(f))
+        self.assertTrue(Step.make_from_args(
+            ["and_funcs", ["button_pressed", "A"],
+             ["dpad_position_equals", "dpad", [1, -1]]]).check(f))
+        self.assertFalse(Step.make_from_args(
+            ["or_funcs", ["stick_neutral", "stick", .5],
+             ["dpad_position_equals", "dpad", [0, 0]]]).check(f))
+
+
+class CommandInputManagerTest(unittest.TestCase):
+    def test_controller_commands(self):
+        controller = Controller("test controller")
+        mappings = [Mapping() for i in range(4)]     # up, down, left, right
+        a = Mapping()
+        controller.add_device(Dpad("dpad"), mappings)
+        controller.add_device(Button("A"), a)
+        controller.add_command_input("qcf", QCF)
+
+        active = []
+        for down, right, press in ((1, 0, 0), (1, 1, 0), (0, 1, 0),
+                                   (0, 1, 1), (0, 0, 0)):
+            mappings[1].value, mappings[3].value, a.value = down, right, press
+            controller.update()
+            active.append(controller.check_command("qcf"))
+
+        self.assertEqual(active, [False, False, False, True, False])
+        self.assertEqual(controller.command_manager.devices, ["dpad", "A"])
+
+        controller.command_manager.remove_command_input("qcf")
+        self.assertEqual(controller.command_manager.devices, [])
+
+
+class Mapping:
+    value = 0
+
+    def is_pressed(self):
+        return bool(self.value)
+
+
+if __name__ == "__main__":
+    unittest.main()
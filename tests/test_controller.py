@@ -0,0 +1,253 @@
+import unittest
+
+from src.collections import ArrayCache
+from src.controller import Button, Controller, Dpad, ThumbStick, Trigger
+from src.entities import Environment, Layer
+
+
+class FakeMapping:
+    def __init__(self, value=0):
+        self.value = value
+
+    def is_pressed(self):
+        return bool(self.value)
+
+    def get_value(self):
+        return self.value
+
+
+class ControllerTest(unittest.TestCase):
+    def setUp(self):
+        self.controller = controller = Controller("test controller")
+        self.a = FakeMapping()
+        self.dpad = [FakeMapping() for i in range(4)]     # up, down, left, right
+        self.stick = FakeMapping(.5), FakeMapping(-.25)
+        self.trigger = FakeMapping(.75)
+
+        controller.add_device(Button("A"), self.a)
+        controller.add_device(Dpad("dpad"), self.dpad)
+        controller.add_device(ThumbStick("stick"), self.stick)
+        controller.add_device(Trigger("trigger"), self.trigger)
+
+    def test_frames_per_device(self):
+        c = self.controller
+
+        self.assertEqual(
+            sorted(c.frames),
+            ["A", "dpad", "dpad_down", "dpad_left", "dpad_right", "dpad_up",
+             "stick", "trigger"])
+
+        for name, typecode, width in (("A", "b", 1), ("dpad", "b", 2),
+                                      ("stick", "d", 2), ("trigger", "d", 1)):
+            cache = c.get_device_frames(name)
+            self.assertIsInstance(cache, ArrayCache)
+            self.assertEqual((cache.typecode, cache.width), (typecode, width))
+
+    def test_update_frames(self):
+        c = self.controller
+        c.update()
+        self.a.value = 1
+        self.dpad[0].value = 1
+        self.dpad[3].value = 1
+        c.update()
+
+        self.assertEqual(list(c.get_device_frames("A")), [0, 1])
+        self.assertEqual(list(c.get_device_frames("dpad")), [(0, 0), (1, -1)])
+        self.assertEqual(c.get_device("stick").get_value(), (.5, -.25))
+        self.assertEqual(c.get_device("trigger").get_value(), .75)
+
+        a = c.get_device("A")
+        self.assertIs(a.get_frames(), c.frames["A"])
+        self.assertEqual((a.get_value(), a.held), (1, 1))
+        self.assertEqual(c.get_device("dpad").last_direction, (1, -1))
+
+    def test_frame_depth(self):
+        c = self.controller
+        depth = c.frames["A"]._size
+
+        for i in range(depth + 5):
+            self.a.value = i % 2
+            c.update()
+
+        frames = c.get_device_frames("A")
+        self.assertEqual(len(frames), depth)
+        self.assertEqual(frames[-1], (depth + 4) % 2)
+
+    def test_negative_edge(self):
+        c = self.controller
+        a = c.get_device("A")
+        c.update()
+
+        self.a.value = 1
+        c.update()
+        self.assertFalse(a.negative_edge())
+
+        self.a.value = 0
+        c.update()
+        self.assertTrue(a.negative_edge())
+
+
+class DeviceLookupTest(unittest.TestCase):
+    def setUp(self):
+        self.controller = controller = Controller("test controller")
+        self.dpad = [FakeMapping() for i in range(4)]
+
+        controller.add_device(Button("A"), FakeMapping())
+        controller.add_device(Dpad("dpad"), self.dpad)
+        controller.add_device(Button("B"), FakeMapping())
+
+    def test_device_lookups(self):
+        c = self.controller
+
+        for i, device in enumerate(c.devices):
+            self.assertEqual(c.get_device_index(device.name), i)
+            self.assertIs(c.get_device(device.name), device)
+
+        self.assertEqual(c.get_device_index("B"), 6)
+
+    def test_unknown_name(self):
+        c = self.controller
+
+        for method in (c.get_device, c.get_device_index,
+                       c.get_device_frames):
+            with self.assertRaises(ValueError):
+                method("C")
+
+        with self.assertRaises(ValueError):
+            c.remap_device("C", FakeMapping())
+
+    def test_dpad_buttons(self):
+        c = self.controller
+        dpad = c.get_device("dpad")
+
+        self.assertIs(dpad.up, c.get_device("dpad_up"))
+        self.assertIs(dpad.right, c.get_device("dpad_right"))
+        self.assertEqual([b.name for b in dpad.buttons],
+                         ["dpad_up", "dpad_down", "dpad_left", "dpad_right"])
+
+        self.dpad[1].value = 1
+        c.update()
+        c.update()
+        self.assertIs(dpad.get_dominant(), dpad.down)
+
+    def test_remap_dpad(self):
+        c = self.controller
+        mappings = [FakeMapping() for i in range(4)]
+        c.remap_device("dpad", mappings)
+
+        self.assertIs(c.mappings["dpad"], mappings)
+        self.assertIs(c.mappings["dpad_left"], mappings[2])
+
+        mappings[2].value = 1
+        c.update()
+        self.assertEqual(c.get_device("dpad").get_value(), (-1, 0))
+        self.assertEqual(c.get_device("dpad_left").get_value(), 1)
+
+
+class ControllerBankTest(unittest.TestCase):
+    def make_controller(self, name, mapping=None):
+        controller = Controller(name)
+        controller.add_device(Button("A"), mapping or FakeMapping())
+        controller.add_device(Dpad("dpad"), [FakeMapping() for i in range(4)])
+
+        return controller
+
+    def make_environment(self, name, *controllers):
+        env = Environment(name)
+        sub_layer = Layer(name + " sub layer")
+        sub_layer.set_parent_layer(env, False)
+        sub_layer.controllers.extend(controllers)
+        env.update()            # the bank is made when env spawns
+
+        return env, sub_layer
+
+    def test_bank_updates_once_per_frame(self):
+        mapping = FakeMapping()
+        controller = self.make_controller("controller", mapping)
+        env, sub_layer = self.make_environment("env", controller)
+
+        self.assertIs(controller.bank, env.controller_bank)
+        self.assertEqual(len(controller.frames["A"]), 1)
+
+        mapping.value = 1
+        env.update()
+        env.update()
+
+        self.assertEqual(list(controller.frames["A"]), [0, 1, 1])
+        self.assertEqual(controller.get_device("A").held, 2)
+        self.assertFalse(env.controller_bank.updating)
+
+    def test_paused_layer(self):
+        controller = self.make_controller("controller")
+        env, sub_layer = self.make_environment("env", controller)
+
+        sub_layer.paused = True
+        env.update()
+        self.assertEqual(len(controller.frames["A"]), 1)
+
+        sub_layer.paused = False
+        env.update()
+        self.assertEqual(len(controller.frames["A"]), 2)
+
+    def test_shared_controller(self):
+        shared = self.make_controller("shared")
+        env_a, layer_a = self.make_environment("a", shared)
+        env_b, layer_b = self.make_environment("b", shared)
+        self.assertEqual(len(shared.frames["A"]), 2)
+
+        for env in (env_a, env_b, env_a, env_a, env_b):
+            env.update()
+            self.assertIs(shared.bank, env.controller_bank)
+
+        self.assertEqual(len(shared.frames["A"]), 7)
+
+    def test_shared_controller_added_after_spawn(self):
+        shared = self.make_controller("shared")
+        env_a, layer_a = self.make_environment("a", shared)
+        env_b, layer_b = self.make_environment("b")
+
+        # env_b's bank doesn't have the controller, so its layer updates it
+        layer_b.controllers.append(shared)
+        env_b.update()
+        env_a.update()
+
+        self.assertEqual(len(shared.frames["A"]), 3)
+
+    def test_device_added_while_in_other_bank(self):
+        shared = self.make_controller("shared")
+        env_a, layer_a = self.make_environment("a", shared)
+        env_b, layer_b = self.make_environment("b", shared)
+
+        mapping = FakeMapping(1)
+        shared.add_device(Button("B"), mapping)
+        env_a.update()
+
+        self.assertEqual(list(shared.frames["B"]), [1])
+
+    def test_respawn_remakes_bank(self):
+        controller = self.make_controller("controller")
+        env, sub_layer = self.make_environment("env", controller)
+        old_bank = env.controller_bank
+
+        env.handle_event("spawn")
+        self.assertIsNot(env.controller_bank, old_bank)
+        self.assertIs(controller.bank, env.controller_bank)
+        self.assertEqual(old_bank.controllers, [])
+
+        env.update()
+        self.assertEqual(len(controller.frames["A"]), 2)
+
+    def test_release_controllers(self):
+        controller = self.make_controller("controller")
+        env, sub_layer = self.make_environment("env", controller)
+
+        env.release_controllers()
+        self.assertIsNone(controller.bank)
+        self.assertIsNone(env.controller_bank)
+
+        env.update()
+        self.assertEqual(len(controller.frames["A"]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import unittest
+from os.path import join
+from tempfile import TemporaryDirectory
+
+from src.controller import (
+    Button, Controller, ControllerBank, Dpad, ThumbStick, Trigger)
+from src.controller_io import InputRecorder, InputReplay
+
+
+class FakeMapping:
+    def __init__(self, value=0):
+        self.value = value
+
+    def is_pressed(self):
+        return bool(self.value)
+
+    def get_value(self):
+        return self.value
+
+
+def make_controller():
+    controller = Controller("test controller")
+    controller.add_device(Button("A"), FakeMapping())
+    controller.add_device(
+        Dpad("dpad"), [FakeMapping() for i in range(4)])
+    controller.add_device(
+        ThumbStick("stick"), (FakeMapping(0.0), FakeMapping(0.0)))
+    controller.add_device(Trigger("trigger"), FakeMapping(0.0))
+
+    return controller
+
+
+class InputRecordingTest(unittest.TestCase):
+    def setUp(self):
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.file_name = join(directory.name, "input.zsir")
+
+    def record(self, frames=12, bank=False):
+        controller = make_controller()
+        update = controller.update
+
+        if bank:
+            controller_bank = ControllerBank("test bank")
+            controller_bank.add_controller(controller)
+            update = controller_bank.update
+
+        m = controller.mappings
+        recorder = InputRecorder(controller, self.file_name)
+
+        for i in range(frames):
+            m["A"].value = i % 3 == 0
+            m["dpad"][i % 4].value = i % 2
+            m["stick"][0].value = i / 8
+            m["stick"][1].value = -i / 4
+            m["trigger"].value = i / 16
+            update()
+
+        recorder.close()
+        self.assertIsNone(controller.recorder)
+
+        return controller
+
+    def test_file_format(self):
+        self.record(5)
+
+        with open(self.file_name, "rb") as file:
+            data = file.read()
+
+        self.assertEqual(data[:4], InputRecorder.MAGIC)
+
+        replay = InputReplay(self.file_name)
+        self.assertEqual(replay.header["controller"], "test controller")
+        self.assertEqual(replay.header["devices"][0], ["A", "Button", "b", 1])
+        self.assertEqual(len(replay.frames), 5)
+
+    def test_round_trip(self):
+        recorded = self.record()
+
+        controller = make_controller()
+        replay = InputReplay(self.file_name)
+        replay.apply(controller)
+
+        for i in range(12):
+            controller.update()
+
+        self.assertFalse(replay.done)
+        for d in recorded.devices:
+            self.assertEqual(
+                list(controller.frames[d.name]), list(recorded.frames[d.name]),
+                d.name)
+
+        self.assertEqual(controller.get_device("A").held,
+                         recorded.get_device("A").held)
+
+    def test_round_trip_through_bank(self):
+        recorded = self.record(bank=True)
+
+        controller = make_controller()
+        controller_bank = ControllerBank("test bank")
+        controller_bank.add_controller(controller)
+        InputReplay(self.file_name).apply(controller)
+
+        for i in range(12):
+            controller_bank.update()
+
+        for d in recorded.devices:
+            self.assertEqual(
+                list(controller.frames[d.name]), list(recorded.frames[d.name]),
+                d.name)
+
+    def test_neutral_after_done(self):
+        self.record(2)
+
+        controller = make_controller()
+        InputReplay(self.file_name).apply(controller)
+
+        for i in range(4):
+            controller.update()
+
+        self.assertTrue(controller.replay.done)
+        self.assertEqual(controller.get_device("A").get_value(), 0)
+        self.assertEqual(controller.get_device("stick").get_value(), (0, 0))
+
+    def test_remove_restores_mappings(self):
+        self.record(2)
+
+        controller = make_controller()
+        mappings = dict(controller.mappings)
+        replay = InputReplay(self.file_name)
+        replay.apply(controller)
+        replay.remove()
+
+        self.assertEqual(controller.mappings, mappings)
+        self.assertIsNone(controller.replay)
+
+    def test_bad_file(self):
+        with open(self.file_name, "wb") as file:
+            file.write(b"nope")
+
+        with self.assertRaises(IOError):
+            InputReplay(self.file_name)
+
+
+if __name__ == "__main__":
+    unittest.main()
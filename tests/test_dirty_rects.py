@@ -0,0 +1,185 @@
+import random
+import unittest
+
+import pygame
+
+from src.collections import Group
+from src.entities import Environment, Layer, Sprite
+from src.game import Game
+from src.geometry import merge_rects
+from src.graphics import Graphics
+
+
+class ColorGraphics(Graphics):
+    def __init__(self, entity, color, size):
+        super(ColorGraphics, self).__init__(entity)
+        self.image = pygame.Surface(size)
+        self.image.fill(color)
+
+
+class MergeRectsTest(unittest.TestCase):
+    def test_overlapping_rects_merged(self):
+        rects = [pygame.Rect(0, 0, 10, 10), pygame.Rect(5, 5, 10, 10),
+                 pygame.Rect(50, 50, 5, 5)]
+
+        self.assertEqual(merge_rects(rects),
+                         [pygame.Rect(0, 0, 15, 15), pygame.Rect(50, 50, 5, 5)])
+
+    def test_union_merges_earlier_rects(self):
+        # the third rect joins the first two, whose union then
+        #   overlaps nothing else
+        rects = [pygame.Rect(0, 0, 5, 5), pygame.Rect(20, 0, 5, 5),
+                 pygame.Rect(3, 0, 20, 5)]
+
+        self.assertEqual(merge_rects(rects), [pygame.Rect(0, 0, 25, 5)])
+
+    def test_arguments_not_changed(self):
+        rects = [pygame.Rect(0, 0, 10, 10), pygame.Rect(5, 5, 10, 10)]
+        merge_rects(rects)
+
+        self.assertEqual(rects[0], pygame.Rect(0, 0, 10, 10))
+
+
+class GetDirtyRectsTest(unittest.TestCase):
+    def setUp(self):
+        self.area = pygame.Rect(0, 0, 100, 100)
+        self.env = Environment("dirty test")
+        self.group = Group("dirty test group")
+        self.env.groups.append(self.group)
+
+        self.sprite = Sprite("dirty sprite")
+        self.sprite.set_group(self.group)
+        self.sprite.graphics = ColorGraphics(self.sprite, (255, 0, 0), (10, 10))
+        self.sprite.set_size(10, 10)
+        self.sprite.set_position(20, 30)
+
+    def test_unchanged_entities_not_dirty(self):
+        self.env.get_dirty_rects(self.area)
+
+        self.assertEqual(self.env.get_dirty_rects(self.area), [])
+
+    def test_move_gives_old_and_new_areas(self):
+        self.env.get_dirty_rects(self.area)
+        self.sprite.set_position(40, 30)
+
+        self.assertEqual(self.env.get_dirty_rects(self.area),
+                         [pygame.Rect(20, 30, 10, 10), pygame.Rect(40, 30, 10, 10)])
+
+    def test_hiding_gives_old_area(self):
+        self.env.get_dirty_rects(self.area)
+        self.sprite.visible = False
+
+        self.assertEqual(self.env.get_dirty_rects(self.area),
+                         [pygame.Rect(20, 30, 10, 10)])
+
+    def test_new_image_marks_dirty(self):
+        self.env.get_dirty_rects(self.area)
+        self.sprite.graphics.image = pygame.Surface((10, 10))
+        self.sprite.graphics.reset_image()
+
+        self.assertEqual(self.env.get_dirty_rects(self.area),
+                         [pygame.Rect(20, 30, 10, 10)] * 2)
+
+    def test_sub_layer_offsets_and_hides_items(self):
+        layer = Layer("dirty sub layer")
+        layer.set_parent_layer(self.env, False)
+        layer.set_position(50, 40)
+        layer.set_size(30, 30)
+        group = Group("dirty sub group")
+        layer.groups.append(group)
+        sprite = Sprite("sub layer sprite")
+        sprite.set_group(group)
+        sprite.graphics = ColorGraphics(sprite, (0, 255, 0), (10, 10))
+        sprite.set_position(20, 30)
+        self.env.get_dirty_rects(self.area)
+
+        self.assertEqual(sprite.drawn_rect, pygame.Rect(70, 70, 10, 10))
+
+        layer.visible = False
+        self.assertEqual(self.env.get_dirty_rects(self.area),
+                         [pygame.Rect(70, 70, 10, 10)])
+
+
+class DrawDirtyRectsTest(unittest.TestCase):
+    @staticmethod
+    def make_environment():
+        r = random.Random(5)
+        env = Environment("dirty draw test")
+        env.graphics = ColorGraphics(env, (10, 10, 40), (300, 200))
+
+        sub = Layer("dirty draw sub layer")
+        sub.set_parent_layer(env, False)
+        sub.set_position(50, 40)
+        sub.set_size(150, 100)
+        sub.graphics = ColorGraphics(sub, (40, 10, 10), (150, 100))
+
+        sprites = []
+        for layer in (env, sub):
+            group = Group(layer.name)
+            layer.groups.append(group)
+
+            for i in range(6):
+                sprite = Sprite("sprite {}".format(i))
+                sprite.set_group(group)
+                color = (r.randrange(255), r.randrange(255), 255)
+                size = (r.randint(5, 30), r.randint(5, 30))
+                sprite.graphics = ColorGraphics(sprite, color, size)
+                sprite.set_size(*size)
+                sprite.set_position(r.randint(-10, 280), r.randint(-10, 180))
+                sprites.append(sprite)
+
+        return env, sprites
+
+    # returns the screen contents after each of 'frames' frames of
+    #   randomly moving and hiding sprites
+    def get_frames(self, dirty_rects, frames=60):
+        screen = pygame.Surface((300, 200))
+        env, sprites = self.make_environment()
+        game = Game(screen, 60, env, None)
+        game.dirty_rects = dirty_rects
+        sub = env.sub_layers[0]
+
+        r = random.Random(9)
+        shots = []
+        for frame in range(frames):
+            for sprite in sprites:
+                if r.random() < .3:
+                    sprite.move(r.randint(-8, 8), r.randint(-8, 8))
+                if r.random() < .05:
+                    sprite.visible = not sprite.visible
+
+            if frame == 20:
+                sub.visible = False
+            if frame == 40:
+                sub.visible = True
+            if frame == 45:
+                sub.set_position(60, 50)
+
+            game.draw_environment()
+            shots.append(pygame.image.tobytes(screen, "RGB"))
+
+        return shots
+
+    def test_same_output_as_full_redraw(self):
+        full = self.get_frames(False)
+        dirty = self.get_frames(True)
+
+        self.assertEqual([i for i in range(len(full)) if full[i] != dirty[i]], [])
+
+    def test_returns_changed_areas(self):
+        screen = pygame.Surface((300, 200))
+        env, sprites = self.make_environment()
+        game = Game(screen, 60, env, None)
+        game.dirty_rects = True
+
+        self.assertEqual(game.draw_environment(), [screen.get_rect()])
+        self.assertEqual(game.draw_environment(), [])
+
+        sprites[0].set_position(0, 0)
+        rects = game.draw_environment()
+        self.assertTrue(rects)
+        self.assertTrue(all(screen.get_rect().contains(r) for r in rects))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+import json
+import unittest
+from os.path import join
+from tempfile import TemporaryDirectory
+
+from src.entities import Environment, Layer
+from src.event_io import EventReplay, EventTracer
+from src.events import EventHandler
+
+
+class EventTraceTest(unittest.TestCase):
+    def setUp(self):
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.file_name = join(directory.name, "events.jsonl")
+
+        self.log = []
+        self.tracer = None
+        self.addCleanup(setattr, EventHandler, "tracer", None)
+
+    # an environment with two layers, where 'a' forwards each
+    #   ping event to 'b' as a pong event
+    def make_environment(self):
+        log = self.log
+        test = self
+
+        class LoggedLayer(Layer):
+            def on_ping(self):
+                log.append((test.tracer.frame, self.name, "ping"))
+
+            def on_pong(self):
+                log.append((test.tracer.frame, self.name, "pong"))
+
+        env = Environment("trace test")
+        a = LoggedLayer("a")
+        b = LoggedLayer("b")
+        a.set_parent_layer(env)
+        b.set_parent_layer(env)
+        a.add_listener({"name": "ping", "response": "pong", "target": b})
+
+        return env, a, b
+
+    def step(self, env):
+        self.tracer.start_frame()
+        env.update()
+        self.tracer.end_frame()
+
+    # returns the event methods called while running the traced
+    #   workload, which writes its trace to the test's file
+    def trace(self):
+        self.tracer = EventTracer(file_name=self.file_name)
+        env, a, b = self.make_environment()
+        self.step(env)
+
+        a.queue_event("ping", {"name": "ping", "duration": 3})
+        self.step(env)
+        self.step(env)
+        b.queue_event({"name": "pong", "lerp": False, "duration": 2})
+        for i in range(6):
+            self.step(env)
+
+        self.tracer.close()
+        log = list(self.log)
+        self.log.clear()
+
+        return log
+
+    def test_records(self):
+        self.trace()
+        records = self.tracer.records
+
+        # the linked ping is queued by the first one's timer during
+        #   an update
+        queued = [r for r in records if r["kind"] == EventTracer.QUEUE]
+        self.assertEqual([(r["entity"], r["name"], r["update"]) for r in queued][-3:],
+                         [("a", "ping", False), ("a", "ping", True),
+                          ("b", "pong", False)])
+        self.assertEqual(queued[-1]["duration"], 2)
+        self.assertFalse(queued[-1]["lerp"])
+
+        forwarded = [r for r in records if r["kind"] == EventTracer.LISTENER]
+        self.assertTrue(forwarded)
+        self.assertTrue(all(r["entity"] == "b" and r["trigger"] == "ping"
+                            for r in forwarded))
+        self.assertTrue(all("ms" in r for r in records if r["kind"] == EventTracer.HANDLE))
+
+        self.assertEqual(self.tracer.get_counts("name", EventTracer.LISTENER),
+                         [("pong", len(forwarded))])
+
+    def test_file_matches_records(self):
+        self.trace()
+
+        with open(self.file_name) as file:
+            lines = [json.loads(line) for line in file]
+
+        self.assertEqual(lines, list(self.tracer.records))
+        self.assertIsNone(EventHandler.tracer)
+
+    def test_replay_round_trip(self):
+        traced = self.trace()
+        replay = EventReplay.load(self.file_name, names=("spawn",))
+
+        self.tracer = EventTracer()
+        env, a, b = self.make_environment()
+        self.step(env)                      # handles the spawn events
+        replay.apply(env)
+
+        while not replay.done:
+            self.step(env)
+        for i in range(6):
+            self.step(env)
+
+        self.assertTrue(traced)
+        self.assertEqual(self.log, traced)
+        self.assertEqual(replay.missing, set())
+
+        replay.remove()
+        self.assertNotIn(replay.start_frame, env.update_methods)
+
+    def test_replay_skips_nested_records(self):
+        records = [
+            {"frame": 3, "kind": "queue", "entity": "a", "name": "ping",
+             "duration": 1, "lerp": True, "depth": 0, "update": False},
+            {"frame": 3, "kind": "queue", "entity": "b", "name": "pong",
+             "duration": 1, "lerp": True, "depth": 1, "update": True},
+            {"frame": 5, "kind": "handle", "entity": "a", "name": "ping",
+             "duration": 1, "lerp": True, "depth": 0, "update": True},
+            {"frame": 5, "kind": "queue", "entity": "c", "name": "ping",
+             "duration": 1, "lerp": True, "depth": 0, "update": True},
+            {"frame": 6, "kind": "queue", "entity": "a", "name": "spawn",
+             "duration": 1, "lerp": True, "depth": 0, "update": False},
+        ]
+        replay = EventReplay(records, names=("spawn",))
+
+        self.assertEqual(replay.length, 3)
+        self.assertEqual(len(replay.frames[0][0]), 1)
+        self.assertEqual(replay.frames[0][1], [])
+        self.assertEqual(len(replay.frames[2][1]), 1)
+
+        self.tracer = EventTracer()
+        env, a, b = self.make_environment()
+        replay.apply(env)
+        while not replay.done:
+            self.step(env)
+
+        self.assertEqual(replay.missing, {"c"})
+
+
+if __name__ == "__main__":
+    unittest.main()
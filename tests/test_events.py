@@ -0,0 +1,447 @@
+import unittest
+
+from src.entities import Entity, Environment
+from src.events import Event, EventBus, EventHandler
+
+
+class EventMethodsTest(unittest.TestCase):
+    def setUp(self):
+        self.log = []
+        log = self.log
+
+        class Base(Entity):
+            def on_hit(self):
+                log.append("Base.on_hit")
+
+        class Child(Base):
+            pass
+
+        class GrandChild(Child):
+            pass
+
+        self.Base, self.Child, self.GrandChild = Base, Child, GrandChild
+
+    def test_class_patch_reaches_subclasses(self):
+        child = self.Child("child")
+        grand_child = self.GrandChild("grand child")
+
+        def on_hit(entity):
+            self.log.append("patched " + entity.name)
+
+        self.Base.on_hit = on_hit
+        child.handle_event("hit")
+        grand_child.handle_event("hit")
+
+        self.assertEqual(self.log, ["patched child", "patched grand child"])
+
+    def test_class_patch_new_event(self):
+        child = self.Child("child")
+        self.Base.on_block = lambda entity: self.log.append("block")
+        child.handle_event("block")
+
+        del self.Base.on_block
+        child.handle_event("block")
+
+        self.assertEqual(self.log, ["block"])
+
+    def test_subclass_override_kept(self):
+        child = self.Child("child")
+        self.Child.on_hit = lambda entity: self.log.append("Child.on_hit")
+        self.Base.on_hit = lambda entity: self.log.append("patched Base")
+
+        child.handle_event("hit")
+        self.Base("base").handle_event("hit")
+
+        self.assertEqual(self.log, ["Child.on_hit", "patched Base"])
+
+    def test_instance_method(self):
+        entity = self.Base("entity")
+        other = self.Base("other")
+
+        entity.on_custom = lambda: self.log.append("custom")
+        entity.on_hit = lambda: self.log.append("instance on_hit")
+        entity.handle_event("custom")
+        entity.handle_event("hit")
+        other.handle_event("hit")
+
+        self.assertEqual(
+            self.log, ["custom", "instance on_hit", "Base.on_hit"])
+        self.assertEqual(entity.event["name"], "hit")
+
+    def test_instance_method_set_in_init(self):
+        log = self.log
+
+        class Custom(self.Base):
+            def __init__(self, name):
+                super(Custom, self).__init__(name)
+                self.on_custom = lambda: log.append("custom")
+                self.on_hit = lambda: log.append("instance on_hit")
+
+        entity = Custom("entity")
+        entity.handle_event("custom")
+        entity.handle_event("hit")
+
+        self.assertEqual(self.log, ["custom", "instance on_hit"])
+
+    def test_instance_method_removed(self):
+        entity = self.Base("entity")
+        entity.on_hit = lambda: self.log.append("instance on_hit")
+        del entity.on_hit
+        entity.handle_event("hit")
+
+        entity.on_hit = None
+        entity.handle_event("hit")
+
+        self.assertEqual(self.log, ["Base.on_hit"])
+
+
+class ListenerTest(unittest.TestCase):
+    def setUp(self):
+        self.log = []
+        log = self.log
+
+        class Receiver(Entity):
+            def on_ping(self):
+                log.append((self.name, self.event))
+
+            def on_hit(self):
+                log.append((self.name, self.event))
+
+        self.hub = Entity("hub")
+        self.a = Receiver("a")
+        self.b = Receiver("b")
+
+    def test_response_forwarded_with_trigger(self):
+        self.hub.add_listener({"name": "hit", "target": self.a,
+                               "response": {"name": "ping", "power": 3}})
+        self.hub.handle_event({"name": "hit", "damage": 5})
+        self.hub.handle_event("block")
+
+        name, event = self.log[0]
+        self.assertEqual(len(self.log), 1)
+        self.assertEqual(name, "a")
+        self.assertEqual(event["name"], "ping")
+        self.assertEqual(event["power"], 3)
+        self.assertEqual(event["trigger"], {"name": "hit", "damage": 5})
+
+    def test_no_response_forwards_event(self):
+        self.hub.add_listener({"name": "hit", "target": self.a})
+        self.hub.handle_event({"name": "hit", "damage": 5})
+
+        self.assertEqual(self.log[0][1]["damage"], 5)
+        self.assertEqual(self.log[0][1]["trigger"], {"name": "hit", "damage": 5})
+
+    def test_string_listener_response(self):
+        self.hub.add_listener("hit ping")
+        self.hub.add_listener({"name": "hit", "target": self.b, "response": "ping"})
+        self.hub.handle_event("hit")
+
+        self.assertEqual([name for name, event in self.log], ["b"])
+        self.assertEqual(self.log[0][1]["trigger"]["name"], "hit")
+
+    def test_listeners_called_in_order_added(self):
+        for target in (self.b, self.a, self.b):
+            self.hub.add_listener({"name": "hit", "target": target})
+        self.hub.handle_event("hit")
+
+        self.assertEqual([name for name, event in self.log], ["b", "a", "b"])
+
+    def test_targets_get_own_response(self):
+        response = {"name": "ping", "power": 3}
+        self.hub.add_listener({"name": "hit", "target": self.a, "response": response},
+                              {"name": "hit", "target": self.b, "response": response})
+        self.hub.handle_event("hit")
+
+        first, second = [event for name, event in self.log]
+        first["power"] = 0
+        self.assertEqual(second["power"], 3)
+        self.assertEqual(response, {"name": "ping", "power": 3})
+
+    def test_temp_listener_removed_after_response(self):
+        self.hub.add_listener({"name": "hit", "target": self.a, "temp": True},
+                              {"name": "hit", "target": self.b})
+        self.hub.handle_event("hit")
+        self.hub.handle_event("hit")
+
+        self.assertEqual([name for name, event in self.log], ["a", "b", "b"])
+        self.assertTrue(self.hub.listening_for("hit"))
+
+    def test_last_temp_listener_clears_name(self):
+        self.hub.add_listener({"name": "hit", "target": self.a, "temp": True})
+        self.hub.handle_event("hit")
+
+        self.assertFalse(self.hub.listening_for("hit"))
+        self.assertEqual(self.hub.event_handler.listeners, {})
+
+    def test_listener_added_by_response(self):
+        hub = self.hub
+
+        class Adder(Entity):
+            def on_hit(self):
+                hub.add_listener({"name": "hit", "target": self})
+
+        adder = Adder("adder")
+        hub.add_listener({"name": "hit", "target": adder, "temp": True})
+        hub.handle_event("hit")
+
+        self.assertEqual(len(hub.event_handler.listeners["hit"]), 1)
+
+    def test_remove_listener(self):
+        self.hub.add_listener({"name": "hit", "target": self.a},
+                              {"name": "hit", "target": self.b},
+                              {"name": "hit", "target": self.a, "response": "ping"})
+        self.hub.remove_listener({"name": "hit", "target": self.a})
+        self.hub.handle_event("hit")
+        self.assertEqual([name for name, event in self.log], ["b"])
+
+        self.hub.remove_listener("hit")
+        self.assertFalse(self.hub.listening_for("hit"))
+
+
+class EventTest(unittest.TestCase):
+    def test_mapping_access(self):
+        event = Event("hit", {"damage": 5})
+        event["target"] = "player"
+
+        self.assertEqual(event["name"], "hit")
+        self.assertEqual(event.get("damage"), 5)
+        self.assertIsNone(event.get("missing"))
+        self.assertIn("target", event)
+        self.assertNotIn("timer", event)
+        self.assertEqual(sorted(event), ["damage", "name", "target"])
+
+        del event["target"]
+        with self.assertRaises(KeyError):
+            event["target"]
+
+    def test_equal_to_dict(self):
+        event = Event("hit", {"damage": 5})
+
+        self.assertEqual(event, {"name": "hit", "damage": 5})
+        self.assertEqual(event, Event("hit", {"damage": 5}))
+        self.assertNotEqual(event, Event("hit"))
+
+    def test_not_hashable(self):
+        with self.assertRaises(TypeError):
+            hash(Event("hit"))
+
+    def test_copy_is_independent(self):
+        event = Event("hit", {"damage": 5})
+        copy = event.copy()
+        copy["damage"] = 0
+
+        self.assertEqual(event["damage"], 5)
+
+    def test_one_frame_timer_made_when_read(self):
+        event = Event("hit", timer=Event.ONE_FRAME)
+        timer = event["timer"]
+
+        self.assertTrue(timer.is_off())
+        self.assertIs(event.timer, timer)
+
+    def test_interpret_string(self):
+        self.assertEqual(EventHandler.interpret("hit"), {"name": "hit"})
+        self.assertEqual(EventHandler.interpret("hit ping"),
+                         {"name": "hit", "response": "ping"})
+
+
+class QueueEventTest(unittest.TestCase):
+    def setUp(self):
+        self.log = []
+        log = self.log
+
+        class Logger(Entity):
+            def on_long(self):
+                log.append("long")
+
+            def on_a(self):
+                log.append("a")
+
+            def on_b(self):
+                log.append("b")
+
+            def on_c(self):
+                log.append("c")
+
+        self.entity = Logger("logger")
+
+    def tick(self, frames=1):
+        for i in range(frames):
+            self.entity.clock.tick()
+            self.log.append("|")
+
+    def test_one_frame_event_needs_no_timer(self):
+        self.entity.queue_event("a")
+
+        self.assertEqual(self.entity.clock.timers, [])
+        self.tick()
+        self.assertEqual(self.log, ["a", "|"])
+        self.assertIs(self.entity.event.timer, Event.ONE_FRAME)
+        self.assertTrue(self.entity.event["timer"].is_off())
+
+    # one frame events are handled in the order they were queued
+    #   relative to events with a Timer, as they were when every
+    #   event had a Timer
+    def test_queue_order_kept(self):
+        self.entity.queue_event({"name": "long", "duration": 3})
+        self.tick()
+
+        self.entity.queue_event("a")
+        self.entity.queue_event({"name": "b", "duration": 2})
+        self.entity.queue_event("c")
+        self.tick(2)
+
+        self.assertEqual(self.log, ["long", "|", "long", "a", "b", "c", "|",
+                                    "long", "b", "|"])
+
+    def test_remove_timer_cancels_one_frame_event(self):
+        self.entity.queue_event("a")
+        self.entity.queue_event("b")
+        self.entity.clock.remove_timer("a")
+        self.tick()
+
+        self.assertEqual(self.log, ["b", "|"])
+
+    def test_call_cancelled_by_earlier_event(self):
+        entity = self.entity
+        entity.on_a = lambda: entity.clock.remove_timer("c")
+        entity.queue_event("a")
+        entity.queue_event("c")
+        self.tick()
+
+        self.assertEqual(self.log, ["|"])
+
+
+class EventBusTest(unittest.TestCase):
+    def setUp(self):
+        self.log = []
+        log = self.log
+
+        class BusEnvironment(Environment):
+            def on_ping(self):
+                log.append(("ping", EventHandler.bus is self.event_bus))
+
+            def on_boom(self):
+                raise RuntimeError("boom")
+
+        self.env = BusEnvironment("bus test")
+        self.env.event_bus = EventBus("bus test")
+        self.env.update()           # handles the spawn event
+
+    def test_bus_restored_after_update(self):
+        self.assertIsNone(EventHandler.bus)
+
+        self.env.queue_event("ping")
+        self.env.update()
+
+        self.assertEqual(self.log, [("ping", True)])
+        self.assertIsNone(EventHandler.bus)
+
+    def test_bus_restored_after_error(self):
+        bus = self.env.event_bus
+        self.env.queue_event("boom")
+
+        with self.assertRaises(RuntimeError):
+            self.env.update()
+
+        self.assertIsNone(EventHandler.bus)
+        self.assertIsNone(bus.depth)
+
+        # events are handled right away outside of an update
+        self.env.event_handler.dispatch_event({"name": "ping"})
+        self.assertEqual(self.log, [("ping", False)])
+
+    def test_previous_bus_restored(self):
+        outer = EventBus("outer")
+        EventHandler.bus = outer
+
+        try:
+            self.env.update()
+            self.assertIs(EventHandler.bus, outer)
+
+        finally:
+            EventHandler.bus = None
+
+
+class EventBusDeliveryTest(unittest.TestCase):
+    def setUp(self):
+        self.log = []
+        log = self.log
+
+        class Walker(Entity):
+            def on_x(self):
+                log.append(("x", self.name))
+
+            def on_y(self):
+                log.append(("y", self.name))
+
+            # queues another chain event through the bus until the
+            #   count runs out
+            def on_chain(self):
+                count = self.event["count"]
+                log.append(("chain", count))
+
+                if count:
+                    self.event_handler.dispatch_event(
+                        {"name": "chain", "count": count - 1})
+
+        class Runner(Walker):
+            pass
+
+        self.Walker, self.Runner = Walker, Runner
+        self.bus = EventBus("delivery test", max_depth=2)
+        EventHandler.bus = self.bus
+        self.addCleanup(setattr, EventHandler, "bus", None)
+
+    def post(self, entity, name, **kwargs):
+        self.bus.post(entity.event_handler, EventHandler.make_event(name, **kwargs))
+
+    def test_grouped_by_name_and_class(self):
+        w1, w2 = self.Walker("w1"), self.Walker("w2")
+        r1 = self.Runner("r1")
+
+        self.post(w1, "x")
+        self.post(r1, "x")
+        self.post(w2, "y")
+        self.post(w2, "x")
+        self.post(r1, "y")
+        self.bus.deliver()
+
+        self.assertEqual(self.log, [("x", "w1"), ("x", "w2"), ("x", "r1"),
+                                    ("y", "w2"), ("y", "r1")])
+        self.assertEqual(self.bus.queue, [])
+
+    def test_cascade_delivered_in_same_frame(self):
+        self.post(self.Walker("w"), "chain", count=2)
+        self.bus.deliver()
+
+        self.assertEqual(self.log, [("chain", 2), ("chain", 1), ("chain", 0)])
+        self.assertEqual(self.bus.get_stats()["events"]["last"], 3)
+
+    def test_events_past_max_depth_deferred(self):
+        self.post(self.Walker("w"), "chain", count=5)
+        self.bus.deliver()
+
+        self.assertEqual([count for name, count in self.log], [5, 4, 3])
+        self.assertEqual(len(self.bus.queue), 1)
+        self.assertEqual(self.bus.get_stats()["deferred"]["last"], 1)
+
+        # deferred events start again from depth 0 on the next frame
+        self.bus.deliver()
+        self.assertEqual([count for name, count in self.log], [5, 4, 3, 2, 1, 0])
+        self.assertAlmostEqual(self.bus.get_stats()["latency"]["last"], 1 / 3)
+        self.assertIsNone(self.bus.depth)
+
+    def test_listener_responses_posted(self):
+        hub = self.Walker("hub")
+        target = self.Runner("target")
+        hub.add_listener({"name": "x", "target": target, "response": "y"})
+
+        self.post(hub, "x")
+        self.bus.deliver()
+
+        self.assertEqual(self.log, [("x", "hub"), ("y", "target")])
+
+
+if __name__ == "__main__":
+    unittest.main()
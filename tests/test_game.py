@@ -0,0 +1,127 @@
+import unittest
+from os import environ
+from unittest import mock
+
+import pygame
+
+from src.entities import Environment
+from src.game import Game, start_headless
+
+
+class SlowGame(Game):
+    # each update takes 'update_time' seconds of a fake clock, which
+    #   is longer than the timestep
+    def __init__(self, update_time, **kwargs):
+        screen = pygame.Surface((64, 64))
+        super(SlowGame, self).__init__(
+            screen, 60, Environment("game test"), None, **kwargs)
+
+        self.time = 0
+        self.update_time = update_time
+        self.updates = 0
+        self.draws = []
+
+    @staticmethod
+    def poll_events():
+        pass
+
+    def update_environment(self, dt):
+        self.time += self.update_time
+        self.updates += 1
+
+    def draw_environment(self, alpha=0):
+        self.draws.append(alpha)
+
+    @staticmethod
+    def update_display(rects=None):
+        pass
+
+    def run(self, updates):
+        lag = 0
+        last = self.time
+
+        while self.updates < updates:
+            now = self.time
+            lag = self.run_frame(lag + (now - last) + 1 / 1000)
+            last = now
+
+
+class RunFrameTest(unittest.TestCase):
+    def test_slow_updates_still_draw(self):
+        game = SlowGame(.020)
+        game.run(3000)
+
+        step = 1 / game.update_rate
+        self.assertGreater(len(game.draws), game.updates / game.max_updates)
+        self.assertTrue(all(0 <= alpha <= 1 for alpha in game.draws))
+        self.assertLess(game.run_frame(10 * step), step)
+
+    def test_fast_updates_draw_every_frame(self):
+        game = SlowGame(.001)
+
+        self.assertEqual(game.run_frame(0), 0)
+        self.assertEqual(game.updates, 0)
+        self.assertAlmostEqual(game.run_frame(1.5 / 60), .5 / 60)
+        self.assertEqual(game.updates, 1)
+        self.assertEqual(len(game.draws), 2)
+        self.assertAlmostEqual(game.draws[-1], .5)
+
+
+class TransitionTest(unittest.TestCase):
+    def test_return_to_parent_releases_controllers(self):
+        parent = Environment("parent")
+        child = Environment("child")
+        for env in (parent, child):
+            env.update()            # the bank is made when env spawns
+
+        game = Game(pygame.Surface((64, 64)), 60, parent, None)
+        game.environment = child
+        child.transition_to(parent, to_parent=True)
+        game.handle_transition()
+
+        self.assertIs(game.environment, parent)
+        self.assertIsNone(child.controller_bank)
+        self.assertIsNotNone(parent.controller_bank)
+
+
+class HeadlessTest(unittest.TestCase):
+    def tearDown(self):
+        pygame.display.quit()
+        pygame.display.init()
+
+    def test_start_headless_restarts_display(self):
+        with mock.patch.dict(environ, {"SDL_VIDEODRIVER": "offscreen"}):
+            pygame.display.quit()
+            pygame.display.init()
+            self.assertEqual(pygame.display.get_driver(), "offscreen")
+
+        with mock.patch.dict(environ):
+            environ.pop("SDL_VIDEODRIVER", None)
+            game = start_headless(Environment("headless test"), None)
+
+            self.assertEqual(pygame.display.get_driver(), "dummy")
+            self.assertIsNone(game.screen)
+
+    def test_run_headless(self):
+        game = Game(None, 60, Environment("headless test"), None)
+
+        self.assertEqual(game.run_headless(frames=10), 10)
+        self.assertTrue(game.environment.spawned)
+        self.assertGreater(game.run_headless(budget=.01), 0)
+
+    def test_run_headless_needs_a_limit(self):
+        game = Game(None, 60, Environment("headless test"), None)
+
+        with self.assertRaises(ValueError):
+            game.run_headless()
+
+    def test_run_headless_exit(self):
+        game = Game(None, 60, Environment("headless test"), None)
+        game.run_headless(frames=1)
+        game.environment.transition_to(None, exit=True)
+
+        self.assertEqual(game.run_headless(frames=10), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
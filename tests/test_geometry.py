@@ -0,0 +1,107 @@
+import random
+import unittest
+
+import pygame
+
+from src.geometry import Rect
+
+
+# the collision point as Rect.get_rect_collision() found it with
+#   pygame.Rect.clip()
+def get_clip_collision(a, b):
+    collision = a.pygame_rect.clip(b.pygame_rect)
+
+    if not (collision.width or collision.height):
+        return False
+
+    return collision.center
+
+
+class RectCollisionTest(unittest.TestCase):
+    def check(self, a, b):
+        self.assertEqual(a.get_rect_collision(b), get_clip_collision(a, b),
+                         "{} and {}".format(a, b))
+
+    def test_matches_pygame_clip(self):
+        r = random.Random(6)
+
+        for _ in range(3000):
+            a, b = [Rect((r.randint(0, 12), r.randint(0, 12)),
+                         (r.randint(-5, 15), r.randint(-5, 15))) for _ in range(2)]
+            self.check(a, b)
+
+    def test_fractional_rects_truncated(self):
+        r = random.Random(7)
+
+        for _ in range(1000):
+            a, b = [Rect((r.uniform(0, 12), r.uniform(0, 12)),
+                         (r.uniform(-5, 15), r.uniform(-5, 15))) for _ in range(2)]
+            self.check(a, b)
+
+    def test_edge_cases(self):
+        cases = [
+            (Rect((10, 10), (0, 0)), Rect((10, 10), (10, 0))),  # sharing an edge
+            (Rect((10, 10), (0, 0)), Rect((10, 10), (0, 0))),   # the same area
+            (Rect((0, 10), (5, 0)), Rect((10, 10), (0, 0))),    # zero width inside
+            (Rect((0, 0), (5, 5)), Rect((10, 10), (0, 0))),     # zero size inside
+            (Rect((4, 4), (3, 3)), Rect((10, 10), (0, 0))),     # contained
+            (Rect((10, 10), (-5, -5)), Rect((10, 10), (0, 0))),
+        ]
+
+        for a, b in cases:
+            self.check(a, b)
+            self.check(b, a)
+
+
+class RectTest(unittest.TestCase):
+    def test_pygame_rect_view_reused_until_changed(self):
+        rect = Rect((10, 20), (1, 2))
+        view = rect.pygame_rect
+
+        self.assertEqual(view, pygame.Rect(1, 2, 10, 20))
+        self.assertIs(rect.pygame_rect, view)
+
+        rect.move((5, 5))
+        rect.size = 3, 4
+
+        self.assertIs(rect.pygame_rect, view)
+        self.assertEqual(view, pygame.Rect(6, 7, 3, 4))
+
+    def test_clip_uses_current_box(self):
+        rect = Rect((10, 10), (0, 0))
+        rect.pygame_rect
+        rect.position = 5, 5
+
+        self.assertEqual(rect.clip(pygame.Rect(0, 0, 10, 10)), pygame.Rect(5, 5, 5, 5))
+
+    def test_copy_is_independent(self):
+        rect = Rect((10, 10), (0, 0))
+        copy = rect.copy()
+        copy.move((3, 3))
+
+        self.assertEqual(rect.position, (0, 0))
+        self.assertEqual(copy.position, (3, 3))
+        self.assertEqual(copy.size, (10, 10))
+
+    def test_edge_properties(self):
+        rect = Rect((10, 20), (5, 5))
+        rect.right = 30
+        rect.bottom = 40
+
+        self.assertEqual(rect.position, (20, 20))
+        self.assertEqual(rect.center, (25, 30))
+        self.assertEqual(rect.bottomright, (30, 40))
+
+        rect.center = 0, 0
+        self.assertEqual(rect.topleft, (-5, -10))
+
+    def test_circle_collision_points(self):
+        rect = Rect((10, 10), (0, 0))
+
+        self.assertEqual(rect.get_circle_collision(1, (5, 5)), (5, 5))
+        self.assertEqual(rect.get_circle_collision(1, (10, 11)), (10, 10))
+        self.assertIsNone(rect.get_circle_collision(1, (20, 20)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+from unittest import mock
+
+from src.controller import Button, Controller
+from src.entities import Environment
+from src.input_manager import ButtonMappingKey, InputManager
+
+
+class KeyState:
+    def __init__(self):
+        self.pressed = [0] * 512
+
+    def get_pressed(self):
+        return list(self.pressed)
+
+
+class InputSnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.keys = KeyState()
+        patch = mock.patch("pygame.key.get_pressed", self.keys.get_pressed)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+        InputManager.SNAPSHOT.release()
+        self.addCleanup(InputManager.SNAPSHOT.release)
+
+    def test_snapshot_holds_for_a_frame(self):
+        mapping = ButtonMappingKey(32)
+        self.assertFalse(mapping.is_pressed())
+
+        self.keys.pressed[32] = 1
+        self.assertFalse(mapping.is_pressed())
+
+    def test_release_reads_new_state(self):
+        mapping = ButtonMappingKey(32)
+        self.assertFalse(mapping.is_pressed())
+
+        self.keys.pressed[32] = 1
+        InputManager.SNAPSHOT.release()
+        self.assertTrue(mapping.is_pressed())
+
+    def test_environment_update_ends_frame(self):
+        env = Environment("input test")
+        snapshot = InputManager.SNAPSHOT
+        self.assertFalse(snapshot.get_key(32))
+
+        self.keys.pressed[32] = 1
+        env.update()
+        self.assertTrue(snapshot.get_key(32))
+
+    def test_one_capture_per_environment_update(self):
+        captures = []
+
+        def get_pressed():
+            captures.append(1)
+            return self.keys.get_pressed()
+
+        env = Environment("input test")
+        in_bank = Controller("in bank")
+        in_bank.add_device(Button("A"), ButtonMappingKey(32))
+        env.controllers.append(in_bank)
+        env.update()                # the bank is made when env spawns
+
+        # added after the bank was made, so it's updated by the layer
+        outside = Controller("outside bank")
+        outside.add_device(Button("A"), ButtonMappingKey(32))
+        env.controllers.append(outside)
+
+        with mock.patch("pygame.key.get_pressed", get_pressed):
+            env.update()
+            self.keys.pressed[32] = 1
+            env.update()
+
+        self.assertIs(in_bank.bank, env.controller_bank)
+        self.assertEqual(len(captures), 2)
+        self.assertEqual(list(in_bank.frames["A"]), [0, 0, 1])
+        self.assertEqual(list(outside.frames["A"]), [0, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import unittest
+
+import pygame
+
+from src.entities import Layer
+from src.graphics import Graphics
+
+
+class ColorGraphics(Graphics):
+    def __init__(self, entity, color, size):
+        super(ColorGraphics, self).__init__(entity)
+        self.image = pygame.Surface(size)
+        self.image.fill(color)
+
+
+class GetCanvasTest(unittest.TestCase):
+    def setUp(self):
+        self.screen = pygame.Surface((100, 100))
+        self.layer = Layer("canvas test")
+        self.layer.set_position(10, 20)
+        self.layer.set_size(30, 40)
+
+    def test_canvas_reused_between_draws(self):
+        canvas = self.layer.get_canvas(self.screen)
+
+        self.assertIs(self.layer.get_canvas(self.screen), canvas)
+        self.assertEqual(canvas.get_offset(), (10, 20))
+        self.assertEqual(canvas.get_size(), (30, 40))
+
+    def test_canvas_rebuilt_when_layer_moves_or_resizes(self):
+        canvas = self.layer.get_canvas(self.screen)
+        self.layer.set_position(15, 20)
+        moved = self.layer.get_canvas(self.screen)
+
+        self.assertIsNot(moved, canvas)
+        self.assertEqual(moved.get_offset(), (15, 20))
+
+        self.layer.set_size(20, 20)
+        resized = self.layer.get_canvas(self.screen)
+
+        self.assertIsNot(resized, moved)
+        self.assertEqual(resized.get_size(), (20, 20))
+
+    def test_canvas_rebuilt_for_new_screen(self):
+        canvas = self.layer.get_canvas(self.screen)
+        screen = pygame.Surface((100, 100))
+        other = self.layer.get_canvas(screen)
+
+        self.assertIsNot(other, canvas)
+        self.assertIs(other.get_parent(), screen)
+
+    def test_canvas_clipped_to_parent_surface(self):
+        self.layer.set_position(80, 90)
+
+        self.assertEqual(self.layer.get_canvas(self.screen).get_size(), (20, 10))
+
+    def test_layer_outside_screen_has_no_canvas(self):
+        self.layer.set_position(200, 20)
+
+        self.assertIsNone(self.layer.get_canvas(self.screen))
+        self.assertIsNone(self.layer.get_canvas(self.screen))
+
+    def test_screen_clip_applied_and_cleared(self):
+        canvas = self.layer.get_canvas(self.screen)
+
+        self.screen.set_clip(pygame.Rect(0, 0, 20, 30))
+        self.assertIs(self.layer.get_canvas(self.screen), canvas)
+        self.assertEqual(canvas.get_clip(), pygame.Rect(0, 0, 10, 10))
+
+        self.screen.set_clip(None)
+        self.layer.get_canvas(self.screen)
+        self.assertEqual(canvas.get_clip(), canvas.get_rect())
+
+
+class DrawLayerTest(unittest.TestCase):
+    def make_panels(self):
+        root = Layer("root panel")
+        root.set_size(100, 100)
+        root.graphics = ColorGraphics(root, (255, 0, 0), (100, 100))
+
+        child = Layer("child panel")
+        child.set_position(10, 10)
+        child.set_size(50, 50)
+        child.graphics = ColorGraphics(child, (0, 255, 0), (50, 50))
+        child.set_parent_layer(root, False)
+
+        grandchild = Layer("grandchild panel")
+        grandchild.set_position(5, 5)
+        grandchild.set_size(10, 10)
+        grandchild.graphics = ColorGraphics(grandchild, (0, 0, 255), (10, 10))
+        grandchild.set_parent_layer(child, False)
+
+        return root, child, grandchild
+
+    def test_nested_layers_drawn_on_cached_canvases(self):
+        screen = pygame.Surface((100, 100))
+        root, child, grandchild = self.make_panels()
+        root.draw(screen)
+        canvases = child.canvas, grandchild.canvas
+
+        screen.fill((0, 0, 0))
+        root.draw(screen)
+
+        self.assertEqual((child.canvas, grandchild.canvas), canvases)
+        self.assertEqual(screen.get_at((0, 0)), (255, 0, 0))
+        self.assertEqual(screen.get_at((10, 10)), (0, 255, 0))
+        self.assertEqual(screen.get_at((15, 15)), (0, 0, 255))
+
+    def test_moved_layer_drawn_in_new_position(self):
+        screen = pygame.Surface((100, 100))
+        root, child, grandchild = self.make_panels()
+        root.draw(screen)
+
+        child.set_position(40, 40)
+        root.draw(screen)
+
+        self.assertEqual(screen.get_at((45, 45)), (0, 0, 255))
+        self.assertEqual(screen.get_at((40, 40)), (0, 255, 0))
+
+    def test_layer_outside_parent_not_drawn(self):
+        screen = pygame.Surface((100, 100))
+        root, child, grandchild = self.make_panels()
+        grandchild.set_position(60, 60)
+        root.draw(screen)
+
+        self.assertIsNone(grandchild.canvas)
+        self.assertEqual(screen.get_at((10, 10)), (0, 255, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+import random
+import unittest
+
+import pygame
+
+from src.collections import Group
+from src.entities import Layer, Sprite
+from src.graphics import Graphics
+from src.profiler import FrameProfiler
+
+
+class ImageGraphics(Graphics):
+    def __init__(self, entity, size):
+        super(ImageGraphics, self).__init__(entity)
+        self.image = pygame.Surface(size)
+
+
+class ColorGraphics(Graphics):
+    def __init__(self, entity, color, size):
+        super(ColorGraphics, self).__init__(entity)
+        self.image = pygame.Surface(size)
+        self.image.fill(color)
+
+
+class DrawItemsTest(unittest.TestCase):
+    # four sprites on the canvas and four off of it, with one of
+    #   each hidden
+    def make_layer(self, grid):
+        layer = Layer("draw test")
+        group = Group("draw test group")
+        layer.groups.append(group)
+
+        positions = [(10, 10), (30, 30), (50, 10), (70, 70),
+                     (300, 10), (10, 300), (400, 400), (-50, 10)]
+
+        for i, position in enumerate(positions):
+            sprite = Sprite("sprite {}".format(i))
+            sprite.set_group(group)
+            sprite.graphics = ImageGraphics(sprite, (10, 10))
+            sprite.set_size(10, 10)
+            sprite.set_position(*position)
+
+        group.sprites[0].visible = False
+        group.sprites[4].visible = False
+
+        if grid:
+            group.set_grid(32)
+
+        return layer
+
+    def get_counts(self, grid, profiler=False):
+        layer = self.make_layer(grid)
+        if profiler:
+            layer.profiler = FrameProfiler()
+        layer.draw_items(pygame.Surface((100, 100)))
+
+        return layer.drawn_count, layer.culled_count
+
+    def test_hidden_sprites_not_culled(self):
+        self.assertEqual(self.get_counts(False), (3, 3))
+
+    def test_hidden_sprites_not_culled_with_grid(self):
+        self.assertEqual(self.get_counts(True), (3, 3))
+
+    def test_counts_same_with_profiler(self):
+        self.assertEqual(self.get_counts(False, True), (3, 3))
+        self.assertEqual(self.get_counts(True, True), (3, 3))
+
+
+class BatchedDrawTest(unittest.TestCase):
+    # overlapping sprites in two groups, with the last one of the
+    #   second group hidden
+    def make_layer(self, grid):
+        r = random.Random(3)
+        layer = Layer("batch test")
+
+        for name in ("first", "second"):
+            group = Group(name)
+            layer.groups.append(group)
+
+            for i in range(20):
+                sprite = Sprite("{} {}".format(name, i))
+                sprite.set_group(group)
+                color = (r.randrange(256), r.randrange(256), r.randrange(256))
+                size = (r.randint(5, 40), r.randint(5, 40))
+                sprite.graphics = ColorGraphics(sprite, color, size)
+                sprite.set_size(*size)
+                sprite.set_position(r.randint(-20, 90), r.randint(-20, 90))
+
+            if grid:
+                group.set_grid(16)
+
+        layer.groups[1].sprites[-1].visible = False
+
+        return layer
+
+    # draws each visible sprite with its own blit() call, in group
+    #   and sprite order
+    @staticmethod
+    def draw_reference(layer, canvas, offset):
+        ox, oy = offset
+
+        for group in layer.groups:
+            for item in group.sprites:
+                if item.visible and item.graphics and item.image:
+                    x, y = item.position
+                    canvas.blit(item.image, (x + ox, y + oy))
+
+    def check_draw(self, grid, offset=(0, 0)):
+        layer = self.make_layer(grid)
+        expected = pygame.Surface((100, 100))
+        self.draw_reference(layer, expected, offset)
+
+        canvas = pygame.Surface((100, 100))
+        layer.draw_items(canvas, offset)
+
+        self.assertEqual(pygame.image.tobytes(canvas, "RGB"),
+                         pygame.image.tobytes(expected, "RGB"))
+
+    def test_same_output_as_single_blits(self):
+        self.check_draw(False)
+
+    def test_same_output_with_offset(self):
+        self.check_draw(False, (7, -5))
+
+    def test_same_output_with_grid(self):
+        self.check_draw(True, (7, -5))
+
+    def test_later_items_drawn_on_top(self):
+        layer = Layer("batch order test")
+        group = Group("batch order group")
+        layer.groups.append(group)
+
+        for color in ((255, 0, 0), (0, 255, 0), (0, 0, 255)):
+            sprite = Sprite("sprite")
+            sprite.set_group(group)
+            sprite.graphics = ColorGraphics(sprite, color, (10, 10))
+            sprite.set_size(10, 10)
+        group.sprites[2].visible = False
+
+        canvas = pygame.Surface((10, 10))
+        layer.draw_items(canvas)
+
+        self.assertEqual(canvas.get_at((5, 5)), (0, 255, 0))
+        self.assertEqual(layer.drawn_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,230 @@
+import unittest
+
+from src.meters import Clock, Meter, MeterBank, Timer, np
+
+
+class MeterTest(unittest.TestCase):
+    METERS = [(0, 5), (0, 0, 5), (2, 4, 9), (0, 3, 3), (-3, 0, 3), (.5, 2, 4.5), (0, .5, 2)]
+
+    def test_slots(self):
+        meter = Meter("meter", 10)
+
+        self.assertFalse(hasattr(meter, "__dict__"))
+        with self.assertRaises(AttributeError):
+            meter.other = 1
+
+    def test_setters_normalize(self):
+        meter = Meter("meter", 5, 10)
+        meter.value = 20
+        self.assertEqual(meter.value, 10)
+
+        meter.minimum = 15
+        self.assertEqual((meter.minimum, meter.value), (10, 10))
+
+        meter.maximum = 2
+        self.assertEqual((meter.maximum, meter.value), (10, 10))
+
+        with self.assertRaises(ValueError):
+            Meter("meter", 10, 5, 0)
+
+    def test_shift_matches_stepping(self):
+        for args in self.METERS:
+            for steps in range(-25, 26):
+                shifted = Meter("shifted", *args)
+                stepped = Meter("stepped", *args)
+
+                for i in range(int(abs(steps) % (stepped.get_span() + 1))):
+                    if steps > 0:
+                        stepped.next()
+                    else:
+                        stepped.prev()
+
+                self.assertEqual(shifted.shift(steps), stepped.value,
+                                 "{} shifted {}".format(args, steps))
+
+    def test_next_and_prev_wrap(self):
+        meter = Meter("meter", 0, 2)
+
+        self.assertEqual([meter.next() for i in range(4)], [1, 2, 0, 1])
+        self.assertEqual([meter.prev() for i in range(4)], [0, 2, 1, 0])
+
+
+class TimerTest(unittest.TestCase):
+    def test_callbacks(self):
+        log = []
+        timer = Timer("timer", 3, on_tick=lambda: log.append(timer.value),
+                      on_switch_off=lambda: log.append("off"))
+
+        switches = [timer.tick() for i in range(5)]
+
+        self.assertEqual(switches, [False, False, True, False, False])
+        self.assertEqual(log, [2, 1, 0, "off", 0, 0])
+        self.assertTrue(timer.is_off())
+
+    def test_callbacks_assigned(self):
+        log = []
+        timer = Timer("timer", 2)
+        self.assertIsNone(timer.on_tick())
+
+        timer.on_switch_off = lambda: log.append("off")
+        timer.tick()
+        timer.tick()
+
+        self.assertEqual(log, ["off"])
+
+    def test_subclass_methods(self):
+        class LoggedTimer(Timer):
+            def __init__(self, name, duration):
+                self.log = []
+                super(LoggedTimer, self).__init__(name, duration)
+
+            def on_tick(self):
+                self.log.append("tick")
+
+            def on_switch_off(self):
+                self.log.append("off")
+
+        timer = LoggedTimer("timer", 2)
+        timer.tick()
+        timer.tick()
+
+        self.assertEqual(timer.log, ["tick", "tick", "off"])
+
+    def test_reset_and_state(self):
+        timer = Timer("timer", 4)
+        timer.tick()
+
+        self.assertTrue(timer.is_on())
+        self.assertAlmostEqual(timer.get_ratio(), .25)
+
+        timer.value = 0
+        self.assertTrue(timer.is_off())
+        self.assertEqual(timer.reset(), 4)
+        self.assertTrue(timer.is_full())
+
+        with self.assertRaises(ValueError):
+            Timer("timer", 0)
+
+
+class ClockTimerValueTest(unittest.TestCase):
+    def make_clock(self, *timers):
+        clock = Clock("test clock")
+        clock.add_timers(*timers)
+
+        return clock
+
+    def test_value_mid_countdown(self):
+        timer = Timer("timer", 10)
+        clock = self.make_clock(timer)
+
+        for i in range(3):
+            clock.tick()
+
+        self.assertEqual(timer.value, 7)
+        self.assertAlmostEqual(timer.get_ratio(), .3)
+        self.assertTrue(timer.is_on())
+        self.assertFalse(timer.is_off())
+
+    def test_value_matches_ticked_timer(self):
+        timer = Timer("timer", 25, temp=False)
+        ticked = Timer("ticked", 25, temp=False)
+        clock = self.make_clock(timer)
+
+        for i in range(80):
+            clock.tick()
+            ticked.tick()
+            if ticked.is_off():
+                ticked.reset()
+
+            self.assertEqual(timer.value, ticked.value)
+            self.assertAlmostEqual(timer.get_ratio(), ticked.get_ratio())
+
+    def test_set_value_reschedules(self):
+        log = []
+        timer = Timer("timer", 10, on_switch_off=lambda: log.append("off"))
+        clock = self.make_clock(timer)
+
+        clock.tick()
+        timer.value = 2
+        clock.tick()
+        self.assertEqual(timer.value, 1)
+        self.assertEqual(log, [])
+
+        clock.tick()
+        self.assertEqual(log, ["off"])
+        self.assertEqual(clock.timers, [])
+
+    def test_on_tick_set_after_add(self):
+        ticks = []
+        timer = Timer("timer", 5)
+        clock = self.make_clock(timer)
+
+        clock.tick()
+        clock.tick()
+        timer.on_tick = lambda: ticks.append(timer.value)
+        for i in range(5):
+            clock.tick()
+
+        self.assertEqual(ticks, [2, 1, 0])
+        self.assertEqual(clock.timers, [])
+
+    def test_on_tick_set_before_first_tick(self):
+        ticks = []
+        timer = Timer("timer", 3)
+        clock = Clock("test clock")
+        clock.add_timers(timer)
+        timer.on_tick = lambda: ticks.append(timer.value)
+
+        for i in range(4):
+            clock.tick()
+
+        self.assertEqual(ticks, [2, 1, 0])
+
+    def test_remove_timer_keeps_value(self):
+        timer = Timer("timer", 10)
+        clock = self.make_clock(timer)
+
+        for i in range(4):
+            clock.tick()
+        clock.remove_timer("timer")
+        clock.tick()
+
+        self.assertEqual(timer.value, 6)
+        self.assertEqual(clock.timers, [])
+
+
+@unittest.skipIf(np is None, "MeterBank requires numpy")
+class MeterBankTest(unittest.TestCase):
+    def make_bank(self):
+        bank = MeterBank("test bank")
+
+        for i in range(4):
+            bank.add_meter("meter {}".format(i), 5, 10)
+
+        return bank
+
+    def test_add_repeated_index(self):
+        bank = self.make_bank()
+        bank.add(1, [1, 1, 2, 1])
+
+        self.assertEqual(list(bank.values), [5, 8, 6, 5])
+
+    def test_add_repeated_index_amounts(self):
+        bank = self.make_bank()
+        bank.add(np.array([1, 2, 3]), [0, 0, 3])
+        bank.subtract(np.array([4, 4]), [2, 2])
+
+        self.assertEqual(list(bank.values), [8, 5, 0, 8])
+
+    def test_add_normalizes_total(self):
+        bank = self.make_bank()
+        bank.add(4, [0, 0])
+        bank.add(2)
+        bank.subtract(1, np.array([False, True, False, True]))
+
+        self.assertEqual(list(bank.values), [10, 6, 7, 6])
+        self.assertEqual(bank[0].value, 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
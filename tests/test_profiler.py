@@ -0,0 +1,36 @@
+import unittest
+
+from src.profiler import FrameProfiler
+
+
+class FrameProfilerTest(unittest.TestCase):
+    def test_one_sample_per_frame(self):
+        profiler = FrameProfiler(depth=10)
+
+        for frame in range(4):
+            for update in range(3):
+                profiler.add_time("update", .002)
+            profiler.add_time("draw", .004)
+            profiler.end_frame()
+
+        update = profiler.phases["update"]
+        self.assertEqual(len(update), 4)
+        self.assertEqual(len(profiler.phases["draw"]), 4)
+        self.assertAlmostEqual(update[-1], .006)
+
+        stats = profiler.get_stats()
+        self.assertAlmostEqual(stats["update"]["average"], 6)
+        self.assertAlmostEqual(stats["draw"]["maximum"], 4)
+
+    def test_phases_added_at_end_of_frame(self):
+        profiler = FrameProfiler(depth=10)
+        profiler.add_time("update", .001)
+        self.assertEqual(profiler.get_stats(), {})
+
+        profiler.end_frame()
+        self.assertIn("update", profiler.get_stats())
+        self.assertEqual(len(profiler.get_trace()), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+import random
+import unittest
+
+from src.collections import Group
+from src.entities import Sprite
+from src.geometry import Rect, RectArrays, np
+
+
+def get_random_rects(r, n, area=200, size=40):
+    rects = []
+
+    for _ in range(n):
+        # include some fractional positions and sizes, and some rects
+        #   with a width or height of zero
+        x = r.choice((r.randint(-20, area), r.uniform(-20, area)))
+        y = r.choice((r.randint(-20, area), r.uniform(-20, area)))
+        w = r.choice((0, r.randint(1, size), r.uniform(0, size)))
+        h = r.choice((0, r.randint(1, size), r.uniform(0, size)))
+        rects.append(Rect((w, h), (x, y)))
+
+    return rects
+
+
+def make_arrays(rects, capacity=4):
+    arrays = RectArrays(capacity)
+
+    for i, rect in enumerate(rects):
+        arrays.set(i, rect.x, rect.y, rect.w, rect.h)
+
+    return arrays
+
+
+def as_lists(pairs, points):
+    return [tuple(p) for p in pairs.tolist()], [tuple(p) for p in points.tolist()]
+
+
+@unittest.skipIf(np is None, "RectArrays requires numpy")
+class RectArraysTest(unittest.TestCase):
+    def setUp(self):
+        self.r = random.Random(8)
+        self.rects = get_random_rects(self.r, 120)
+
+    def get_expected_rect_collisions(self, a, b, same):
+        pairs, points = [], []
+
+        for i, rect in enumerate(a):
+            for j, other in enumerate(b):
+                if same and j <= i:
+                    continue
+
+                point = rect.get_rect_collision(other)
+                if point:
+                    pairs.append((i, j))
+                    points.append(point)
+
+        return pairs, points
+
+    def test_rect_collisions_match_rect(self):
+        arrays = make_arrays(self.rects)
+        expected = self.get_expected_rect_collisions(self.rects, self.rects, True)
+
+        self.assertTrue(expected[0])
+        self.assertEqual(as_lists(*arrays.get_rect_collisions()), expected)
+
+    def test_rect_collisions_with_other_arrays(self):
+        other_rects = get_random_rects(self.r, 50)
+        expected = self.get_expected_rect_collisions(self.rects, other_rects, False)
+        result = make_arrays(self.rects).get_rect_collisions(make_arrays(other_rects))
+
+        self.assertEqual(as_lists(*result), expected)
+
+    def test_rect_collisions_in_blocks(self):
+        arrays = make_arrays(self.rects)
+        expected = as_lists(*arrays.get_rect_collisions())
+        arrays.BLOCK_SIZE = 200
+
+        self.assertEqual(as_lists(*arrays.get_rect_collisions()), expected)
+
+    def test_circle_collisions_match_rect(self):
+        positions = [(self.r.uniform(0, 200), self.r.uniform(0, 200)) for _ in range(40)]
+        radii = [self.r.uniform(0, 40) for _ in positions]
+
+        pairs, points = [], []
+        for k, (radius, position) in enumerate(zip(radii, positions)):
+            for i, rect in enumerate(self.rects):
+                point = rect.get_circle_collision(radius, position)
+
+                if point:
+                    pairs.append((k, i))
+                    points.append(point)
+
+        arrays = make_arrays(self.rects)
+        self.assertTrue(pairs)
+        self.assertEqual(as_lists(*arrays.get_circle_collisions(radii, positions)),
+                         (pairs, points))
+
+        arrays.BLOCK_SIZE = 1000
+        self.assertEqual(as_lists(*arrays.get_circle_collisions(radii, positions)),
+                         (pairs, points))
+
+    def test_single_radius_broadcast(self):
+        arrays = make_arrays(self.rects)
+        positions = [(50, 50), (150, 20)]
+
+        self.assertEqual(as_lists(*arrays.get_circle_collisions(25, positions)),
+                         as_lists(*arrays.get_circle_collisions([25, 25], positions)))
+
+    def test_empty_output(self):
+        arrays = RectArrays()
+        pairs, points = arrays.get_rect_collisions()
+
+        self.assertEqual(pairs.shape, (0, 2))
+        self.assertEqual(points.shape, (0, 2))
+
+    def test_set_grows_and_remove_moves_last_row(self):
+        arrays = make_arrays(self.rects[:10], capacity=2)
+
+        self.assertEqual(len(arrays), 10)
+        self.assertGreaterEqual(len(arrays.x), 10)
+
+        arrays.remove(3)
+        self.assertNotIn(3, arrays)
+        self.assertEqual(arrays.items[3], 9)
+        self.assertEqual(arrays.index[9], 3)
+        self.assertEqual(arrays.x[3], self.rects[9].x)
+
+        expected = self.get_expected_rect_collisions(
+            [self.rects[i] for i in arrays.items],
+            [self.rects[i] for i in arrays.items], True)
+        self.assertEqual(as_lists(*arrays.get_rect_collisions()), expected)
+
+
+@unittest.skipIf(np is None, "RectArrays requires numpy")
+class GroupBatchTest(unittest.TestCase):
+    def setUp(self):
+        r = random.Random(2)
+        self.group = Group("batch group")
+        self.group.set_arrays()
+
+        for i in range(30):
+            sprite = Sprite(str(i))
+            sprite.set_group(self.group)
+            sprite.set_size(r.randint(5, 40), r.randint(5, 40))
+            sprite.set_position(r.randint(0, 150), r.randint(0, 150))
+
+    def test_batch_collisions_match_rects(self):
+        pairs, points = self.group.get_batch_collisions()
+        items = self.group.arrays.items
+
+        sprites = self.group.sprites
+        expected = [(a, b) for i, a in enumerate(sprites) for b in sprites[i + 1:]
+                    if a.rect.get_rect_collision(b.rect)]
+
+        self.assertTrue(expected)
+        self.assertEqual([(items[i], items[j]) for i, j in pairs.tolist()], expected)
+        for (i, j), point in zip(pairs.tolist(), points.tolist()):
+            self.assertEqual(tuple(point), items[i].rect.get_rect_collision(items[j].rect))
+
+    def test_moved_sprite_updates_arrays(self):
+        sprite = self.group.sprites[0]
+        sprite.set_position(1000, 1000)
+
+        pairs, points = self.group.get_batch_circle_collisions(5, [(1000, 1000)])
+        self.assertEqual(pairs.tolist(), [[0, 0]])
+        self.assertEqual(points.tolist(), [list(sprite.rect.topleft)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+import random
+import unittest
+
+import pygame
+
+from src.collections import Group
+from src.entities import Sprite
+from src.geometry import Rect, SpatialGrid, box_in_radius
+
+
+def get_random_boxes(r, n, area=200, size=30):
+    return [(r.randint(-area // 4, area), r.randint(-area // 4, area),
+             r.randint(1, size), r.randint(1, size)) for _ in range(n)]
+
+
+# True if two boxes collide as pygame.Rect objects
+def rects_collide(a, b):
+    return pygame.Rect(a).colliderect(pygame.Rect(b))
+
+
+class SpatialGridTest(unittest.TestCase):
+    def setUp(self):
+        self.r = random.Random(11)
+        self.boxes = get_random_boxes(self.r, 80)
+        self.grid = SpatialGrid(16)
+
+        for i, box in enumerate(self.boxes):
+            self.grid.add(i, *box)
+
+    def test_rect_items_match_linear_scan(self):
+        for box in get_random_boxes(self.r, 50, size=80):
+            expected = [i for i, b in enumerate(self.boxes) if rects_collide(box, b)]
+
+            self.assertEqual(self.grid.get_rect_items(*box), expected)
+
+    def test_radius_items_match_linear_scan(self):
+        for _ in range(50):
+            position = self.r.randint(-50, 250), self.r.randint(-50, 250)
+            radius = self.r.randint(0, 60)
+            expected = [i for i, b in enumerate(self.boxes)
+                        if box_in_radius(b, position, radius)]
+
+            self.assertEqual(self.grid.get_radius_items(position, radius), expected)
+
+    def test_pairs_match_linear_scan(self):
+        n = len(self.boxes)
+        expected = [(i, j) for i in range(n) for j in range(i + 1, n)
+                    if rects_collide(self.boxes[i], self.boxes[j])]
+
+        self.assertTrue(expected)
+        self.assertEqual(self.grid.get_pairs(), expected)
+
+    def test_pairs_with_other_grid(self):
+        other_boxes = get_random_boxes(self.r, 40)
+        other = SpatialGrid(32)
+        for i, box in enumerate(other_boxes):
+            other.add(i, *box)
+
+        expected = [(i, j) for i, a in enumerate(self.boxes)
+                    for j, b in enumerate(other_boxes) if rects_collide(a, b)]
+
+        self.assertEqual(self.grid.get_pairs(other), expected)
+
+    def test_large_query_checks_cells_in_use(self):
+        box = -1000, -1000, 3000, 3000
+
+        self.assertEqual(self.grid.get_rect_items(*box), list(range(len(self.boxes))))
+
+    def test_move_keeps_order_and_updates_cells(self):
+        self.grid.add(0, 500, 500, 10, 10)
+        self.grid.add(1, 500, 505, 10, 10)
+
+        self.assertEqual(len(self.grid), len(self.boxes))
+        self.assertEqual(self.grid.get_rect_items(495, 495, 20, 20), [0, 1])
+        self.assertEqual(self.grid.get_rect_items(*self.boxes[0]),
+                         [i for i, b in enumerate(self.boxes)
+                          if i > 1 and rects_collide(self.boxes[0], b)])
+
+    def test_remove_clears_empty_cells(self):
+        grid = SpatialGrid(10)
+        grid.add("a", 0, 0, 25, 5)
+        grid.add("b", 0, 0, 5, 5)
+        grid.remove("a")
+
+        self.assertNotIn("a", grid)
+        self.assertEqual(list(grid.cells), [(0, 0)])
+        self.assertEqual(grid.get_rect_items(0, 0, 30, 30), ["b"])
+
+
+class GroupQueryTest(unittest.TestCase):
+    # returns a group with and a group without a grid, holding sprites
+    #   with the same rects
+    @staticmethod
+    def make_groups(boxes):
+        groups = []
+
+        for grid in (False, True):
+            group = Group("grid" if grid else "no grid")
+            if grid:
+                group.set_grid(16)
+
+            for i, (x, y, w, h) in enumerate(boxes):
+                sprite = Sprite(str(i))
+                sprite.set_group(group)
+                sprite.set_size(w, h)
+                sprite.set_position(x, y)
+
+            groups.append(group)
+
+        return groups
+
+    @staticmethod
+    def names(items):
+        return [i.name for i in items]
+
+    @staticmethod
+    def pair_names(pairs):
+        return [(a.name, b.name) for a, b in pairs]
+
+    def setUp(self):
+        self.r = random.Random(4)
+        self.boxes = get_random_boxes(self.r, 60)
+        self.plain, self.gridded = self.make_groups(self.boxes)
+
+    def test_members_in_rect(self):
+        for x, y, w, h in get_random_boxes(self.r, 30, size=60):
+            rect = Rect((w, h), (x, y))
+            expected = [str(i) for i, b in enumerate(self.boxes)
+                        if rects_collide((x, y, w, h), b)]
+
+            self.assertEqual(self.names(self.plain.get_members_in_rect(rect)), expected)
+            self.assertEqual(self.names(self.gridded.get_members_in_rect(rect)), expected)
+
+    def test_members_in_radius(self):
+        for _ in range(30):
+            position = self.r.randint(0, 200), self.r.randint(0, 200)
+            radius = self.r.randint(0, 50)
+            expected = [str(i) for i, b in enumerate(self.boxes)
+                        if box_in_radius(b, position, radius)]
+
+            self.assertEqual(
+                self.names(self.plain.get_members_in_radius(position, radius)), expected)
+            self.assertEqual(
+                self.names(self.gridded.get_members_in_radius(position, radius)), expected)
+
+    def test_collisions_same_with_and_without_grid(self):
+        expected = self.pair_names(self.plain.get_collisions())
+
+        self.assertTrue(expected)
+        self.assertEqual(self.pair_names(self.gridded.get_collisions()), expected)
+
+    def test_collisions_with_other_group(self):
+        other_boxes = get_random_boxes(self.r, 30)
+        other_plain, other_gridded = self.make_groups(other_boxes)
+        expected = self.pair_names(self.plain.get_collisions(other_plain))
+
+        self.assertTrue(expected)
+        for a in (self.plain, self.gridded):
+            for b in (other_plain, other_gridded):
+                self.assertEqual(self.pair_names(a.get_collisions(b)), expected)
+
+    def test_moving_sprite_updates_grid(self):
+        sprite = self.gridded.sprites[0]
+        sprite.set_position(1000, 1000)
+        rect = Rect((10, 10), (995, 995))
+
+        self.assertEqual(self.gridded.get_members_in_rect(rect), [sprite])
+
+
+if __name__ == "__main__":
+    unittest.main()
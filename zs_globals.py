@@ -70,7 +70,16 @@ class Resources:
 
 class Settings:
     SCREEN_SIZE = 1100, 600
-    FRAME_RATE = 60
+    FRAME_RATE = 60         # display frames per second
+    UPDATE_RATE = 60        # fixed timestep updates per second
+    MAX_UPDATES = 5         # most updates run per display frame
+    PROFILER_DEPTH = 120    # frames of timing data kept by a FrameProfiler
+    DIRTY_RECTS = False     # only redraw the areas of the screen that change
+    DIRTY_RECT_LIMIT = 16   # above this many areas the screen is drawn once
+    GRID_CELL_SIZE = 64     # default cell size of a Group's SpatialGrid
+    EVENT_BUS = False       # deliver events once per frame with an EventBus
+    EVENT_MAX_DEPTH = 8     # cascade levels an EventBus delivers in a frame
+    EVENT_TRACE_DEPTH = 10000   # records kept by an EventTracer
     APP_START = "demo"
 
 
@@ -122,3 +131,6 @@ class DefaultUI:
     BORDER_CORNER_CHOICES = "abcd"
     RECT_DRAW_WIDTH = 5
     RECT_DRAW_COLOR = 255, 0, 0
+    PROFILER_FONT = "courier-new"
+    PROFILER_FONT_SIZE = 12
+    PROFILER_COLOR = 255, 255, 0